@@ -7,7 +7,9 @@ from sqlalchemy import pool
 from alembic import context
 from app.core.config import settings
 from app.core.database import Base
-from app.models import Channel, Post, User  # noqa
+from app.models import (  # noqa
+    Channel, Post, User, TelegramPeer, BackfillChunk, KeywordDocumentFrequency, CheckedPostGap
+)
 
 # this is the Alembic Config object
 config = context.config
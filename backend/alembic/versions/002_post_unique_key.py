@@ -0,0 +1,32 @@
+"""Unique (channel_id, post_id) key for posts
+
+Revision ID: 002_post_unique_key
+Revises: 001_initial
+Create Date: 2024-02-01 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '002_post_unique_key'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Remove duplicates left by the old per-post existence check, keep the oldest row
+    op.execute(
+        """
+        DELETE FROM posts a
+        USING posts b
+        WHERE a.channel_id = b.channel_id
+          AND a.post_id = b.post_id
+          AND a.id > b.id
+        """
+    )
+    op.create_unique_constraint('uq_post_channel_post_id', 'posts', ['channel_id', 'post_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_post_channel_post_id', 'posts', type_='unique')
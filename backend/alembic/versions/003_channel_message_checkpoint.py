@@ -0,0 +1,38 @@
+"""Message ID checkpoint for channels
+
+Revision ID: 003_channel_message_checkpoint
+Revises: 002_post_unique_key
+Create Date: 2024-02-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_channel_message_checkpoint'
+down_revision = '002_post_unique_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('channels', sa.Column('last_message_id', sa.BigInteger(), nullable=True))
+    
+    # Start checkpoints from posts that are already stored
+    op.execute(
+        """
+        UPDATE channels
+        SET last_message_id = stored.max_id
+        FROM (
+            SELECT channel_id, MAX(CAST(post_id AS BIGINT)) AS max_id
+            FROM posts
+            WHERE post_id ~ '^[0-9]+$'
+            GROUP BY channel_id
+        ) AS stored
+        WHERE channels.id = stored.channel_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('channels', 'last_message_id')
@@ -0,0 +1,35 @@
+"""Resolved Telegram peer cache
+
+Revision ID: 004_telegram_peers
+Revises: 003_channel_message_checkpoint
+Create Date: 2024-03-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004_telegram_peers'
+down_revision = '003_channel_message_checkpoint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'telegram_peers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=255), nullable=False),
+        sa.Column('peer_id', sa.BigInteger(), nullable=False),
+        sa.Column('access_hash', sa.BigInteger(), nullable=False),
+        sa.Column('resolved_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_telegram_peers_id'), 'telegram_peers', ['id'], unique=False)
+    op.create_index(op.f('ix_telegram_peers_username'), 'telegram_peers', ['username'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_telegram_peers_username'), table_name='telegram_peers')
+    op.drop_index(op.f('ix_telegram_peers_id'), table_name='telegram_peers')
+    op.drop_table('telegram_peers')
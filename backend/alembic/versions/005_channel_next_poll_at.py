@@ -0,0 +1,25 @@
+"""Next poll time for channels
+
+Revision ID: 005_channel_next_poll_at
+Revises: 004_telegram_peers
+Create Date: 2024-03-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005_channel_next_poll_at'
+down_revision = '004_telegram_peers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('channels', sa.Column('next_poll_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_channels_next_poll_at'), 'channels', ['next_poll_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_channels_next_poll_at'), table_name='channels')
+    op.drop_column('channels', 'next_poll_at')
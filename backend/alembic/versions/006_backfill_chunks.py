@@ -0,0 +1,45 @@
+"""Backfill chunk checkpoints
+
+Revision ID: 006_backfill_chunks
+Revises: 005_channel_next_poll_at
+Create Date: 2024-03-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_backfill_chunks'
+down_revision = '005_channel_next_poll_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'backfill_chunks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('channel_id', sa.Integer(), nullable=False),
+        sa.Column('min_id', sa.BigInteger(), nullable=False),
+        sa.Column('max_id', sa.BigInteger(), nullable=False),
+        sa.Column('cursor_id', sa.BigInteger(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('posts_count', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['channel_id'], ['channels.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('channel_id', 'min_id', name='uq_backfill_chunk_channel_min_id')
+    )
+    op.create_index(op.f('ix_backfill_chunks_id'), 'backfill_chunks', ['id'], unique=False)
+    op.create_index(op.f('ix_backfill_chunks_channel_id'), 'backfill_chunks', ['channel_id'], unique=False)
+    op.create_index(op.f('ix_backfill_chunks_status'), 'backfill_chunks', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_backfill_chunks_status'), table_name='backfill_chunks')
+    op.drop_index(op.f('ix_backfill_chunks_channel_id'), table_name='backfill_chunks')
+    op.drop_index(op.f('ix_backfill_chunks_id'), table_name='backfill_chunks')
+    op.drop_table('backfill_chunks')
@@ -0,0 +1,26 @@
+"""Takeout flag for backfill chunks
+
+Revision ID: 007_backfill_chunk_takeout
+Revises: 006_backfill_chunks
+Create Date: 2024-03-25 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_backfill_chunk_takeout'
+down_revision = '006_backfill_chunks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'backfill_chunks',
+        sa.Column('use_takeout', sa.Boolean(), nullable=True, server_default=sa.false())
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('backfill_chunks', 'use_takeout')
@@ -0,0 +1,32 @@
+"""Parse failure tracking and dead-letter state for channels
+
+Revision ID: 008_channel_parse_failures
+Revises: 007_backfill_chunk_takeout
+Create Date: 2024-04-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_channel_parse_failures'
+down_revision = '007_backfill_chunk_takeout'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'channels',
+        sa.Column('failure_count', sa.Integer(), nullable=True, server_default='0')
+    )
+    op.add_column('channels', sa.Column('last_error', sa.Text(), nullable=True))
+    op.add_column('channels', sa.Column('dead_lettered_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_channels_dead_lettered_at'), 'channels', ['dead_lettered_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_channels_dead_lettered_at'), table_name='channels')
+    op.drop_column('channels', 'dead_lettered_at')
+    op.drop_column('channels', 'last_error')
+    op.drop_column('channels', 'failure_count')
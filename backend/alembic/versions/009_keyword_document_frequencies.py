@@ -0,0 +1,29 @@
+"""Keyword document frequencies for TF-IDF scoring
+
+Revision ID: 009_keyword_document_frequencies
+Revises: 008_channel_parse_failures
+Create Date: 2024-04-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_keyword_document_frequencies'
+down_revision = '008_channel_parse_failures'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'keyword_document_frequencies',
+        sa.Column('channel_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('term', sa.String(length=100), nullable=False),
+        sa.Column('document_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('channel_id', 'term')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('keyword_document_frequencies')
@@ -0,0 +1,32 @@
+"""Content analysis columns for posts
+
+Revision ID: 010_post_analysis_columns
+Revises: 009_keyword_document_frequencies
+Create Date: 2024-04-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '010_post_analysis_columns'
+down_revision = '009_keyword_document_frequencies'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('category', sa.String(length=50), nullable=True))
+    op.add_column('posts', sa.Column('keywords', postgresql.ARRAY(sa.Text()), nullable=True))
+    op.add_column('posts', sa.Column('reading_time', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_posts_category'), 'posts', ['category'], unique=False)
+    op.create_index('idx_post_keywords', 'posts', ['keywords'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_post_keywords', table_name='posts')
+    op.drop_index(op.f('ix_posts_category'), table_name='posts')
+    op.drop_column('posts', 'reading_time')
+    op.drop_column('posts', 'keywords')
+    op.drop_column('posts', 'category')
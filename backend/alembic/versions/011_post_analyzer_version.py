@@ -0,0 +1,24 @@
+"""Analyzer version of derived post fields
+
+Revision ID: 011_post_analyzer_version
+Revises: 010_post_analysis_columns
+Create Date: 2024-04-25 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011_post_analyzer_version'
+down_revision = '010_post_analysis_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL marks posts analyzed before versions were recorded, the re-analysis task picks them up
+    op.add_column('posts', sa.Column('analyzer_version', sa.String(length=100), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('posts', 'analyzer_version')
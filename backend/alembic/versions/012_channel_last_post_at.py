@@ -0,0 +1,33 @@
+"""Newest post date on channels and (channel_id, date) post index
+
+Revision ID: 012_channel_last_post_at
+Revises: 011_post_analyzer_version
+Create Date: 2024-05-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012_channel_last_post_at'
+down_revision = '011_post_analyzer_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('channels', sa.Column('last_post_at', sa.DateTime(), nullable=True))
+    op.create_index('idx_post_channel_date', 'posts', ['channel_id', 'date'], unique=False)
+    # Ingestion keeps the column current from now on
+    op.execute(
+        """
+        UPDATE channels SET last_post_at = (
+            SELECT max(posts.date) FROM posts WHERE posts.channel_id = channels.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_post_channel_date', table_name='posts')
+    op.drop_column('channels', 'last_post_at')
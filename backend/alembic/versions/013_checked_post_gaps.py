@@ -0,0 +1,36 @@
+"""Checked post gaps
+
+Revision ID: 013_checked_post_gaps
+Revises: 012_channel_last_post_at
+Create Date: 2024-05-06 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_checked_post_gaps'
+down_revision = '012_channel_last_post_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'checked_post_gaps',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('channel_id', sa.Integer(), nullable=False),
+        sa.Column('first_id', sa.BigInteger(), nullable=False),
+        sa.Column('last_id', sa.BigInteger(), nullable=False),
+        sa.Column('checked_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['channel_id'], ['channels.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_checked_post_gaps_id'), 'checked_post_gaps', ['id'], unique=False)
+    op.create_index(op.f('ix_checked_post_gaps_channel_id'), 'checked_post_gaps', ['channel_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_checked_post_gaps_channel_id'), table_name='checked_post_gaps')
+    op.drop_index(op.f('ix_checked_post_gaps_id'), table_name='checked_post_gaps')
+    op.drop_table('checked_post_gaps')
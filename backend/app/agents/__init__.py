@@ -1,11 +1,18 @@
 """
-Empty __init__.py for agents package.
+Agents package.
+
+Agents are imported on first attribute access, so importing one agent
+(or the package) does not pull in telethon, openpyxl and the others.
 """
-from app.agents.channel_parser import ChannelParserAgent
-from app.agents.content_analyzer import ContentAnalyzerAgent
-from app.agents.data_processor import DataProcessorAgent
-from app.agents.filter_search import FilterSearchAgent
-from app.agents.export import ExportAgent
+import importlib
+
+_AGENT_MODULES = {
+    "ChannelParserAgent": "app.agents.channel_parser",
+    "ContentAnalyzerAgent": "app.agents.content_analyzer",
+    "DataProcessorAgent": "app.agents.data_processor",
+    "FilterSearchAgent": "app.agents.filter_search",
+    "ExportAgent": "app.agents.export",
+}
 
 __all__ = [
     "ChannelParserAgent",
@@ -14,3 +21,11 @@ __all__ = [
     "FilterSearchAgent",
     "ExportAgent",
 ]
+
+
+def __getattr__(name):
+    """Import agent class on first access."""
+    module = _AGENT_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
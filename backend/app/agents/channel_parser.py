@@ -1,29 +1,83 @@
 """
 Channel Parser Agent - парсинг Telegram каналов.
 """
-import asyncio
 import logging
-from typing import List, Optional, Dict, Any
+import time
+from typing import AsyncIterator, List, Optional, Dict, Any
 from datetime import datetime
 from telethon import TelegramClient
-from telethon.tl.types import Channel, Message
-from telethon.errors import FloodWaitError, ChannelInvalidError, ChannelPrivateError
+from telethon.helpers import add_surrogate, del_surrogate
+from telethon.tl.types import (
+    Channel, InputPeerChannel, Message,
+    MessageEntityHashtag, MessageEntityMention, MessageEntityTextUrl, MessageEntityUrl
+)
+from telethon.errors import (
+    FloodWaitError, ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError, TakeoutInitDelayError
+)
 from app.core.config import settings
+from app.core.entity_cache import EntityCache, get_entity_cache
+from app.core.rate_limiter import (
+    RateLimitDeferred, TelegramRateLimiter, get_rate_limiter, get_takeout_rate_limiter
+)
+from app.core.telegram_client import TelegramClientProtocol
 
 logger = logging.getLogger(__name__)
 
+# Telethon fetches channel history in pages of this many messages
+HISTORY_PAGE_SIZE = 100
+
+# Telegram message entities kept as post entities (see app.core.entities)
+ENTITY_TYPES = {
+    MessageEntityHashtag: "hashtag",
+    MessageEntityMention: "mention",
+    MessageEntityUrl: "url",
+    MessageEntityTextUrl: "url",
+}
+
 
 class ChannelParserAgent:
     """Agent для парсинга Telegram каналов."""
     
-    def __init__(self):
-        """Initialize Telegram client."""
-        self.client = TelegramClient(
-            'tgcursor2_session',
-            settings.TELEGRAM_API_ID,
-            settings.TELEGRAM_API_HASH
-        )
-        self._connected = False
+    def __init__(
+        self,
+        rate_limiter: Optional[TelegramRateLimiter] = None,
+        client: Optional[TelegramClientProtocol] = None,
+        entity_cache: Optional[EntityCache] = None,
+        takeout_rate_limiter: Optional[TelegramRateLimiter] = None,
+        max_wait: Optional[float] = None
+    ):
+        """
+        Initialize Telegram client.
+        
+        Args:
+            rate_limiter: Rate limiter for API requests (shared limiter if not given)
+            client: Connected client borrowed from a pool (Telethon or replay);
+                the parser never disconnects it. A dedicated Telethon client
+                is created if not given.
+            entity_cache: Cache of resolved peers (shared database-backed cache if not given)
+            takeout_rate_limiter: Rate limiter for takeout requests (shared limiter if not given)
+            max_wait: Raise RateLimitDeferred instead of waiting longer than this
+                for the budget, so a task can be retried later (wait if not given)
+        """
+        if client is not None:
+            self.client = client
+            self._owns_client = False
+            self._connected = True
+        else:
+            # flood_sleep_threshold=0 makes Telethon raise every FloodWaitError,
+            # so the rate limiter can adapt to it instead of Telethon sleeping silently
+            self.client = TelegramClient(
+                settings.TELEGRAM_SESSION_NAME,
+                settings.TELEGRAM_API_ID,
+                settings.TELEGRAM_API_HASH,
+                flood_sleep_threshold=0
+            )
+            self._owns_client = True
+            self._connected = False
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.entity_cache = entity_cache or get_entity_cache()
+        self.takeout_rate_limiter = takeout_rate_limiter or get_takeout_rate_limiter()
+        self.max_wait = max_wait
     
     async def connect(self):
         """Connect to Telegram."""
@@ -33,8 +87,8 @@ class ChannelParserAgent:
             logger.info("Connected to Telegram")
     
     async def disconnect(self):
-        """Disconnect from Telegram."""
-        if self._connected:
+        """Disconnect from Telegram (borrowed pool clients stay connected)."""
+        if self._connected and self._owns_client:
             await self.client.disconnect()
             self._connected = False
             logger.info("Disconnected from Telegram")
@@ -59,6 +113,54 @@ class ChannelParserAgent:
         else:
             return channel_url
     
+    async def _resolve_channel(self, channel_username: str) -> Channel:
+        """
+        Resolve channel username through Telegram and cache the peer.
+        
+        Args:
+            channel_username: Channel username without @
+            
+        Returns:
+            Channel entity
+        """
+        await self.rate_limiter.acquire(max_wait=self.max_wait)
+        entity = await self.client.get_entity(channel_username)
+        
+        if not isinstance(entity, Channel):
+            raise ValueError(f"{channel_username} is not a channel")
+        
+        self.entity_cache.put(channel_username, entity.id, entity.access_hash)
+        return entity
+    
+    async def _get_input_peer(self, channel_username: str) -> InputPeerChannel:
+        """
+        Get input peer for channel, resolving the username only on a cache miss.
+        
+        Args:
+            channel_username: Channel username without @
+            
+        Returns:
+            InputPeerChannel built from cached id and access_hash
+        """
+        peer = self.entity_cache.get(channel_username)
+        if peer is not None:
+            return peer
+        
+        entity = await self._resolve_channel(channel_username)
+        return InputPeerChannel(channel_id=entity.id, access_hash=entity.access_hash)
+    
+    async def get_input_peer(self, channel_username: str) -> InputPeerChannel:
+        """
+        Get input peer for channel, e.g. to subscribe to its updates.
+        
+        Args:
+            channel_username: Channel username without @
+            
+        Returns:
+            InputPeerChannel built from cached id and access_hash
+        """
+        return await self._get_input_peer(channel_username)
+    
     async def get_channel_metadata(self, channel_username: str) -> Dict[str, Any]:
         """
         Get channel metadata.
@@ -72,7 +174,20 @@ class ChannelParserAgent:
         await self.connect()
         
         try:
-            entity = await self.client.get_entity(channel_username)
+            entity = None
+            peer = self.entity_cache.get(channel_username)
+            if peer is not None:
+                try:
+                    # channels.getChannels by id is far less limited than ResolveUsername
+                    await self.rate_limiter.acquire(max_wait=self.max_wait)
+                    entity = await self.client.get_entity(peer)
+                except (ChannelInvalidError, PeerIdInvalidError, ValueError):
+                    logger.info(f"Cached peer for {channel_username} is invalid, resolving again")
+                    self.entity_cache.invalidate(channel_username)
+                    entity = None
+            
+            if entity is None:
+                entity = await self._resolve_channel(channel_username)
             
             if not isinstance(entity, Channel):
                 raise ValueError(f"{channel_username} is not a channel")
@@ -89,6 +204,7 @@ class ChannelParserAgent:
             # Try to get avatar URL
             if entity.photo:
                 try:
+                    await self.rate_limiter.acquire(max_wait=self.max_wait)
                     photo = await self.client.download_profile_photo(entity, file=bytes)
                     # In production, upload to cloud storage and get URL
                     metadata["channel_avatar_url"] = f"https://t.me/{channel_username}/1"
@@ -105,60 +221,290 @@ class ChannelParserAgent:
             logger.error(f"Error getting metadata for {channel_username}: {e}")
             raise
     
+    async def get_latest_message_id(self, channel_username: str) -> int:
+        """
+        Get ID of the newest message in channel.
+
+        Args:
+            channel_username: Channel username without @
+
+        Returns:
+            Newest message ID (0 for an empty channel)
+        """
+        await self.connect()
+
+        entity = await self._get_input_peer(channel_username)
+        while True:
+            try:
+                await self.rate_limiter.acquire(max_wait=self.max_wait)
+                messages = await self.client.get_messages(entity, limit=1)
+                return messages[0].id if messages else 0
+            except FloodWaitError as e:
+                await self.rate_limiter.report_flood_wait(e.seconds)
+
     async def parse_posts(
         self,
         channel_username: str,
         parse_mode: str = "new_only",
         limit: Optional[int] = None,
-        offset_date: Optional[datetime] = None
+        offset_date: Optional[datetime] = None,
+        **kwargs
     ) -> List[Dict[str, Any]]:
         """
-        Parse posts from channel.
+        Parse posts from channel into a list.
+        
+        Use iter_posts() or iter_post_batches() for large channels,
+        they keep memory flat instead of materialising every post.
         
         Args:
             channel_username: Channel username without @
             parse_mode: "new_only" or "full_history"
             limit: Maximum number of posts to parse
-            offset_date: For "new_only" mode, parse posts after this date
+            offset_date: Parse posts sent before this date
+            **kwargs: ID range arguments passed to iter_posts()
             
         Returns:
             List of post dictionaries
         """
-        await self.connect()
+        posts = []
+        async for post_data in self.iter_posts(
+            channel_username,
+            parse_mode=parse_mode,
+            limit=limit,
+            offset_date=offset_date,
+            **kwargs
+        ):
+            posts.append(post_data)
+        return posts
+    
+    async def iter_posts(
+        self,
+        channel_username: str,
+        parse_mode: str = "new_only",
+        limit: Optional[int] = None,
+        offset_date: Optional[datetime] = None,
+        min_id: Optional[int] = None,
+        max_id: Optional[int] = None,
+        reverse: bool = False,
+        takeout: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parse posts from channel as an async generator.
         
-        try:
-            entity = await self.client.get_entity(channel_username)
+        Args:
+            channel_username: Channel username without @
+            parse_mode: "new_only" or "full_history"
+            limit: Maximum number of posts to parse
+            offset_date: Parse posts sent before this date
+            min_id: Parse only messages with ID greater than this
+            max_id: Parse only messages with ID less than this
+            reverse: Yield oldest posts first
+            takeout: Fetch through a takeout session, which has more lenient
+                flood limits for bulk export; falls back to regular requests
+                if Telegram delays the takeout
             
-            if not isinstance(entity, Channel):
-                raise ValueError(f"{channel_username} is not a channel")
+        Yields:
+            Post dictionaries, newest first unless reverse is set
+        """
+        await self.connect()
+        
+        history_kwargs = {
+            "limit": limit,
+            "offset_date": offset_date,
+            "min_id": min_id or 0,
+            "max_id": max_id or 0,
+            "reverse": reverse,
+        }
+        
+        if takeout:
+            try:
+                async with self.client.takeout(finalize=True, channels=True) as takeout_client:
+                    async for post_data in self._iter_history(
+                        takeout_client,
+                        self.takeout_rate_limiter,
+                        channel_username,
+                        **history_kwargs
+                    ):
+                        yield post_data
+                return
+            except TakeoutInitDelayError as e:
+                logger.warning(
+                    f"Takeout for {channel_username} delayed by {e.seconds} seconds, "
+                    f"using regular history requests"
+                )
+        
+        async for post_data in self._iter_history(
+            self.client,
+            self.rate_limiter,
+            channel_username,
+            **history_kwargs
+        ):
+            yield post_data
+    
+    async def _iter_history(
+        self,
+        client: TelegramClientProtocol,
+        rate_limiter: TelegramRateLimiter,
+        channel_username: str,
+        limit: Optional[int],
+        offset_date: Optional[datetime],
+        min_id: int,
+        max_id: int,
+        reverse: bool
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Fetch channel history page by page, resuming after flood waits.
+        
+        Args:
+            client: Client (or takeout client) making the requests
+            rate_limiter: Budget the requests are taken from
+            channel_username: Channel username without @
+            limit: Maximum number of posts to parse
+            offset_date: Parse posts sent before this date
+            min_id: Parse only messages with ID greater than this
+            max_id: Parse only messages with ID less than this
+            reverse: Yield oldest posts first
             
-            posts = []
-            max_id = 0
+        Yields:
+            Post dictionaries
+        """
+        started = time.monotonic()
+        fetched = 0
+        
+        try:
+            entity = await self._get_input_peer(channel_username)
+            peer_verified = False
+            parsed = 0
             
-            async for message in self.client.iter_messages(entity, limit=limit, offset_date=offset_date):
-                if message is None:
-                    break
-                
+            while True:
                 try:
-                    post_data = await self._extract_post_data(message, channel_username)
-                    posts.append(post_data)
-                    
-                    # Rate limiting - wait if needed
-                    await asyncio.sleep(0.5)  # Basic rate limiting
+                    # One token per history request: before the first page
+                    # and after every full page, when Telethon fetches the next one
+                    await rate_limiter.acquire(max_wait=self.max_wait)
+                    async for message in client.iter_messages(
+                        entity,
+                        limit=limit - fetched if limit else None,
+                        offset_date=offset_date,
+                        min_id=min_id,
+                        max_id=max_id,
+                        reverse=reverse,
+                        wait_time=0
+                    ):
+                        if message is None:
+                            break
+                        
+                        peer_verified = True
+                        fetched += 1
+                        # Narrow the ID range so a retry resumes after this message
+                        if reverse:
+                            min_id = message.id
+                        else:
+                            max_id = message.id
+                        
+                        try:
+                            post_data = await self._extract_post_data(message, channel_username)
+                        except Exception as e:
+                            logger.error(f"Error extracting post {message.id}: {e}")
+                        else:
+                            parsed += 1
+                            yield post_data
+                        
+                        if fetched % HISTORY_PAGE_SIZE == 0:
+                            await rate_limiter.acquire(max_wait=self.max_wait)
+                    break
                     
                 except FloodWaitError as e:
-                    logger.warning(f"Rate limit hit, waiting {e.seconds} seconds")
-                    await asyncio.sleep(e.seconds)
-                except Exception as e:
-                    logger.error(f"Error extracting post {message.id}: {e}")
-                    continue
+                    # Resume after the last received message once the limit lifts
+                    await rate_limiter.report_flood_wait(e.seconds)
+                
+                except (ChannelInvalidError, PeerIdInvalidError):
+                    # A stale cached access_hash is rejected on the first request
+                    if peer_verified:
+                        raise
+                    logger.info(f"Cached peer for {channel_username} is invalid, resolving again")
+                    self.entity_cache.invalidate(channel_username)
+                    entity = await self._get_input_peer(channel_username)
+                    peer_verified = True
             
-            logger.info(f"Parsed {len(posts)} posts from {channel_username}")
-            return posts
+            logger.info(f"Parsed {parsed} posts from {channel_username}")
             
+        except RateLimitDeferred as e:
+            logger.info(f"Deferring {channel_username} after {fetched} messages: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error parsing posts from {channel_username}: {e}")
             raise
+        finally:
+            await rate_limiter.record_fetched(fetched, time.monotonic() - started)
+    
+    async def iter_post_batches(
+        self,
+        channel_username: str,
+        batch_size: int,
+        **kwargs
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Parse posts from channel in bounded batches.
+        
+        Args:
+            channel_username: Channel username without @
+            batch_size: Maximum number of posts per batch
+            **kwargs: Range and mode arguments passed to iter_posts()
+            
+        Yields:
+            Lists of at most batch_size post dictionaries
+            
+        Raises:
+            RateLimitDeferred: After the posts fetched so far were yielded,
+                so the caller can commit them before retrying later
+        """
+        batch = []
+        try:
+            async for post_data in self.iter_posts(channel_username, **kwargs):
+                batch.append(post_data)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        except RateLimitDeferred:
+            if batch:
+                yield batch
+            raise
+        
+        if batch:
+            yield batch
+    
+    def _extract_entities(self, message: Message) -> Optional[List[Dict[str, Any]]]:
+        """
+        Convert Telegram message entities to post entities.
+        
+        Telegram offsets count UTF-16 code units; they are converted to
+        character offsets of the plain message text.
+        
+        Args:
+            message: Telegram message object
+            
+        Returns:
+            List of entities, or None if the message carries no entity list
+        """
+        if message.entities is None:
+            return None
+        
+        raw_text = add_surrogate(message.raw_text or "")
+        entities = []
+        for entity in message.entities:
+            entity_type = ENTITY_TYPES.get(type(entity))
+            if entity_type is None:
+                continue
+            
+            text = del_surrogate(raw_text[entity.offset:entity.offset + entity.length])
+            entities.append({
+                "type": entity_type,
+                # Text links show a label, the target is in the entity
+                "value": entity.url if isinstance(entity, MessageEntityTextUrl) else text,
+                "offset": len(del_surrogate(raw_text[:entity.offset])),
+                "length": len(text),
+            })
+        return entities
     
     async def _extract_post_data(self, message: Message, channel_username: str) -> Dict[str, Any]:
         """
@@ -212,6 +558,7 @@ class ChannelParserAgent:
             "views": message.views or 0,
             "likes": 0,  # Reactions need special handling
             "comments": None,  # Comments not available in MVP
+            "entities": self._extract_entities(message),
         }
         
         # Extract reactions if available
@@ -223,6 +570,19 @@ class ChannelParserAgent:
         
         return post_data
     
+    async def extract_post_data(self, message: Message, channel_username: str) -> Dict[str, Any]:
+        """
+        Extract data from a message received outside of parsing, e.g. a pushed update.
+        
+        Args:
+            message: Telegram message object
+            channel_username: Channel username
+            
+        Returns:
+            Dictionary with post data
+        """
+        return await self._extract_post_data(message, channel_username)
+    
     async def parse_channel_full(
         self,
         channel_url: str,
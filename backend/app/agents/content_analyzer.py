@@ -1,33 +1,61 @@
 """
 Content Analyzer Agent - анализ контента и вычисление метрик.
 """
-import re
 import logging
-from typing import List, Dict, Any, Optional
-from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.analysis_cache import AnalysisCache, analysis_key, get_analysis_cache, normalize_text
+from app.core.categorizer import TaxonomyCategorizer, get_categorizer
+from app.core.entities import extract_entities, group_entities
+from app.core.keywords import KeywordEngine, get_keyword_engine
+from app.core.nlp import NlpModelRegistry, get_nlp_registry
 
 logger = logging.getLogger(__name__)
 
-try:
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
-    NLP_AVAILABLE = True
-except OSError:
-    logger.warning("spaCy model not found. Run: python -m spacy download en_core_web_sm")
-    NLP_AVAILABLE = False
-    nlp = None
+# Bump whenever text analysis results change, cached results of older versions are ignored
+ANALYZER_VERSION = 2
 
 
 class ContentAnalyzerAgent:
     """Agent для анализа контента и вычисления метрик."""
     
-    def __init__(self):
-        """Initialize analyzer."""
-        self.hashtag_pattern = re.compile(r'#\w+')
-        self.mention_pattern = re.compile(r'@\w+')
-        self.url_pattern = re.compile(
-            r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        )
+    def __init__(
+        self,
+        nlp_registry: Optional[NlpModelRegistry] = None,
+        categorizer: Optional[TaxonomyCategorizer] = None,
+        cache: Optional[AnalysisCache] = None,
+        keyword_engine: Optional[KeywordEngine] = None
+    ):
+        """
+        Initialize analyzer.
+        
+        Args:
+            nlp_registry: spaCy models by language (shared registry if not given)
+            categorizer: Taxonomy categorizer (shared categorizer if not given)
+            cache: Cache of text analysis results (shared cache if not given)
+            keyword_engine: TF-IDF keyword ranking (shared engine if not given)
+        """
+        self.nlp_registry = nlp_registry or get_nlp_registry()
+        self.categorizer = categorizer or get_categorizer()
+        self.cache = cache or get_analysis_cache()
+        self.keyword_engine = keyword_engine or get_keyword_engine()
+    
+    def extract_entities(
+        self,
+        text: str,
+        entities: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Extract hashtags, mentions and links in one pass.
+        
+        Args:
+            text: Text to analyze
+            entities: Entities marked by Telegram (from the parser); text is
+                tokenized if not given
+            
+        Returns:
+            Dictionary with unique "hashtag", "mention" and "url" values in order of appearance
+        """
+        return extract_entities(text, entities)
     
     def extract_hashtags(self, text: str) -> List[str]:
         """
@@ -39,11 +67,7 @@ class ContentAnalyzerAgent:
         Returns:
             List of hashtags
         """
-        if not text:
-            return []
-        
-        hashtags = self.hashtag_pattern.findall(text)
-        return list(set(hashtags))  # Remove duplicates
+        return self.extract_entities(text)["hashtag"]
     
     def extract_mentions(self, text: str) -> List[str]:
         """
@@ -55,11 +79,7 @@ class ContentAnalyzerAgent:
         Returns:
             List of mentions
         """
-        if not text:
-            return []
-        
-        mentions = self.mention_pattern.findall(text)
-        return list(set(mentions))  # Remove duplicates
+        return self.extract_entities(text)["mention"]
     
     def extract_links(self, text: str) -> List[str]:
         """
@@ -71,21 +91,7 @@ class ContentAnalyzerAgent:
         Returns:
             List of URLs
         """
-        if not text:
-            return []
-        
-        urls = self.url_pattern.findall(text)
-        # Validate URLs
-        valid_urls = []
-        for url in urls:
-            try:
-                parsed = urlparse(url)
-                if parsed.scheme and parsed.netloc:
-                    valid_urls.append(url)
-            except Exception:
-                continue
-        
-        return list(set(valid_urls))  # Remove duplicates
+        return self.extract_entities(text)["url"]
     
     def calculate_engagement_rate(self, views: int, likes: int) -> Optional[float]:
         """
@@ -121,7 +127,13 @@ class ContentAnalyzerAgent:
         minutes = word_count / words_per_minute
         return int(minutes * 60)
     
-    def classify_content_type(self, content_type: str, text: str, media_urls: Optional[List[str]]) -> str:
+    def classify_content_type(
+        self,
+        content_type: str,
+        text: str,
+        media_urls: Optional[List[str]],
+        links: Optional[List[str]] = None
+    ) -> str:
         """
         Classify content type more precisely.
         
@@ -129,6 +141,7 @@ class ContentAnalyzerAgent:
             content_type: Basic content type from parser
             text: Post text
             media_urls: List of media URLs
+            links: Links already extracted from the post (extracted here if not given)
             
         Returns:
             Refined content type
@@ -149,7 +162,9 @@ class ContentAnalyzerAgent:
                 return "video"
         
         # Check for links in text
-        if text and self.extract_links(text):
+        if links is None:
+            links = self.extract_links(text)
+        if links:
             return "link"
         
         if content_type == "text" and not text:
@@ -157,42 +172,33 @@ class ContentAnalyzerAgent:
         
         return content_type
     
-    def categorize_content(self, text: str) -> Optional[str]:
+    def rank_categories(self, text: str) -> List[Tuple[str, float]]:
         """
-        Categorize content by topic (basic keyword-based).
+        Score text against every taxonomy category.
         
         Args:
             text: Text to analyze
             
         Returns:
-            Content category or None
+            (category, score) pairs of matched categories, best first
         """
         if not text:
-            return None
-        
-        text_lower = text.lower()
-        
-        # News keywords
-        news_keywords = ['новость', 'новости', 'news', 'breaking', 'update', 'обновление']
-        if any(keyword in text_lower for keyword in news_keywords):
-            return "news"
-        
-        # Advertisement keywords
-        ad_keywords = ['реклама', 'ad', 'advertisement', 'promo', 'скидка', 'sale', 'discount']
-        if any(keyword in text_lower for keyword in ad_keywords):
-            return "advertisement"
-        
-        # Educational keywords
-        edu_keywords = ['обучение', 'education', 'tutorial', 'how to', 'учебник', 'курс']
-        if any(keyword in text_lower for keyword in edu_keywords):
-            return "educational"
+            return []
         
-        # Entertainment keywords
-        ent_keywords = ['развлечение', 'entertainment', 'fun', 'юмор', 'joke', 'meme']
-        if any(keyword in text_lower for keyword in ent_keywords):
-            return "entertainment"
+        return self.categorizer.rank(text)
+    
+    def categorize_content(self, text: str) -> Optional[str]:
+        """
+        Categorize content by topic (best ranked taxonomy category).
         
-        return None
+        Args:
+            text: Text to analyze
+            
+        Returns:
+            Content category or None
+        """
+        ranked = self.rank_categories(text)
+        return ranked[0][0] if ranked else None
     
     def extract_keywords(self, text: str, max_keywords: int = 10) -> List[str]:
         """
@@ -205,28 +211,137 @@ class ContentAnalyzerAgent:
         Returns:
             List of keywords
         """
-        if not text or not NLP_AVAILABLE:
-            return []
+        return self.extract_keywords_batch([text], max_keywords=max_keywords)[0]
+    
+    def extract_keywords_batch(
+        self,
+        texts: List[str],
+        max_keywords: int = 10,
+        batch_size: Optional[int] = None,
+        n_process: Optional[int] = None
+    ) -> List[List[str]]:
+        """
+        Extract keywords from many texts with nlp.pipe.
         
-        try:
-            doc = nlp(text)
-            # Extract nouns and adjectives
-            keywords = []
-            for token in doc:
-                if token.pos_ in ['NOUN', 'ADJ'] and not token.is_stop and not token.is_punct:
-                    keywords.append(token.lemma_.lower())
-            
-            # Count frequency and return top keywords
-            keyword_counts = {}
-            for keyword in keywords:
-                keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
+        Keywords are the most frequent candidate terms of each text; see
+        analyze_posts_batch() for ranking against the channel corpus.
+        
+        Args:
+            texts: Texts to analyze
+            max_keywords: Maximum number of keywords per text
+            batch_size: Texts per spaCy batch (NLP_BATCH_SIZE if not given)
+            n_process: spaCy worker processes (NLP_PROCESSES if not given)
             
-            sorted_keywords = sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)
-            return [kw[0] for kw in sorted_keywords[:max_keywords]]
+        Returns:
+            List of keywords for every text, in the order of texts
+        """
+        terms = self.extract_terms_batch(texts, batch_size=batch_size, n_process=n_process)
+        return [self._most_frequent(text_terms, max_keywords) for text_terms in terms]
+    
+    def extract_terms_batch(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        n_process: Optional[int] = None
+    ) -> List[Dict[str, int]]:
+        """
+        Extract keyword candidates (noun and adjective lemmas) from many texts with nlp.pipe.
+        
+        Args:
+            texts: Texts to analyze
+            batch_size: Texts per spaCy batch (NLP_BATCH_SIZE if not given)
+            n_process: spaCy worker processes (NLP_PROCESSES if not given)
             
+        Returns:
+            Term -> count for every text, in the order of texts
+        """
+        try:
+            docs = self.nlp_registry.pipe(texts, batch_size=batch_size, n_process=n_process)
         except Exception as e:
             logger.error(f"Error extracting keywords: {e}")
-            return []
+            return [{} for _ in texts]
+        
+        return [self._terms_from_doc(doc) if doc is not None else {} for doc in docs]
+    
+    def _terms_from_doc(self, doc) -> Dict[str, int]:
+        """
+        Count noun and adjective lemmas of a spaCy Doc.
+        
+        Args:
+            doc: Processed spaCy Doc
+            
+        Returns:
+            Term -> count, in order of first appearance
+        """
+        term_counts = {}
+        for token in doc:
+            if token.pos_ in ['NOUN', 'ADJ'] and not token.is_stop and not token.is_punct:
+                term = token.lemma_.lower()
+                term_counts[term] = term_counts.get(term, 0) + 1
+        return term_counts
+    
+    def _most_frequent(self, term_counts: Dict[str, int], max_keywords: int) -> List[str]:
+        """
+        Pick most frequent terms.
+        
+        Args:
+            term_counts: Term -> count
+            max_keywords: Maximum number of keywords
+            
+        Returns:
+            List of keywords
+        """
+        sorted_terms = sorted(term_counts.items(), key=lambda x: x[1], reverse=True)
+        return [term for term, _ in sorted_terms[:max_keywords]]
+    
+    def cache_version(self) -> str:
+        """
+        Version of text analysis results used in cache keys.
+        
+        Returns:
+            Analyzer version, taxonomy digest and the spaCy models in use
+        """
+        return f"{ANALYZER_VERSION}:{self.categorizer.version}:{self.nlp_registry.fingerprint()}"
+    
+    def analyze_texts(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze what depends on the text alone, reusing cached results.
+        
+        Copies of the same text (after normalization) are analyzed once;
+        keywords of all uncached texts are extracted in one nlp.pipe run.
+        
+        Args:
+            texts: Post texts
+            
+        Returns:
+            For every text: "hashtag", "mention", "url", "category", "keywords",
+            "terms" (keyword candidates with counts) and "reading_time"
+        """
+        version = self.cache_version()
+        normalized = [normalize_text(text) for text in texts]
+        keys = [analysis_key(text, version) for text in normalized]
+        results = self.cache.get_many(keys)
+        
+        missing = {}
+        for key, text in zip(keys, normalized):
+            if key not in results:
+                missing.setdefault(key, text)
+        
+        if missing:
+            terms = self.extract_terms_batch(list(missing.values()))
+            computed = {}
+            for (key, text), text_terms in zip(missing.items(), terms):
+                computed[key] = {
+                    **self.extract_entities(text),
+                    "category": self.categorize_content(text),
+                    "keywords": self._most_frequent(text_terms, 10),
+                    "terms": text_terms,
+                    "reading_time": self.estimate_reading_time(text),
+                }
+            self.cache.set_many(computed)
+            results.update(computed)
+        
+        return [results[key] for key in keys]
     
     def analyze_post(self, post_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -235,32 +350,51 @@ class ContentAnalyzerAgent:
         Args:
             post_data: Raw post data from parser
             
+        Returns:
+            Enhanced post data with analysis
+        """
+        return self.analyze_posts_batch([post_data])[0]
+    
+    def _enhance(
+        self,
+        post_data: Dict[str, Any],
+        text_analysis: Dict[str, Any],
+        keywords: List[str],
+        version: str
+    ) -> Dict[str, Any]:
+        """
+        Combine text analysis with metrics and content type of a post.
+        
+        Args:
+            post_data: Raw post data from parser
+            text_analysis: Result of analyze_texts() for the post text
+            keywords: Keywords of the post
+            version: Analyzer version that produced text_analysis
+            
         Returns:
             Enhanced post data with analysis
         """
         text = post_data.get("text", "")
         
-        # Extract metadata
-        hashtags = self.extract_hashtags(text)
-        mentions = self.extract_mentions(text)
-        links = self.extract_links(text)
+        # Entities marked by Telegram win over the ones found in the text
+        entities = text_analysis
+        if post_data.get("entities") is not None:
+            entities = group_entities(post_data["entities"])
+        hashtags = list(entities["hashtag"])
+        mentions = list(entities["mention"])
+        links = list(entities["url"])
         
         # Calculate metrics
         views = post_data.get("views", 0)
         likes = post_data.get("likes", 0)
         engagement_rate = self.calculate_engagement_rate(views, likes)
-        reading_time = self.estimate_reading_time(text)
         
         # Classify content
         content_type = post_data.get("content_type", "text")
         media_urls = post_data.get("media_urls")
-        refined_content_type = self.classify_content_type(content_type, text, media_urls)
-        
-        # Categorize content
-        category = self.categorize_content(text)
+        refined_content_type = self.classify_content_type(content_type, text, media_urls, links=links)
         
-        # Extract keywords
-        keywords = self.extract_keywords(text)
+        keywords = list(keywords)
         
         # Return enhanced data
         enhanced_data = {
@@ -269,23 +403,66 @@ class ContentAnalyzerAgent:
             "mentions": mentions if mentions else None,
             "links": links if links else None,
             "engagement_rate": engagement_rate,
-            "reading_time": reading_time,
+            "reading_time": text_analysis["reading_time"],
             "content_type": refined_content_type,
-            "category": category,
+            "category": text_analysis["category"],
             "keywords": keywords if keywords else None,
+            "terms": dict(text_analysis["terms"]),
+            "analyzer_version": version,
         }
         
         return enhanced_data
     
-    def analyze_posts_batch(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def analyze_posts_batch(
+        self,
+        posts: List[Dict[str, Any]],
+        channel_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Analyze multiple posts.
         
+        Text analysis is cached by content hash and keywords of all
+        uncached posts are extracted in one nlp.pipe run. With a channel,
+        keywords are ranked by TF-IDF against the document frequencies of
+        the channel and of all channels, so words every post of the channel
+        repeats (signatures, ad footers) and generic words rank last.
+        
         Args:
             posts: List of raw post data
+            channel_id: Channel ID in database; keywords are the most frequent terms if None
             
         Returns:
             List of enhanced post data
         """
-        return [self.analyze_post(post) for post in posts]
-
+        text_analyses = self.analyze_texts([post.get("text") or "" for post in posts])
+        return self.enhance_posts(posts, text_analyses, channel_id=channel_id)
+    
+    def enhance_posts(
+        self,
+        posts: List[Dict[str, Any]],
+        text_analyses: List[Dict[str, Any]],
+        channel_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Combine text analyses computed elsewhere (e.g. in another process) with the posts.
+        
+        Args:
+            posts: List of raw post data
+            text_analyses: Results of analyze_texts() for the post texts, same order
+            channel_id: Channel ID in database; keywords are the most frequent terms if None
+            
+        Returns:
+            List of enhanced post data
+        """
+        version = self.cache_version()
+        if channel_id is not None:
+            keywords = self.keyword_engine.score_batch(
+                channel_id,
+                [text_analysis["terms"] for text_analysis in text_analyses]
+            )
+        else:
+            keywords = [text_analysis["keywords"] for text_analysis in text_analyses]
+        return [
+            self._enhance(post, text_analysis, post_keywords, version)
+            for post, text_analysis, post_keywords in zip(posts, text_analyses, keywords)
+        ]
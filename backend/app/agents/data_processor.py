@@ -53,13 +53,19 @@ class DataProcessorAgent:
         # Fallback
         return datetime.utcnow().replace(tzinfo=self.utc_timezone)
     
-    def normalize_string(self, text: Optional[str], max_length: Optional[int] = None) -> Optional[str]:
+    def normalize_string(
+        self,
+        text: Optional[str],
+        max_length: Optional[int] = None,
+        collapse_whitespace: bool = True
+    ) -> Optional[str]:
         """
         Normalize string - strip whitespace, handle None.
         
         Args:
             text: Text to normalize
             max_length: Maximum length (truncate if longer)
+            collapse_whitespace: Replace runs of whitespace, line breaks included, with one space
             
         Returns:
             Normalized string or None
@@ -71,7 +77,8 @@ class DataProcessorAgent:
         normalized = text.strip()
         
         # Remove multiple spaces
-        normalized = " ".join(normalized.split())
+        if collapse_whitespace:
+            normalized = " ".join(normalized.split())
         
         # Truncate if needed
         if max_length and len(normalized) > max_length:
@@ -97,7 +104,10 @@ class DataProcessorAgent:
                 return False, f"Missing required field: {field}"
         
         # Validate content_type
-        valid_content_types = ["text", "photo", "video", "document", "link", "poll", "mixed"]
+        # Includes types refined by ContentAnalyzerAgent.classify_content_type()
+        valid_content_types = [
+            "text", "photo", "video", "document", "link", "poll", "mixed", "photo_gallery", "media_only"
+        ]
         if post_data["content_type"] not in valid_content_types:
             return False, f"Invalid content_type: {post_data['content_type']}"
         
@@ -270,7 +280,8 @@ class DataProcessorAgent:
         # Copy and normalize fields
         prepared["post_id"] = str(post_data.get("post_id"))
         prepared["channel_id"] = post_data.get("channel_id")
-        prepared["text"] = self.normalize_string(post_data.get("text"))
+        # Stored as posted, line breaks and paragraphs included; table output collapses whitespace
+        prepared["text"] = self.normalize_string(post_data.get("text"), collapse_whitespace=False)
         prepared["date"] = self.normalize_date(post_data.get("date"))
         prepared["author"] = self.normalize_string(post_data.get("author"), max_length=255)
         prepared["views"] = post_data.get("views", 0) or 0
@@ -281,6 +292,10 @@ class DataProcessorAgent:
         prepared["hashtags"] = post_data.get("hashtags")
         prepared["mentions"] = post_data.get("mentions")
         prepared["links"] = post_data.get("links")
+        prepared["category"] = post_data.get("category")
+        prepared["keywords"] = post_data.get("keywords")
+        prepared["reading_time"] = post_data.get("reading_time")
+        prepared["analyzer_version"] = post_data.get("analyzer_version")
         
         # Set parsed_at if not present
         if "parsed_at" not in prepared or prepared["parsed_at"] is None:
@@ -6,9 +6,6 @@ import csv
 import io
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-import openpyxl
-from openpyxl.styles import Font, Alignment
-from openpyxl.utils import get_column_letter
 
 logger = logging.getLogger(__name__)
 
@@ -105,6 +102,11 @@ class ExportAgent:
         if not posts:
             return b""
         
+        # openpyxl is only loaded by processes that actually export to Excel
+        import openpyxl
+        from openpyxl.styles import Font, Alignment
+        from openpyxl.utils import get_column_letter
+        
         # Create workbook
         wb = openpyxl.Workbook()
         ws = wb.active
@@ -56,6 +56,15 @@ class FilterSearchAgent:
                 keyword_conditions.append(Post.text.ilike(f"%{keyword}%"))
             query = query.filter(or_(*keyword_conditions))
         
+        # Filter by content category (btree index)
+        if "categories" in filters and filters["categories"]:
+            query = query.filter(Post.category.in_(filters["categories"]))
+        
+        # Filter by extracted keywords: any of them (GIN index, keywords are lowercase lemmas)
+        if "extracted_keywords" in filters and filters["extracted_keywords"]:
+            extracted_keywords = [keyword.strip().lower() for keyword in filters["extracted_keywords"]]
+            query = query.filter(Post.keywords.overlap(extracted_keywords))
+        
         # Filter by hashtags
         if "hashtags" in filters and filters["hashtags"]:
             # PostgreSQL JSONB query
@@ -85,6 +94,13 @@ class FilterSearchAgent:
         if "engagement_rate_max" in filters and filters["engagement_rate_max"] is not None:
             query = query.filter(Post.engagement_rate <= filters["engagement_rate_max"])
         
+        # Filter by reading time range (seconds)
+        if "reading_time_min" in filters and filters["reading_time_min"] is not None:
+            query = query.filter(Post.reading_time >= filters["reading_time_min"])
+        
+        if "reading_time_max" in filters and filters["reading_time_max"] is not None:
+            query = query.filter(Post.reading_time <= filters["reading_time_max"])
+        
         return query
     
     def search_posts(
@@ -1,13 +1,12 @@
 """
 API routers for channels.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.models.channel import Channel
 from app.schemas.channel import ChannelCreate, ChannelResponse, ChannelUpdate, ChannelListResponse
-from app.core.tasks import parse_channel_task
 from app.core.config import settings
 
 router = APIRouter(prefix="/channels", tags=["channels"])
@@ -16,9 +15,12 @@ router = APIRouter(prefix="/channels", tags=["channels"])
 @router.post("/", response_model=ChannelResponse, status_code=status.HTTP_201_CREATED)
 async def create_channel(
     channel_data: ChannelCreate,
+    response: Response,
     db: Session = Depends(get_db)
 ):
-    """Create a new channel and start parsing."""
+    """Create a new channel and start parsing (task ID in the X-Parse-Task-Id header)."""
+    from app.core.tasks import dispatch_channel_parse
+    
     # Check if channel already exists
     existing = db.query(Channel).filter_by(
         channel_username=channel_data.channel_username
@@ -36,11 +38,13 @@ async def create_channel(
     db.commit()
     db.refresh(channel)
     
-    # Start parsing task
-    parse_channel_task.delay(
-        f"https://t.me/{channel_data.channel_username}",
-        channel_data.parse_mode
+    # Start parsing task; a parse triggered right after joins it instead of fetching again
+    task_id, _ = dispatch_channel_parse(
+        channel.id,
+        channel_data.parse_mode,
+        channel_url=f"https://t.me/{channel_data.channel_username}"
     )
+    response.headers["X-Parse-Task-Id"] = task_id
     
     return channel
 
@@ -130,8 +134,39 @@ async def trigger_parse(
     parse_mode: str = "new_only",
     db: Session = Depends(get_db)
 ):
-    """Trigger parsing for a channel."""
-    from app.core.tasks import parse_channel_posts_task
+    """
+    Trigger parsing for a channel.
+    
+    Duplicate requests while the same parse is queued or running return the
+    existing task ID instead of queueing another one.
+    """
+    from app.core.tasks import dispatch_channel_parse
+    
+    channel = db.query(Channel).filter_by(id=channel_id).first()
+    
+    if not channel:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Channel with id {channel_id} not found"
+        )
+    
+    # Full history is fetched by a resumable chunked backfill
+    task_id, created = dispatch_channel_parse(channel_id, parse_mode)
+    if parse_mode == "full_history":
+        message = "Backfill started" if created else "Backfill already running"
+    else:
+        message = "Parsing started" if created else "Parsing already running"
+    
+    return {"message": message, "channel_id": channel_id, "task_id": task_id, "deduplicated": not created}
+
+
+@router.post("/{channel_id}/backfill", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_backfill(
+    channel_id: int,
+    db: Session = Depends(get_db)
+):
+    """Start or resume chunked full-history backfill for a channel."""
+    from app.core.tasks import dispatch_channel_parse
     
     channel = db.query(Channel).filter_by(id=channel_id).first()
     
@@ -141,8 +176,31 @@ async def trigger_parse(
             detail=f"Channel with id {channel_id} not found"
         )
     
-    # Start parsing task
-    parse_channel_posts_task.delay(channel_id, parse_mode)
+    task_id, created = dispatch_channel_parse(channel_id, "full_history")
+    
+    return {
+        "message": "Backfill started" if created else "Backfill already running",
+        "channel_id": channel_id,
+        "task_id": task_id,
+        "deduplicated": not created,
+    }
+
+
+@router.get("/{channel_id}/backfill")
+async def get_backfill_status(
+    channel_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get full-history backfill progress for a channel."""
+    from app.core.backfill import get_backfill_progress
+    
+    channel = db.query(Channel).filter_by(id=channel_id).first()
+    
+    if not channel:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Channel with id {channel_id} not found"
+        )
     
-    return {"message": "Parsing started", "channel_id": channel_id}
+    return get_backfill_progress(db, channel_id)
 
@@ -22,6 +22,10 @@ async def list_posts(
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     keywords: Optional[str] = None,
+    category: Optional[str] = None,
+    extracted_keywords: Optional[str] = None,
+    reading_time_min: Optional[int] = Query(None, ge=0),
+    reading_time_max: Optional[int] = Query(None, ge=0),
     search: Optional[str] = None,
     sort_by: str = Query("date", regex="^(date|views|likes|engagement_rate)$"),
     sort_order: str = Query("desc", regex="^(asc|desc)$"),
@@ -46,6 +50,18 @@ async def list_posts(
     if keywords:
         filters["keywords"] = keywords.split(",")
     
+    if category:
+        filters["categories"] = category.split(",")
+    
+    if extracted_keywords:
+        filters["extracted_keywords"] = extracted_keywords.split(",")
+    
+    if reading_time_min is not None:
+        filters["reading_time_min"] = reading_time_min
+    
+    if reading_time_max is not None:
+        filters["reading_time_max"] = reading_time_max
+    
     # Use FilterSearchAgent
     agent = FilterSearchAgent(db)
     result = agent.get_filtered_posts(
@@ -0,0 +1,51 @@
+"""
+API routers for system and ingestion statistics.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.dead_letter import list_dead_letters, requeue_dead_letter
+from app.core.rate_limiter import get_rate_limiter, get_takeout_rate_limiter
+from app.core.scheduler import build_poll_schedule, predict_api_spend
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get("/rate-limit")
+async def get_rate_limit_stats():
+    """Get Telegram API budget and wait-time statistics."""
+    return await get_rate_limiter().get_stats()
+
+
+@router.get("/schedule")
+async def get_poll_schedule(db: Session = Depends(get_db)):
+    """Get channel polling schedule and predicted Telegram API spend."""
+    schedule = build_poll_schedule(db)
+    return {
+        "channels": schedule,
+        "predicted_spend": predict_api_spend(schedule),
+    }
+
+
+@router.get("/rate-limit/takeout")
+async def get_takeout_rate_limit_stats():
+    """Get takeout budget, flood-wait and throughput statistics, kept apart from polling."""
+    return await get_takeout_rate_limiter().get_stats()
+
+
+@router.get("/dead-letter")
+async def get_dead_letters(db: Session = Depends(get_db)):
+    """Get channels not polled anymore because their parses kept failing."""
+    channels = list_dead_letters(db)
+    return {"channels": channels, "total": len(channels)}
+
+
+@router.post("/dead-letter/{channel_id}/requeue")
+async def requeue_dead_lettered_channel(channel_id: int, db: Session = Depends(get_db)):
+    """Return a dead-lettered channel to polling."""
+    if not requeue_dead_letter(db, channel_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Channel with id {channel_id} is not in the dead-letter queue"
+        )
+    return {"channel_id": channel_id, "status": "requeued"}
@@ -0,0 +1,25 @@
+"""
+API routers for trending hashtags, mentions and link domains.
+"""
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import Optional
+from app.core.trends import TREND_TYPES, get_trend_detector
+
+router = APIRouter(prefix="/trends", tags=["trends"])
+
+
+@router.get("/")
+async def get_trends(
+    types: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    min_count: Optional[int] = Query(None, ge=1)
+):
+    """Get hashtags, mentions and link domains bursting across all channels, from in-memory sketches."""
+    trend_types = types.split(",") if types else None
+    if trend_types and not set(trend_types) <= set(TREND_TYPES):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown trend type, expected any of: {', '.join(TREND_TYPES)}"
+        )
+
+    return get_trend_detector().trends(trend_types=trend_types, limit=limit, min_count=min_count)
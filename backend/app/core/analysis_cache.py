@@ -0,0 +1,214 @@
+"""
+Cache of text analysis results, keyed by content hash.
+
+Channels repost the same texts all the time (cross-posts, ad blocks,
+recurring footers). Everything ContentAnalyzerAgent derives from the text
+alone (entities, category, keywords, reading time) is cached under a hash
+of the normalized text and the analyzer version, so every copy after the
+first skips the regex, taxonomy and spaCy work.
+
+Two tiers: an in-process LRU in front of Redis, shared by all workers.
+Redis entries expire after ANALYSIS_CACHE_TTL_SECONDS. If Redis is down,
+the LRU keeps working on its own.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "tgcursor2:analysis"
+
+# After a Redis error the shared tier is skipped for this long
+REDIS_RETRY_SECONDS = 30
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so copies that differ only in Unicode form or whitespace share a cache entry.
+
+    Args:
+        text: Post text
+
+    Returns:
+        NFC-normalized text with whitespace runs collapsed to single spaces
+    """
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def analysis_key(normalized_text: str, version: str) -> str:
+    """
+    Build cache key of a text.
+
+    Args:
+        normalized_text: Text from normalize_text()
+        version: Analyzer version, changes whenever results would change
+
+    Returns:
+        Cache key
+    """
+    digest = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:{version}:{digest}"
+
+
+class AnalysisCache:
+    """Two-tier (LRU + Redis) cache of text analysis results."""
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        ttl: Optional[int] = None,
+        use_redis: Optional[bool] = None
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            maxsize: Maximum number of results in process memory (ANALYSIS_CACHE_SIZE if not given)
+            redis_url: Redis connection URL
+            ttl: Seconds a result is kept in Redis (ANALYSIS_CACHE_TTL_SECONDS if not given)
+            use_redis: Use the Redis tier (ANALYSIS_CACHE_BACKEND == "redis" if not given)
+        """
+        self.maxsize = maxsize or settings.ANALYSIS_CACHE_SIZE
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.ttl = ttl or settings.ANALYSIS_CACHE_TTL_SECONDS
+        self.use_redis = settings.ANALYSIS_CACHE_BACKEND == "redis" if use_redis is None else use_redis
+        self._client = None
+        self._redis_down_until = 0.0
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "redis_hits": 0, "misses": 0, "evictions": 0, "redis_errors": 0}
+
+    def _get_client(self):
+        """Get synchronous Redis client."""
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def _redis_enabled(self) -> bool:
+        """Check whether the Redis tier should be used now."""
+        return self.use_redis and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, error: Exception):
+        """Skip the Redis tier for a while after an error."""
+        logger.warning(f"Redis analysis cache unavailable, using process memory only: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        self.stats["redis_errors"] += 1
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        """Put result into the LRU, evicting the least recently used ones (caller holds self._lock)."""
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up results, first in process memory, then in Redis.
+
+        Args:
+            keys: Keys from analysis_key()
+
+        Returns:
+            Key -> cached result for the keys found
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                result = self._results.get(key)
+                if result is None:
+                    missing.append(key)
+                    continue
+                self._results.move_to_end(key)
+                found[key] = result
+            self.stats["hits"] += len(found)
+
+        if missing and self._redis_enabled():
+            from redis.exceptions import RedisError
+
+            try:
+                values = self._get_client().mget(missing)
+            except RedisError as e:
+                self._redis_failed(e)
+                values = [None] * len(missing)
+
+            with self._lock:
+                for key, value in zip(missing, values):
+                    if value is None:
+                        continue
+                    result = json.loads(value)
+                    self._remember(key, result)
+                    found[key] = result
+                    self.stats["redis_hits"] += 1
+
+        with self._lock:
+            self.stats["misses"] += sum(1 for key in missing if key not in found)
+        return found
+
+    def set_many(self, results: Dict[str, Dict[str, Any]]):
+        """
+        Store results in both tiers.
+
+        Args:
+            results: Key -> analysis result (JSON-serializable)
+        """
+        if not results:
+            return
+
+        with self._lock:
+            for key, result in results.items():
+                self._remember(key, result)
+
+        if self._redis_enabled():
+            from redis.exceptions import RedisError
+
+            try:
+                pipe = self._get_client().pipeline(transaction=False)
+                for key, result in results.items():
+                    pipe.set(key, json.dumps(result, ensure_ascii=False), ex=self.ttl)
+                pipe.execute()
+            except RedisError as e:
+                self._redis_failed(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit rates of both tiers.
+
+        Returns:
+            Dictionary with counters, LRU size and hit rate over all lookups
+        """
+        lookups = self.stats["hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._results),
+            "maxsize": self.maxsize,
+            "hit_rate": round((self.stats["hits"] + self.stats["redis_hits"]) / lookups, 4) if lookups else None,
+        }
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """
+    Get process-wide analysis cache configured from settings.
+
+    Returns:
+        Shared AnalysisCache instance
+    """
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache()
+    return _analysis_cache
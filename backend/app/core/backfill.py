@@ -0,0 +1,202 @@
+"""
+Resumable full-history backfill split into message ID chunks.
+
+A backfill covers message IDs 1..latest in BACKFILL_CHUNK_SIZE ranges.
+Every chunk is parsed by its own task, oldest message first, and stores
+the highest committed message ID as its cursor, so an interrupted chunk
+resumes where it stopped and finished chunks are never fetched again.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.backfill_chunk import BackfillChunk
+from app.models.channel import Channel
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def should_use_takeout(db: Session, channel_id: int, latest_message_id: int) -> bool:
+    """
+    Decide whether a backfill should run through takeout sessions.
+
+    Only initial backfills of channels with at least TAKEOUT_MIN_MESSAGES
+    messages qualify: nothing is stored yet and no chunks were planned.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+        latest_message_id: Newest Telegram message ID of the channel
+
+    Returns:
+        True if new chunks should use takeout
+    """
+    if not settings.TAKEOUT_ENABLED or latest_message_id < settings.TAKEOUT_MIN_MESSAGES:
+        return False
+
+    channel = db.query(Channel).filter_by(id=channel_id).first()
+    if channel is None or channel.last_message_id:
+        return False
+
+    planned = db.query(func.count(BackfillChunk.id)).filter(
+        BackfillChunk.channel_id == channel_id
+    ).scalar()
+    return planned == 0
+
+
+def plan_backfill(
+    db: Session,
+    channel_id: int,
+    latest_message_id: int,
+    chunk_size: Optional[int] = None,
+    use_takeout: bool = False
+) -> List[BackfillChunk]:
+    """
+    Create chunks for message IDs not covered by an existing plan.
+
+    Planning again after the channel grew only adds chunks above the
+    previously planned range.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+        latest_message_id: Newest Telegram message ID of the channel
+        chunk_size: Message IDs per chunk (BACKFILL_CHUNK_SIZE if not given)
+        use_takeout: Fetch new chunks through takeout sessions
+
+    Returns:
+        Newly created chunks
+    """
+    chunk_size = chunk_size or settings.BACKFILL_CHUNK_SIZE
+    planned_max_id = db.query(func.max(BackfillChunk.max_id)).filter(
+        BackfillChunk.channel_id == channel_id
+    ).scalar()
+
+    # Bounds are exclusive: a chunk (min_id, max_id) holds min_id + 1 .. max_id - 1
+    start = planned_max_id - 1 if planned_max_id else 0
+    chunks = []
+    while start < latest_message_id:
+        end = min(start + chunk_size, latest_message_id)
+        chunks.append(BackfillChunk(
+            channel_id=channel_id,
+            min_id=start,
+            max_id=end + 1,
+            status="pending",
+            posts_count=0,
+            use_takeout=use_takeout
+        ))
+        start = end
+
+    db.add_all(chunks)
+    db.commit()
+
+    if chunks:
+        logger.info(
+            f"Planned {len(chunks)} backfill chunks for channel {channel_id} "
+            f"up to message {latest_message_id} (takeout: {use_takeout})"
+        )
+    return chunks
+
+
+def reset_stale_chunks(db: Session, channel_id: int, now: Optional[datetime] = None) -> int:
+    """
+    Return failed chunks and chunks abandoned by a dead worker to pending.
+
+    A queued or running chunk is considered abandoned when it has not
+    committed progress for BACKFILL_STALE_MINUTES.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+        now: Current time (UTC)
+
+    Returns:
+        Number of chunks reset
+    """
+    now = now or datetime.utcnow()
+    stale_before = now - timedelta(minutes=settings.BACKFILL_STALE_MINUTES)
+
+    reset = db.query(BackfillChunk).filter(
+        BackfillChunk.channel_id == channel_id,
+        (BackfillChunk.status == "failed") | (
+            BackfillChunk.status.in_(ACTIVE_STATUSES) & (BackfillChunk.updated_at < stale_before)
+        )
+    ).update({"status": "pending"}, synchronize_session=False)
+    db.commit()
+    return reset
+
+
+def queue_pending_chunks(db: Session, channel_id: int) -> List[int]:
+    """
+    Mark pending chunks as queued, up to BACKFILL_PARALLEL_CHUNKS active at once.
+
+    Newest ranges are queued first, so recent history becomes available early.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+
+    Returns:
+        IDs of chunks the caller must dispatch
+    """
+    active = db.query(func.count(BackfillChunk.id)).filter(
+        BackfillChunk.channel_id == channel_id,
+        BackfillChunk.status.in_(ACTIVE_STATUSES)
+    ).scalar()
+    slots = settings.BACKFILL_PARALLEL_CHUNKS - active
+    if slots <= 0:
+        return []
+
+    chunks = db.query(BackfillChunk).filter(
+        BackfillChunk.channel_id == channel_id,
+        BackfillChunk.status == "pending"
+    ).order_by(BackfillChunk.max_id.desc()).limit(slots).with_for_update(skip_locked=True).all()
+
+    for chunk in chunks:
+        chunk.status = "queued"
+    db.commit()
+    return [chunk.id for chunk in chunks]
+
+
+def get_backfill_progress(db: Session, channel_id: int) -> Dict[str, Any]:
+    """
+    Get backfill progress of a channel.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+
+    Returns:
+        Dictionary with chunk counts by status, ingested posts and share of
+        the message ID range already covered
+    """
+    chunks = db.query(BackfillChunk).filter(BackfillChunk.channel_id == channel_id).all()
+
+    by_status = {status: 0 for status in ("pending", "queued", "running", "done", "failed")}
+    total_ids = 0
+    covered_ids = 0
+    for chunk in chunks:
+        by_status[chunk.status] = by_status.get(chunk.status, 0) + 1
+        size = chunk.max_id - 1 - chunk.min_id
+        total_ids += size
+        if chunk.status == "done":
+            covered_ids += size
+        elif chunk.cursor_id:
+            covered_ids += chunk.cursor_id - chunk.min_id
+
+    return {
+        "channel_id": channel_id,
+        "chunks": len(chunks),
+        **by_status,
+        "posts": sum(chunk.posts_count or 0 for chunk in chunks),
+        "latest_message_id": max((chunk.max_id - 1 for chunk in chunks), default=None),
+        "progress": round(covered_ids / total_ids, 4) if total_ids else 0.0,
+        "takeout_chunks": sum(1 for chunk in chunks if chunk.use_takeout),
+        "complete": bool(chunks) and by_status["done"] == len(chunks),
+    }
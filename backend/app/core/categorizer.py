@@ -0,0 +1,295 @@
+"""
+Keyword categorizer over a configurable taxonomy.
+
+The taxonomy maps categories to RU/EN keywords and phrases. All of them
+are compiled into one Aho-Corasick automaton, so a text is scored for
+every category in a single pass, however many keywords there are.
+
+Keywords match whole words by default. A trailing "*" matches any word
+ending ("новост*" also matches "новости", "новостей"). Matching ignores
+case and treats "ё" as "е".
+
+The taxonomy is DEFAULT_TAXONOMY, or the JSON file at
+CATEGORY_TAXONOMY_PATH. The file is re-read when it changes (checked at
+most every CATEGORY_TAXONOMY_CHECK_SECONDS), so edits apply without a
+restart.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Category -> keywords, or {"weight": float, "keywords": [...]}.
+# Earlier categories win ties.
+DEFAULT_TAXONOMY: Dict[str, Any] = {
+    "news": ["новост*", "news", "breaking", "update*", "обновлени*"],
+    "advertisement": [
+        "реклам*", "ad", "ads", "advertisement*", "promo*", "промокод*",
+        "скидк*", "sale", "discount*",
+    ],
+    "educational": [
+        "обучени*", "education*", "tutorial*", "how to", "учебник*", "курс", "курсы", "курсов",
+    ],
+    "entertainment": ["развлечени*", "entertainment", "fun", "юмор*", "joke*", "meme*", "мем*"],
+}
+
+
+def _normalize(text: str) -> str:
+    """Lowercase text for matching (length preserving)."""
+    return text.lower().replace("ё", "е")
+
+
+def _is_word_char(char: str) -> bool:
+    """Check whether a character continues a word."""
+    return char.isalnum() or char == "_"
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over taxonomy keywords."""
+
+    def __init__(self, taxonomy: Dict[str, Any]):
+        """
+        Compile taxonomy.
+
+        Args:
+            taxonomy: Category -> keywords, or {"weight": float, "keywords": [...]}
+
+        Raises:
+            ValueError: If the taxonomy is malformed
+        """
+        if not isinstance(taxonomy, dict):
+            raise ValueError("Taxonomy must map categories to keywords")
+
+        self.categories: List[str] = list(taxonomy)
+        # Identifies the taxonomy in cache keys of analysis results
+        self.digest = hashlib.sha1(
+            json.dumps(taxonomy, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:12]
+        self._order = {category: index for index, category in enumerate(self.categories)}
+        # Per node: transitions, failure link, outputs (category, weight, length, prefix_only)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, float, int, bool]]] = [[]]
+
+        for category, spec in taxonomy.items():
+            weight = 1.0
+            keywords = spec
+            if isinstance(spec, dict):
+                weight = float(spec.get("weight", 1.0))
+                keywords = spec.get("keywords", [])
+            if not isinstance(keywords, list):
+                raise ValueError(f"Keywords of category {category!r} must be a list")
+
+            for keyword in keywords:
+                keyword = _normalize(str(keyword).strip())
+                prefix_only = keyword.endswith("*")
+                keyword = keyword.rstrip("*")
+                if keyword:
+                    self._add(keyword, (category, weight, len(keyword), prefix_only))
+
+        self._build_failure_links()
+
+    def _add(self, keyword: str, output: Tuple[str, float, int, bool]):
+        """Add keyword path to the trie."""
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(output)
+
+    def _build_failure_links(self):
+        """Link every node to its longest proper suffix in the trie (BFS)."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                # Inherit matches ending at the suffix node
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """
+        Score categories of a text in one pass.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            Category -> sum of weights of matched keywords (matched categories only)
+        """
+        text = _normalize(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        scores: Dict[str, float] = {}
+        node = 0
+        length = len(text)
+
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not output[node]:
+                continue
+
+            for category, weight, keyword_length, prefix_only in output[node]:
+                start = end - keyword_length + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if not prefix_only and end + 1 < length and _is_word_char(text[end + 1]):
+                    continue
+                scores[category] = scores.get(category, 0.0) + weight
+        return scores
+
+    def rank(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Rank matched categories of a text.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            (category, score) pairs, best first; ties keep taxonomy order
+        """
+        scores = self.scores(text)
+        return sorted(
+            scores.items(),
+            key=lambda item: (-item[1], self._order[item[0]])
+        )
+
+
+def load_taxonomy(path: str) -> Dict[str, Any]:
+    """
+    Read taxonomy JSON file.
+
+    Args:
+        path: Path to JSON object of category -> keywords
+
+    Returns:
+        Taxonomy dictionary
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TaxonomyCategorizer:
+    """Categorizer that picks up taxonomy file changes while running."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        check_seconds: Optional[float] = None,
+        clock=time.monotonic
+    ):
+        """
+        Initialize categorizer.
+
+        Args:
+            path: Taxonomy JSON file (CATEGORY_TAXONOMY_PATH if not given;
+                DEFAULT_TAXONOMY when empty)
+            check_seconds: Minimum seconds between file change checks
+                (CATEGORY_TAXONOMY_CHECK_SECONDS if not given)
+            clock: Time source, injectable for tests
+        """
+        self.path = path if path is not None else settings.CATEGORY_TAXONOMY_PATH
+        self.check_seconds = (
+            check_seconds if check_seconds is not None else settings.CATEGORY_TAXONOMY_CHECK_SECONDS
+        )
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._checked_at = clock()
+        self.automaton = KeywordAutomaton(DEFAULT_TAXONOMY)
+        if self.path:
+            self.reload()
+
+    def reload(self) -> bool:
+        """
+        Re-read the taxonomy file now.
+
+        A file that cannot be read or compiled is logged and the current
+        taxonomy is kept.
+
+        Returns:
+            True if a new taxonomy was loaded
+        """
+        if not self.path:
+            return False
+
+        with self._lock:
+            self._checked_at = self._clock()
+            try:
+                mtime = os.path.getmtime(self.path)
+                automaton = KeywordAutomaton(load_taxonomy(self.path))
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load category taxonomy {self.path}: {e}")
+                return False
+
+            self.automaton = automaton
+            self._mtime = mtime
+            logger.info(f"Loaded category taxonomy {self.path} ({len(automaton.categories)} categories)")
+            return True
+
+    def _maybe_reload(self):
+        """Reload the taxonomy file if it changed since the last check."""
+        if not self.path or self._clock() - self._checked_at < self.check_seconds:
+            return
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.reload()
+        else:
+            self._checked_at = self._clock()
+
+    @property
+    def version(self) -> str:
+        """Digest of the current taxonomy."""
+        self._maybe_reload()
+        return self.automaton.digest
+
+    def rank(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Rank categories of a text with the current taxonomy.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            (category, score) pairs, best first
+        """
+        self._maybe_reload()
+        return self.automaton.rank(text)
+
+
+_categorizer: Optional[TaxonomyCategorizer] = None
+
+
+def get_categorizer() -> TaxonomyCategorizer:
+    """
+    Get process-wide categorizer configured from settings.
+
+    Returns:
+        Shared TaxonomyCategorizer instance
+    """
+    global _categorizer
+    if _categorizer is None:
+        _categorizer = TaxonomyCategorizer()
+    return _categorizer
@@ -2,12 +2,14 @@
 Celery configuration for background tasks.
 """
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.core.config import settings
 
 celery_app = Celery(
     "tgcursor2",
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
+    include=["app.core.tasks"],
 )
 
 celery_app.conf.update(
@@ -16,5 +18,31 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    beat_schedule={
+        "schedule-channel-polls": {
+            "task": "schedule_channel_polls",
+            "schedule": settings.POLL_SCHEDULER_TICK_SECONDS,
+        },
+    },
 )
 
+
+@worker_process_shutdown.connect
+def close_telegram_clients(**kwargs):
+    """Disconnect pooled Telegram clients and flush keyword counts when a worker process exits."""
+    from app.core.keywords import flush_keyword_engine
+    from app.core.telegram_pool import close_client_pool
+    
+    close_client_pool()
+    flush_keyword_engine()
+
+
+@worker_process_init.connect
+def warm_up_nlp_models(**kwargs):
+    """Load spaCy models when a worker process starts, if NLP_WARM_UP is set."""
+    if not settings.NLP_WARM_UP:
+        return
+    
+    from app.core.nlp import get_nlp_registry
+    
+    get_nlp_registry().warm_up()
@@ -17,6 +17,14 @@ class Settings(BaseSettings):
     # Telegram API
     TELEGRAM_API_ID: str = ""
     TELEGRAM_API_HASH: str = ""
+    TELEGRAM_SESSION_NAME: str = "tgcursor2_session"
+    TELEGRAM_SESSION_STRING: str = ""  # Exported StringSession, overrides the session file
+    TELEGRAM_CLIENT_POOL_SIZE: int = 2  # Long-lived clients per worker process
+    TELEGRAM_ENTITY_CACHE_SIZE: int = 1024  # Resolved peers kept in process memory
+    TELEGRAM_CLIENT_BACKEND: str = "telethon"  # "telethon" or "replay" (offline, no account)
+    TELEGRAM_REPLAY_SOURCE: str = "synthetic:replay_channel=10000"  # Or path to JSONL recordings
+    TELEGRAM_REPLAY_LATENCY_MS: int = 0
+    TELEGRAM_REPLAY_FLOOD_WAIT_EVERY: int = 0  # Inject FloodWaitError every N requests
     
     # Application
     SECRET_KEY: str = "change-me-in-production"
@@ -28,6 +36,93 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
+    # Telegram API rate limiting (token bucket shared by all workers)
+    TELEGRAM_RATE_LIMIT_BACKEND: str = "redis"  # "redis" or "memory"
+    TELEGRAM_REQUESTS_PER_MINUTE: int = 30
+    TELEGRAM_REQUEST_BURST: int = 5
+    TELEGRAM_TAKEOUT_REQUESTS_PER_MINUTE: int = 120  # Separate budget for takeout exports
+    TELEGRAM_TAKEOUT_REQUEST_BURST: int = 20
+    
+    # Ingestion
+    INGEST_BATCH_SIZE: int = 500
+    PARSE_CONCURRENCY: int = 8  # Channels parsed at once by a batch parse task
+    PIPELINE_QUEUE_SIZE: int = 4  # Batches buffered between two ingestion pipeline stages
+    PIPELINE_WORKERS: int = 2  # Threads for analysis and normalization
+    PARSE_MAX_WAIT_SECONDS: float = 30.0  # Longer rate-limit waits retry the task later instead of sleeping
+    PARSE_MAX_DEFERRALS: int = 50  # Retries of one task postponed by rate-limit waits
+    PARSE_DEAD_LETTER_AFTER: int = 5  # Consecutive failed parses before a channel is dead-lettered
+    PARSE_LOCK_BACKEND: str = "redis"  # "redis" or "memory"
+    PARSE_LOCK_TTL_SECONDS: int = 600  # Lock of a parse without progress expires (dead worker)
+    
+    # Full-history backfill
+    BACKFILL_CHUNK_SIZE: int = 5000  # Message IDs per chunk task
+    BACKFILL_PARALLEL_CHUNKS: int = 3  # Chunks of one channel queued at once
+    BACKFILL_STALE_MINUTES: int = 30  # Active chunk without progress is re-queued on resume
+    TAKEOUT_ENABLED: bool = True
+    TAKEOUT_MIN_MESSAGES: int = 20000  # Initial backfills of larger channels use a takeout session
+    
+    # Real-time push ingestion (python -m app.core.realtime)
+    REALTIME_INGESTION_ENABLED: bool = False  # Scheduler then polls only as a daily safety net
+    REALTIME_BATCH_SIZE: int = 200
+    REALTIME_FLUSH_SECONDS: float = 1.0
+    REALTIME_CONNECTION_CHECK_SECONDS: int = 5
+    REALTIME_REFRESH_SECONDS: int = 300  # Reload active channel list
+    
+    # Polling scheduler
+    POLL_SCHEDULER_TICK_SECONDS: int = 60
+    POLL_MIN_INTERVAL_MINUTES: int = 5
+    POLL_MAX_INTERVAL_MINUTES: int = 1440
+    POLL_TARGET_POSTS_PER_POLL: float = 1.0  # Expected new posts per poll of a channel
+    POLL_ACTIVITY_WINDOW_DAYS: int = 7
+    POLL_BATCH_SIZE: int = 50  # Channels per batch parse task
+    
+    # NLP (keyword extraction)
+    NLP_MODEL_EN: str = "en_core_web_sm"
+    NLP_MODEL_RU: str = "ru_core_news_sm"  # Used for posts written mostly in Cyrillic
+    NLP_BATCH_SIZE: int = 256  # Texts per nlp.pipe batch
+    NLP_PROCESSES: int = 1  # nlp.pipe worker processes; >1 needs a non-daemon worker (e.g. --pool=threads)
+    NLP_WARM_UP: bool = False  # Load models when a Celery worker process starts, not on the first batch
+    
+    # Analysis result cache (keyed by text hash)
+    ANALYSIS_CACHE_BACKEND: str = "redis"  # "redis" (LRU + shared Redis tier) or "memory"
+    ANALYSIS_CACHE_SIZE: int = 50000  # Results kept in process memory
+    ANALYSIS_CACHE_TTL_SECONDS: int = 604800  # Redis tier expiry (7 days)
+    
+    # TF-IDF keyword ranking
+    KEYWORD_DF_REFRESH_SECONDS: float = 300.0  # How often document frequencies are reloaded from the database
+    KEYWORD_DF_FLUSH_SECONDS: float = 10.0  # How long global document frequency increments are buffered
+    KEYWORD_MIN_GLOBAL_COUNT: int = 2  # Rarer global terms are not loaded into memory
+    
+    # Re-analysis of stored posts after analyzer changes
+    # Posts analyzed and written per transaction
+    REANALYSIS_BATCH_SIZE: int = 500
+    # Analysis processes; >1 needs a non-daemon worker (e.g. --pool=threads)
+    REANALYSIS_PROCESSES: int = 1
+    # Pause between batches, leaves the database to the API
+    REANALYSIS_PAUSE_SECONDS: float = 0.5
+    # Task run time before it re-queues itself after the last post
+    REANALYSIS_MAX_SECONDS: float = 300.0
+    
+    # Derived metrics (engagement rate) recomputed in SQL
+    METRICS_REFRESH_BATCH_SIZE: int = 10000  # Post IDs per UPDATE when refreshing a whole table or channel
+    METRICS_REFRESH_PAUSE_SECONDS: float = 0.1  # Pause between UPDATEs
+    
+    # Trending hashtags, mentions and link domains
+    TRENDS_BACKEND: str = "redis"  # "redis" (shared by API and workers) or "memory"
+    TRENDS_BUCKET_SECONDS: int = 3600  # Width of a counting bucket
+    TRENDS_WINDOW_BUCKETS: int = 3  # Recent buckets counted as "now"
+    TRENDS_BASELINE_BUCKETS: int = 48  # Buckets before the window forming the baseline
+    TRENDS_CAPACITY: int = 500  # Space-Saving counters per entity type and bucket
+    TRENDS_SKETCH_WIDTH: int = 2048  # Count-Min sketch columns
+    TRENDS_SKETCH_DEPTH: int = 4  # Count-Min sketch rows
+    TRENDS_LIMIT: int = 20  # Trends returned per entity type
+    TRENDS_MIN_COUNT: int = 3  # Posts in the window needed to trend
+    TRENDS_CANDIDATE_FACTOR: int = 3  # Heavy hitters scored per returned trend
+    
+    # Content categories
+    CATEGORY_TAXONOMY_PATH: str = ""  # JSON of category -> keywords; built-in taxonomy if empty
+    CATEGORY_TAXONOMY_CHECK_SECONDS: float = 30.0  # How often the file is checked for changes
+    
     # Export limits
     MAX_EXPORT_ROWS: int = 10000
     
@@ -0,0 +1,117 @@
+"""
+Dead-letter queue for channels that fail to parse repeatedly.
+
+Every failed parse increments the channel's consecutive failure count.
+After PARSE_DEAD_LETTER_AFTER failures the channel is dead-lettered: the
+scheduler stops polling it until it is requeued or a manual parse succeeds,
+so a broken channel does not keep taking worker slots and API budget.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.channel import Channel
+
+logger = logging.getLogger(__name__)
+
+
+def record_parse_failure(
+    db: Session,
+    channel_id: int,
+    error: str,
+    now: Optional[datetime] = None
+) -> bool:
+    """
+    Count a failed parse and dead-letter the channel after too many in a row.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+        error: Error message of the failure
+        now: Current time (UTC)
+
+    Returns:
+        True if the channel was dead-lettered by this failure
+    """
+    channel = db.query(Channel).filter_by(id=channel_id).first()
+    if channel is None:
+        return False
+
+    channel.failure_count = (channel.failure_count or 0) + 1
+    channel.last_error = error
+    dead_lettered = (
+        channel.dead_lettered_at is None
+        and channel.failure_count >= settings.PARSE_DEAD_LETTER_AFTER
+    )
+    if dead_lettered:
+        channel.dead_lettered_at = now or datetime.utcnow()
+        logger.warning(
+            f"Channel {channel.channel_username} failed {channel.failure_count} times "
+            f"in a row, moved to dead-letter queue: {error}"
+        )
+    db.commit()
+    return dead_lettered
+
+
+def record_parse_success(channel: Channel):
+    """
+    Reset failure tracking after a successful parse (committed by the caller).
+
+    Args:
+        channel: Channel model
+    """
+    channel.failure_count = 0
+    channel.last_error = None
+    channel.dead_lettered_at = None
+
+
+def list_dead_letters(db: Session) -> List[Dict[str, Any]]:
+    """
+    Get dead-lettered channels.
+
+    Args:
+        db: Database session
+
+    Returns:
+        List of channels with failure count and last error, oldest first
+    """
+    channels = db.query(Channel).filter(
+        Channel.dead_lettered_at.isnot(None)
+    ).order_by(Channel.dead_lettered_at).all()
+
+    return [
+        {
+            "channel_id": channel.id,
+            "channel_username": channel.channel_username,
+            "failure_count": channel.failure_count,
+            "last_error": channel.last_error,
+            "dead_lettered_at": channel.dead_lettered_at,
+            "last_parsed_at": channel.last_parsed_at,
+        }
+        for channel in channels
+    ]
+
+
+def requeue_dead_letter(db: Session, channel_id: int) -> bool:
+    """
+    Return a dead-lettered channel to polling, due immediately.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+
+    Returns:
+        True if the channel was dead-lettered
+    """
+    channel = db.query(Channel).filter_by(id=channel_id).first()
+    if channel is None or channel.dead_lettered_at is None:
+        return False
+
+    record_parse_success(channel)
+    channel.next_poll_at = None
+    db.commit()
+    logger.info(f"Requeued dead-lettered channel {channel.channel_username}")
+    return True
@@ -0,0 +1,101 @@
+"""
+Hashtag, mention and link entities of post texts.
+
+Telegram already marks entities in every message (message.entities);
+the parser turns them into plain dictionaries (see
+ChannelParserAgent._extract_entities). Texts without them are tokenized
+here with one regex scan that finds all three kinds at once.
+
+An entity is a dictionary with type ("hashtag", "mention" or "url"),
+value, and offset/length in characters of the plain message text.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+ENTITY_TYPES = ("hashtag", "mention", "url")
+
+# Alternatives are tried left to right at each position, so a "#" or "@"
+# inside a URL stays part of the URL
+_ENTITY_PATTERN = re.compile(
+    r"(?P<url>https?://[^\s/?#<>\"']+[^\s<>\"']*)"
+    r"|(?<!\w)(?P<hashtag>#\w+)"
+    r"|(?<!\w)(?P<mention>@\w+)",
+    re.IGNORECASE
+)
+
+# Sentence punctuation that ends a URL rather than belonging to it
+_URL_TRAILING = ".,;:!?'\")]}»…"
+
+
+def _trim_url(url: str) -> str:
+    """Strip trailing punctuation, keeping parentheses that are balanced inside the URL."""
+    while url and url[-1] in _URL_TRAILING:
+        if url[-1] == ")" and url.count("(") >= url.count(")"):
+            break
+        url = url[:-1]
+    return url
+
+
+def tokenize_entities(text: str) -> List[Dict[str, Any]]:
+    """
+    Find hashtags, mentions and URLs of a text in one pass.
+
+    Args:
+        text: Text to analyze
+
+    Returns:
+        Entities in order of appearance
+    """
+    if not text:
+        return []
+
+    entities = []
+    for match in _ENTITY_PATTERN.finditer(text):
+        entity_type = match.lastgroup
+        value = match.group()
+        if entity_type == "url":
+            value = _trim_url(value)
+            # A scheme followed only by punctuation is not a link
+            if "://" not in value or not value.split("://", 1)[1]:
+                continue
+        entities.append({
+            "type": entity_type,
+            "value": value,
+            "offset": match.start(),
+            "length": len(value),
+        })
+    return entities
+
+
+def group_entities(entities: Iterable[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    Collect unique entity values by type.
+
+    Args:
+        entities: Entities from tokenize_entities() or the parser
+
+    Returns:
+        Type -> values without duplicates, in order of first appearance
+    """
+    grouped: Dict[str, Dict[str, None]] = {entity_type: {} for entity_type in ENTITY_TYPES}
+    for entity in entities:
+        values = grouped.get(entity["type"])
+        if values is not None and entity["value"]:
+            values[entity["value"]] = None
+    return {entity_type: list(values) for entity_type, values in grouped.items()}
+
+
+def extract_entities(text: str, entities: Optional[List[Dict[str, Any]]] = None) -> Dict[str, List[str]]:
+    """
+    Get hashtags, mentions and URLs of a post.
+
+    Args:
+        text: Post text
+        entities: Entities marked by Telegram; the text is tokenized if None
+
+    Returns:
+        Type -> unique values in order of appearance
+    """
+    if entities is None:
+        entities = tokenize_entities(text)
+    return group_entities(entities)
@@ -0,0 +1,173 @@
+"""
+Cache of resolved Telegram channel peers.
+
+Resolving a username (contacts.ResolveUsername) is one of the most heavily
+flood-limited Telegram methods. Resolved peers (id + access_hash) are kept
+in an in-process LRU backed by the telegram_peers table, so the parser can
+build InputPeerChannel without asking Telegram again.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from telethon.tl.types import InputPeerChannel
+
+from app.core.config import settings
+from app.models.telegram_peer import TelegramPeer
+
+logger = logging.getLogger(__name__)
+
+
+class EntityCache:
+    """Two-tier (LRU + database) cache of resolved channel peers."""
+
+    def __init__(self, maxsize: int = None, session_factory: Optional[Callable] = None):
+        """
+        Initialize cache.
+
+        Args:
+            maxsize: Maximum number of peers in process memory
+            session_factory: Creates database sessions (memory-only cache if not given)
+        """
+        self.maxsize = maxsize or settings.TELEGRAM_ENTITY_CACHE_SIZE
+        self._session_factory = session_factory
+        self._peers: "OrderedDict[str, InputPeerChannel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "db_hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _key(username: str) -> str:
+        """Normalize username to cache key."""
+        return username.lstrip("@").lower()
+
+    def _remember(self, key: str, peer: InputPeerChannel):
+        """Put peer into the LRU, evicting the least recently used one."""
+        with self._lock:
+            self._peers[key] = peer
+            self._peers.move_to_end(key)
+            while len(self._peers) > self.maxsize:
+                self._peers.popitem(last=False)
+
+    def get(self, username: str) -> Optional[InputPeerChannel]:
+        """
+        Get cached peer for username.
+
+        Args:
+            username: Channel username
+
+        Returns:
+            InputPeerChannel or None on a miss
+        """
+        key = self._key(username)
+        with self._lock:
+            peer = self._peers.get(key)
+            if peer is not None:
+                self._peers.move_to_end(key)
+                self.stats["hits"] += 1
+                return peer
+
+        if self._session_factory is not None:
+            db = self._session_factory()
+            try:
+                row = db.query(TelegramPeer).filter_by(username=key).first()
+            except SQLAlchemyError as e:
+                logger.warning(f"Could not read peer cache for {username}: {e}")
+                row = None
+            finally:
+                db.close()
+
+            if row is not None:
+                peer = InputPeerChannel(channel_id=row.peer_id, access_hash=row.access_hash)
+                self._remember(key, peer)
+                self.stats["db_hits"] += 1
+                return peer
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, username: str, peer_id: int, access_hash: int):
+        """
+        Store resolved peer.
+
+        Args:
+            username: Channel username
+            peer_id: Telegram channel ID
+            access_hash: Channel access hash
+        """
+        key = self._key(username)
+        self._remember(key, InputPeerChannel(channel_id=peer_id, access_hash=access_hash))
+
+        if self._session_factory is None:
+            return
+
+        db = self._session_factory()
+        try:
+            now = datetime.utcnow()
+            stmt = insert(TelegramPeer).values(
+                username=key,
+                peer_id=peer_id,
+                access_hash=access_hash,
+                resolved_at=now
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[TelegramPeer.username],
+                set_={"peer_id": peer_id, "access_hash": access_hash, "resolved_at": now}
+            )
+            db.execute(stmt)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Could not store peer cache for {username}: {e}")
+        finally:
+            db.close()
+
+    def invalidate(self, username: str):
+        """
+        Drop cached peer, e.g. after its access hash was rejected.
+
+        Args:
+            username: Channel username
+        """
+        key = self._key(username)
+        with self._lock:
+            self._peers.pop(key, None)
+        self.stats["invalidations"] += 1
+
+        if self._session_factory is None:
+            return
+
+        db = self._session_factory()
+        try:
+            db.query(TelegramPeer).filter_by(username=key).delete()
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Could not invalidate peer cache for {username}: {e}")
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and current LRU size."""
+        return {**self.stats, "size": len(self._peers)}
+
+
+_entity_cache: Optional[EntityCache] = None
+
+
+def get_entity_cache() -> EntityCache:
+    """
+    Get process-wide entity cache backed by the database.
+
+    Returns:
+        Shared EntityCache instance
+    """
+    global _entity_cache
+    if _entity_cache is None:
+        from app.core.database import SessionLocal
+
+        _entity_cache = EntityCache(session_factory=SessionLocal)
+    return _entity_cache
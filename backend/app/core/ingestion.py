@@ -0,0 +1,249 @@
+"""
+Batched ingestion of parsed posts into the database.
+"""
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import JSON, BigInteger, cast, exists, func, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import DERIVED_METRICS, refresh_derived_metrics
+from app.models.channel import Channel
+from app.models.checked_post_gap import CheckedPostGap
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+# Columns refreshed when an already stored post is parsed again; derived
+# metrics follow them through refresh_derived_metrics()
+UPSERT_UPDATE_FIELDS = ["views", "likes"]
+
+
+def _post_row(post_data: Dict[str, Any], channel_id: int, now: datetime) -> Dict[str, Any]:
+    """
+    Build insert row from parsed post data.
+
+    Args:
+        post_data: Post dictionary from parser
+        channel_id: Channel ID in database
+        now: Timestamp for parsed_at/created_at/updated_at
+
+    Returns:
+        Row with Post columns only, without derived metrics (computed in SQL)
+    """
+    columns = Post.__table__.columns.keys()
+    row = {
+        key: value for key, value in post_data.items()
+        if key in columns and key != "id" and key not in DERIVED_METRICS
+    }
+    row["channel_id"] = channel_id
+    row["post_id"] = str(row["post_id"])
+    row.setdefault("parsed_at", now)
+    row.setdefault("created_at", now)
+    row.setdefault("updated_at", now)
+    return row
+
+
+def _is_distinct(field: str, stmt) -> Any:
+    """Condition that the stored column differs from the incoming row (json has no equality, compare as jsonb)."""
+    column, incoming = getattr(Post, field), stmt.excluded[field]
+    if isinstance(Post.__table__.columns[field].type, JSON):
+        column, incoming = cast(column, JSONB), cast(incoming, JSONB)
+    return column.is_distinct_from(incoming)
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int):
+    """Yield consecutive chunks of rows."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def upsert_posts(
+    db: Session,
+    channel_id: int,
+    posts: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    update_fields: Optional[List[str]] = None,
+    inserted_post_ids: Optional[Set[str]] = None
+) -> Dict[str, int]:
+    """
+    Insert new posts and refresh metrics of existing ones in batches.
+
+    Uses INSERT ... ON CONFLICT (channel_id, post_id) so each chunk is one
+    round trip and concurrent tasks on the same channel cannot create duplicates.
+    Existing rows are only updated when their metrics actually changed.
+    Derived metrics (engagement rate) of written rows are then recomputed
+    from the stored counters in SQL, and channel.last_post_at moves forward.
+
+    Args:
+        db: Database session (caller commits)
+        channel_id: Channel ID in database
+        posts: Post dictionaries from parser
+        batch_size: Rows per INSERT statement (INGEST_BATCH_SIZE if not given)
+        update_fields: Columns refreshed on existing posts (UPSERT_UPDATE_FIELDS if not given)
+        inserted_post_ids: If given, Telegram IDs of the newly inserted posts are added to it
+
+    Returns:
+        Dictionary with inserted, updated and skipped counts
+    """
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    update_fields = update_fields or UPSERT_UPDATE_FIELDS
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    now = datetime.utcnow()
+    last_post_at = None
+
+    # One statement cannot touch the same row twice, keep the latest copy of each post
+    rows_by_post_id = {}
+    for post_data in posts:
+        row = _post_row(post_data, channel_id, now)
+        rows_by_post_id[row["post_id"]] = row
+    counts["skipped"] += len(posts) - len(rows_by_post_id)
+
+    for chunk in _chunks(list(rows_by_post_id.values()), batch_size):
+        stmt = insert(Post).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_post_channel_post_id",
+            set_={
+                **{field: stmt.excluded[field] for field in update_fields},
+                "updated_at": now,
+            },
+            where=or_(*[_is_distinct(field, stmt) for field in update_fields])
+        )
+        # xmax is 0 only for freshly inserted tuples
+        stmt = stmt.returning(Post.post_id, Post.date, literal_column("(xmax = 0)").label("inserted"))
+
+        result = db.execute(stmt).all()
+        inserted = sum(1 for row in result if row.inserted)
+        if inserted_post_ids is not None:
+            inserted_post_ids.update(row.post_id for row in result if row.inserted)
+        refresh_derived_metrics(db, channel_id=channel_id, post_ids=[row.post_id for row in result])
+        counts["inserted"] += inserted
+        counts["updated"] += len(result) - inserted
+        counts["skipped"] += len(chunk) - len(result)
+        if result:
+            newest = max(row.date for row in result)
+            last_post_at = newest if last_post_at is None else max(last_post_at, newest)
+
+    if last_post_at is not None:
+        # Kept on the channel so the polling scheduler never aggregates the whole posts table
+        db.execute(
+            update(Channel)
+            .where(Channel.id == channel_id)
+            .values(last_post_at=func.greatest(func.coalesce(Channel.last_post_at, last_post_at), last_post_at))
+            .execution_options(synchronize_session=False)
+        )
+
+    logger.info(
+        f"Upserted posts for channel {channel_id}: "
+        f"{counts['inserted']} inserted, {counts['updated']} updated, {counts['skipped']} skipped"
+    )
+    return counts
+
+
+async def ingest_post_batches(
+    db: Session,
+    channel_id: int,
+    batches: AsyncIterator[List[Dict[str, Any]]],
+    on_batch: Optional[Callable[[List[Dict[str, Any]], Dict[str, int]], None]] = None
+) -> Dict[str, int]:
+    """
+    Analyze, normalize, upsert and commit post batches as they arrive from the parser.
+
+    Batches flow through the staged IngestionPipeline, which holds at most
+    PIPELINE_QUEUE_SIZE batches between two stages, and every batch is
+    committed on its own, so work done before a crash survives.
+    The channel message ID checkpoint advances in the same transaction.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+        batches: Async iterator of post batches (ChannelParserAgent.iter_post_batches)
+        on_batch: Called with each batch and its counts before the commit,
+            to record progress in the same transaction
+
+    Returns:
+        Dictionary with inserted, updated and skipped counts for the whole run
+    """
+    from app.core.pipeline import IngestionPipeline
+
+    return await IngestionPipeline(db, channel_id, on_batch=on_batch).run(batches)
+
+
+def advance_message_checkpoint(db: Session, channel_id: int, message_id: int):
+    """
+    Move channel.last_message_id forward, never backwards.
+
+    Args:
+        db: Database session (caller commits)
+        channel_id: Channel ID in database
+        message_id: Highest Telegram message ID just ingested
+    """
+    db.execute(
+        update(Channel)
+        .where(Channel.id == channel_id)
+        .values(last_message_id=func.greatest(func.coalesce(Channel.last_message_id, 0), message_id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def find_post_gaps(
+    db: Session,
+    channel_id: int,
+    limit: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """
+    Find ranges of Telegram message IDs missing between stored posts.
+
+    Gaps may also come from deleted or service messages, so fetching a gap
+    can legitimately return nothing. Gaps inside a range recorded by
+    record_checked_gap() were already fetched and are left out.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+        limit: Maximum number of gaps to return
+
+    Returns:
+        List of (first_missing_id, last_missing_id) ranges, newest first
+    """
+    message_id = cast(Post.post_id, BigInteger)
+    ordered = (
+        select(
+            message_id.label("message_id"),
+            func.lag(message_id).over(order_by=message_id).label("previous_id"),
+        )
+        .where(Post.channel_id == channel_id, Post.post_id.op("~")("^[0-9]+$"))
+        .subquery()
+    )
+    first_id = ordered.c.previous_id + 1
+    last_id = ordered.c.message_id - 1
+    checked = exists().where(
+        CheckedPostGap.channel_id == channel_id,
+        CheckedPostGap.first_id <= first_id,
+        CheckedPostGap.last_id >= last_id
+    )
+    query = (
+        select(first_id, last_id)
+        .where(ordered.c.message_id - ordered.c.previous_id > 1, ~checked)
+        .order_by(ordered.c.message_id.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+
+    return [(first_id, last_id) for first_id, last_id in db.execute(query)]
+
+
+def record_checked_gap(db: Session, channel_id: int, first_id: int, last_id: int):
+    """
+    Record a gap whose whole range was fetched, so it is not fetched again.
+
+    Args:
+        db: Database session (caller commits)
+        channel_id: Channel ID in database
+        first_id: First missing message ID of the gap
+        last_id: Last missing message ID of the gap
+    """
+    db.add(CheckedPostGap(channel_id=channel_id, first_id=first_id, last_id=last_id))
@@ -0,0 +1,352 @@
+"""
+Corpus-aware TF-IDF keyword scoring.
+
+Keyword candidates of a post are its noun and adjective lemmas with their
+counts (ContentAnalyzerAgent.extract_terms_batch). They are ranked by
+TF-IDF against two document-frequency tables:
+
+- the post's channel, which demotes the channel's recurring boilerplate;
+- all channels, which demotes generic words.
+
+Frequencies are stored in the keyword_document_frequencies table and are
+incremented as new posts are stored. Channel counts are written in the
+transaction storing the posts; global counts, which every channel writer
+shares, are buffered and written in short separate transactions at most
+every KEYWORD_DF_FLUSH_SECONDS. Each process keeps the tables it uses in
+memory and reloads them after KEYWORD_DF_REFRESH_SECONDS, so it picks up
+counts added by other workers.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import event, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.keyword_frequency import KeywordDocumentFrequency
+
+logger = logging.getLogger(__name__)
+
+# Scope of the frequency table over all channels
+GLOBAL_SCOPE = 0
+
+# Pseudo-term whose count is the number of posts in a scope
+DOCUMENTS_TERM = ""
+
+# Longest term stored (column size)
+MAX_TERM_LENGTH = 100
+
+# Session.info key of callbacks waiting for the session to commit
+AFTER_COMMIT_KEY = "keyword_after_commit"
+
+
+def _after_commit(db: Session, callback: Callable[[], None]):
+    """Run callback once the session's transaction commits, drop it on rollback."""
+    db.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session):
+    """Run callbacks registered with _after_commit()."""
+    for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit(session: Session):
+    """Forget callbacks of a rolled back transaction."""
+    session.info.pop(AFTER_COMMIT_KEY, None)
+
+
+class DocumentFrequencies:
+    """Document frequencies of one scope (a channel or all channels)."""
+
+    def __init__(
+        self,
+        documents: int = 0,
+        counts: Optional[Dict[str, int]] = None,
+        loaded_at: float = 0.0
+    ):
+        self.documents = documents
+        self.counts: Dict[str, int] = counts or {}
+        self.loaded_at = loaded_at
+
+    def idf(self, terms: List[str]) -> np.ndarray:
+        """Smoothed inverse document frequencies of terms."""
+        df = np.fromiter(
+            (self.counts.get(term, 0) for term in terms), dtype=np.float64, count=len(terms)
+        )
+        return np.log((1.0 + self.documents) / (1.0 + df)) + 1.0
+
+
+class KeywordEngine:
+    """TF-IDF keyword ranking against per-channel and global document frequencies."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable] = None,
+        refresh_seconds: Optional[float] = None,
+        min_global_count: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        clock=time.monotonic
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            session_factory: Creates database sessions (memory-only tables if not given)
+            refresh_seconds: Seconds before loaded tables are reloaded
+                (KEYWORD_DF_REFRESH_SECONDS if not given)
+            min_global_count: Global terms in fewer posts are not loaded into memory and
+                count as unseen (KEYWORD_MIN_GLOBAL_COUNT if not given)
+            flush_seconds: Seconds buffered global counts wait before being written
+                (KEYWORD_DF_FLUSH_SECONDS if not given)
+            clock: Time source, injectable for tests
+        """
+        self._session_factory = session_factory
+        if refresh_seconds is None:
+            refresh_seconds = settings.KEYWORD_DF_REFRESH_SECONDS
+        if flush_seconds is None:
+            flush_seconds = settings.KEYWORD_DF_FLUSH_SECONDS
+        self.refresh_seconds = refresh_seconds
+        self.min_global_count = min_global_count or settings.KEYWORD_MIN_GLOBAL_COUNT
+        self.flush_seconds = flush_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._scopes: Dict[int, DocumentFrequencies] = {}
+        # Committed global counts not written to the database yet
+        self._pending_global: Counter = Counter()
+        self._flushed_at = clock()
+
+    def _load(self, scope_id: int) -> DocumentFrequencies:
+        """Read document frequencies of a scope from the database."""
+        frequencies = DocumentFrequencies(loaded_at=self._clock())
+        if self._session_factory is None:
+            return frequencies
+
+        db = self._session_factory()
+        try:
+            query = db.query(
+                KeywordDocumentFrequency.term, KeywordDocumentFrequency.document_count
+            ).filter(
+                KeywordDocumentFrequency.channel_id == scope_id
+            )
+            if scope_id == GLOBAL_SCOPE:
+                # The global vocabulary is mostly terms seen once, keep only the informative part
+                query = query.filter(or_(
+                    KeywordDocumentFrequency.document_count >= self.min_global_count,
+                    KeywordDocumentFrequency.term == DOCUMENTS_TERM
+                ))
+            for term, count in query:
+                if term == DOCUMENTS_TERM:
+                    frequencies.documents = count
+                else:
+                    frequencies.counts[term] = count
+        except Exception as e:
+            # Ranking degrades to term frequency until the next reload
+            logger.error(f"Error loading keyword document frequencies of scope {scope_id}: {e}")
+            frequencies = DocumentFrequencies(loaded_at=self._clock())
+        finally:
+            db.close()
+        return frequencies
+
+    def _scope(self, scope_id: int) -> DocumentFrequencies:
+        """Get document frequencies of a scope, loading them if missing or stale."""
+        with self._lock:
+            frequencies = self._scopes.get(scope_id)
+            if (
+                frequencies is not None
+                and self._clock() - frequencies.loaded_at < self.refresh_seconds
+            ):
+                return frequencies
+
+        frequencies = self._load(scope_id)
+        with self._lock:
+            if scope_id == GLOBAL_SCOPE:
+                self._add(frequencies, self._pending_global)
+            self._scopes[scope_id] = frequencies
+        return frequencies
+
+    @staticmethod
+    def _add(frequencies: DocumentFrequencies, delta: Counter):
+        """Add counts of new documents to an in-memory table."""
+        frequencies.documents += delta[DOCUMENTS_TERM]
+        for term, count in delta.items():
+            if term != DOCUMENTS_TERM:
+                frequencies.counts[term] = frequencies.counts.get(term, 0) + count
+
+    def score_batch(
+        self,
+        channel_id: int,
+        term_counts: List[Dict[str, int]],
+        max_keywords: int = 10
+    ) -> List[List[str]]:
+        """
+        Rank candidate terms of a batch of posts by TF-IDF.
+
+        The batch is scored as one sparse term matrix: a term's score in a
+        post is (1 + log tf) * idf_channel * idf_global.
+
+        Args:
+            channel_id: Channel ID in database
+            term_counts: Candidate terms with their counts, one dictionary per post
+            max_keywords: Maximum number of keywords per post
+
+        Returns:
+            Keywords of every post, best first (ties keep order of appearance)
+        """
+        vocabulary: Dict[str, int] = {}
+        rows: List[int] = []
+        columns: List[int] = []
+        counts: List[int] = []
+        for row, terms in enumerate(term_counts):
+            for term, count in terms.items():
+                rows.append(row)
+                columns.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+
+        keywords: List[List[str]] = [[] for _ in term_counts]
+        if not vocabulary:
+            return keywords
+
+        terms = list(vocabulary)
+        idf = self._scope(channel_id).idf(terms) * self._scope(GLOBAL_SCOPE).idf(terms)
+
+        rows_array = np.asarray(rows)
+        columns_array = np.asarray(columns)
+        scores = (1.0 + np.log(np.asarray(counts, dtype=np.float64))) * idf[columns_array]
+
+        # Sort by post, then score descending, then position in the post
+        order = np.lexsort((np.arange(len(rows)), -scores, rows_array))
+        sorted_rows = rows_array[order]
+        rank = np.arange(len(order)) - np.searchsorted(sorted_rows, sorted_rows, side="left")
+        for index in order[rank < max_keywords]:
+            keywords[rows[index]].append(terms[columns[index]])
+        return keywords
+
+    def add_documents(
+        self,
+        db: Optional[Session],
+        channel_id: int,
+        term_counts: List[Dict[str, int]]
+    ):
+        """
+        Count new posts in the channel and global document frequencies.
+
+        Only call this for posts stored for the first time, or they are
+        counted twice. Channel counts are upserted in the caller's
+        transaction; global counts and the in-memory tables change only
+        once it commits.
+
+        Args:
+            db: Database session (caller commits); memory only if None
+            channel_id: Channel ID in database
+            term_counts: Candidate terms of the new posts, one dictionary per post
+        """
+        if not term_counts:
+            return
+
+        delta = Counter()
+        for terms in term_counts:
+            delta.update(term[:MAX_TERM_LENGTH] for term in terms if term)
+        delta[DOCUMENTS_TERM] = len(term_counts)
+
+        if db is None:
+            self._committed(channel_id, delta)
+            return
+
+        self._upsert(db, channel_id, delta)
+        _after_commit(db, lambda: self._committed(channel_id, delta))
+
+    def _committed(self, channel_id: int, delta: Counter):
+        """Apply counts of stored posts in memory and buffer the global ones."""
+        with self._lock:
+            for scope_id in (channel_id, GLOBAL_SCOPE):
+                frequencies = self._scopes.get(scope_id)
+                if frequencies is None:
+                    if self._session_factory is not None:
+                        # Loaded from the database with these counts
+                        continue
+                    frequencies = DocumentFrequencies(loaded_at=self._clock())
+                    self._scopes[scope_id] = frequencies
+                self._add(frequencies, delta)
+            if self._session_factory is None:
+                return
+            self._pending_global.update(delta)
+            due = self._clock() - self._flushed_at >= self.flush_seconds
+
+        if due:
+            self.flush_global()
+
+    def flush_global(self):
+        """Write buffered global counts in a short transaction of their own."""
+        with self._lock:
+            delta, self._pending_global = self._pending_global, Counter()
+            self._flushed_at = self._clock()
+        if not delta or self._session_factory is None:
+            return
+
+        db = self._session_factory()
+        try:
+            self._upsert(db, GLOBAL_SCOPE, delta)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # Kept for the next flush
+            logger.error(f"Error writing global keyword document frequencies: {e}")
+            with self._lock:
+                self._pending_global.update(delta)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _upsert(db: Session, scope_id: int, delta: Counter):
+        """
+        Increment stored counts of a scope.
+
+        Terms are written in sorted order, so concurrent writers cannot deadlock.
+        """
+        rows = [
+            {"channel_id": scope_id, "term": term, "document_count": count}
+            for term, count in sorted(delta.items())
+        ]
+        batch_size = settings.INGEST_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            stmt = insert(KeywordDocumentFrequency).values(rows[start:start + batch_size])
+            document_count = KeywordDocumentFrequency.document_count + stmt.excluded.document_count
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["channel_id", "term"],
+                set_={"document_count": document_count}
+            ))
+
+
+_keyword_engine: Optional[KeywordEngine] = None
+
+
+def get_keyword_engine() -> KeywordEngine:
+    """
+    Get process-wide keyword engine backed by the database.
+
+    Returns:
+        Shared KeywordEngine instance
+    """
+    global _keyword_engine
+    if _keyword_engine is None:
+        from app.core.database import SessionLocal
+
+        _keyword_engine = KeywordEngine(session_factory=SessionLocal)
+        # Celery children leave through os._exit; the worker_process_shutdown handler flushes them
+        atexit.register(_keyword_engine.flush_global)
+    return _keyword_engine
+
+
+def flush_keyword_engine():
+    """Write buffered global counts of the process-wide engine, if one was created."""
+    if _keyword_engine is not None:
+        _keyword_engine.flush_global()
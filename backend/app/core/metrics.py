@@ -0,0 +1,155 @@
+"""
+Derived post metrics computed in the database.
+
+Ratios such as engagement_rate are defined once as SQL expressions over
+the raw counters and written with set-based UPDATEs, so they never drift
+from views and likes whichever path changed those: batch ingestion,
+real-time edits or manual fixes. Rows already holding the right values
+are not touched.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, Numeric, and_, case, cast, func, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+
+def _engagement_rate():
+    """likes / views rounded like ContentAnalyzerAgent.calculate_engagement_rate, NULL without views."""
+    return case(
+        (Post.views > 0, cast(func.round(cast(Post.likes, Numeric) / Post.views, 6), Float)),
+        else_=None
+    )
+
+
+# Column -> SQL expression over the raw counters of the same row
+DERIVED_METRICS: Dict[str, Callable[[], Any]] = {
+    "engagement_rate": _engagement_rate,
+}
+
+
+def refresh_derived_metrics(
+    db: Session,
+    channel_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    post_ids: Optional[List[str]] = None,
+    id_range: Optional[Tuple[int, int]] = None
+) -> int:
+    """
+    Recompute derived metrics of matching posts with one UPDATE.
+
+    Args:
+        db: Database session (caller commits)
+        channel_id: Only posts of this channel
+        date_from: Only posts published at or after this time
+        date_to: Only posts published at or before this time
+        post_ids: Only these Telegram post IDs (use with channel_id)
+        id_range: Only posts with first <= id < last
+
+    Returns:
+        Number of posts whose metrics changed
+    """
+    expressions = {column: expression() for column, expression in DERIVED_METRICS.items()}
+
+    conditions = [
+        # Skip rows that are already right, they would only produce dead tuples
+        or_(*[getattr(Post, column).is_distinct_from(expression) for column, expression in expressions.items()])
+    ]
+    if channel_id is not None:
+        conditions.append(Post.channel_id == channel_id)
+    if date_from is not None:
+        conditions.append(Post.date >= date_from)
+    if date_to is not None:
+        conditions.append(Post.date <= date_to)
+    if post_ids is not None:
+        if not post_ids:
+            return 0
+        conditions.append(Post.post_id.in_(post_ids))
+    if id_range is not None:
+        conditions.append(and_(Post.id >= id_range[0], Post.id < id_range[1]))
+
+    result = db.execute(
+        update(Post)
+        .where(*conditions)
+        .values(**expressions)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def refresh_derived_metrics_in_batches(
+    session_factory: Optional[Callable[[], Session]] = None,
+    channel_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+    sleep=time.sleep
+) -> Dict[str, int]:
+    """
+    Recompute derived metrics over the whole table (or a channel or date range) in ID ranges.
+
+    Every range is one UPDATE in its own transaction, so locks are short
+    and an interrupted run keeps the ranges already committed.
+
+    Args:
+        session_factory: Creates database sessions (SessionLocal if not given)
+        channel_id: Only posts of this channel
+        date_from: Only posts published at or after this time
+        date_to: Only posts published at or before this time
+        batch_size: Post IDs per UPDATE (METRICS_REFRESH_BATCH_SIZE if not given)
+        pause_seconds: Pause between ranges (METRICS_REFRESH_PAUSE_SECONDS if not given)
+        sleep: Sleep function, injectable for tests
+
+    Returns:
+        Dictionary with number of batches and updated posts
+    """
+    if session_factory is None:
+        from app.core.database import SessionLocal
+
+        session_factory = SessionLocal
+    batch_size = batch_size or settings.METRICS_REFRESH_BATCH_SIZE
+    pause_seconds = pause_seconds if pause_seconds is not None else settings.METRICS_REFRESH_PAUSE_SECONDS
+    totals = {"batches": 0, "updated": 0}
+
+    db = session_factory()
+    try:
+        query = db.query(func.min(Post.id), func.max(Post.id))
+        if channel_id is not None:
+            query = query.filter(Post.channel_id == channel_id)
+        first_id, last_id = query.one()
+        if first_id is None:
+            return totals
+
+        for start in range(first_id, last_id + 1, batch_size):
+            if totals["batches"]:
+                sleep(pause_seconds)
+            updated = refresh_derived_metrics(
+                db,
+                channel_id=channel_id,
+                date_from=date_from,
+                date_to=date_to,
+                id_range=(start, start + batch_size)
+            )
+            db.commit()
+            totals["batches"] += 1
+            totals["updated"] += updated
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info(
+        f"Refreshed derived metrics of {totals['updated']} posts in {totals['batches']} batches "
+        f"(channel: {channel_id}, from: {date_from}, to: {date_to})"
+    )
+    return totals
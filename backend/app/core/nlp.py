@@ -0,0 +1,202 @@
+"""
+spaCy model registry for keyword extraction.
+
+Models are loaded lazily, once per process and language, with only the
+components needed for part-of-speech tags and lemmas: the dependency
+parser and NER are excluded. Texts go through nlp.pipe in batches,
+grouped by language, so Russian posts are tagged by a Russian model.
+
+spaCy itself is imported only when the first model is loaded. Analysis
+workers can load models at startup instead (NLP_WARM_UP).
+"""
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pipeline components not needed for POS tags and lemmas
+KEYWORD_EXCLUDE = ["parser", "ner", "senter"]
+
+_CYRILLIC = re.compile(r"[а-яё]", re.IGNORECASE)
+_LATIN = re.compile(r"[a-z]", re.IGNORECASE)
+
+
+def detect_language(text: str) -> str:
+    """
+    Pick model language of a text by its alphabet.
+
+    Args:
+        text: Text to analyze
+
+    Returns:
+        "ru" if Cyrillic letters outnumber Latin ones, otherwise "en"
+    """
+    if len(_CYRILLIC.findall(text)) > len(_LATIN.findall(text)):
+        return "ru"
+    return "en"
+
+
+def load_model(name: str):
+    """
+    Load a trimmed spaCy pipeline.
+
+    Args:
+        name: Installed spaCy package name, e.g. "en_core_web_sm"
+
+    Returns:
+        spaCy Language without parser and NER
+    """
+    import spacy
+
+    return spacy.load(name, exclude=KEYWORD_EXCLUDE)
+
+
+class NlpModelRegistry:
+    """spaCy pipelines by language, loaded on first use."""
+
+    def __init__(
+        self,
+        models: Optional[Dict[str, str]] = None,
+        default_language: str = "en",
+        loader: Callable[[str], Any] = load_model
+    ):
+        """
+        Initialize registry.
+
+        Args:
+            models: Language code to spaCy package name (NLP_MODEL_* settings if not given)
+            default_language: Language whose model is used when another one is missing
+            loader: Loads a model by package name, injectable for tests
+        """
+        self.models = models or {"en": settings.NLP_MODEL_EN, "ru": settings.NLP_MODEL_RU}
+        self.default_language = default_language
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, Any] = {}  # Language -> model, None if it failed to load
+
+    def _load(self, language: str):
+        """Load model of a language once, remembering failures."""
+        with self._lock:
+            if language not in self._loaded:
+                name = self.models.get(language)
+                model = None
+                if name:
+                    try:
+                        model = self._loader(name)
+                        logger.info(f"Loaded spaCy model {name} for '{language}'")
+                    except (ImportError, OSError, ValueError) as e:
+                        logger.warning(
+                            f"spaCy model {name} not available: {e}. Run: python -m spacy download {name}"
+                        )
+                self._loaded[language] = model
+            return self._loaded[language]
+
+    def get(self, language: str):
+        """
+        Get model for a language.
+
+        Args:
+            language: Language code
+
+        Returns:
+            spaCy Language, the default language model if this one is missing,
+            or None if neither is installed
+        """
+        model = self._load(language)
+        if model is None and language != self.default_language:
+            model = self._load(self.default_language)
+        return model
+
+    def warm_up(self, languages: Optional[List[str]] = None):
+        """
+        Load models ahead of the first analyzed batch.
+
+        Args:
+            languages: Languages to load (all configured if not given)
+        """
+        models = {id(model): model for model in map(self.get, languages or list(self.models)) if model}
+        for model in models.values():
+            # First call initializes lazily built tables (lemmatizer lookups)
+            list(model.pipe(["warm up"]))
+
+    def fingerprint(self) -> str:
+        """
+        Describe which model serves each language.
+
+        Returns:
+            E.g. "en=en_core_web_sm,ru=ru_core_news_sm", "none" without models
+        """
+        served = []
+        for language in sorted(self.models):
+            if self.get(language) is None:
+                continue
+            # get() fell back to the default language if this model is missing
+            source = language if self._loaded.get(language) is not None else self.default_language
+            served.append(f"{language}={self.models[source]}")
+        return ",".join(served) or "none"
+
+    def is_available(self) -> bool:
+        """Check whether keywords can be extracted at all."""
+        return any(self.get(language) is not None for language in self.models)
+
+    def pipe(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        n_process: Optional[int] = None
+    ) -> List[Optional[Any]]:
+        """
+        Process texts with the model of their language.
+
+        Args:
+            texts: Texts to process
+            batch_size: Texts per nlp.pipe batch (NLP_BATCH_SIZE if not given)
+            n_process: Worker processes per language (NLP_PROCESSES if not given);
+                only used when there is more than one batch of texts
+
+        Returns:
+            spaCy Docs in the order of texts, None where no model is available
+        """
+        batch_size = batch_size or settings.NLP_BATCH_SIZE
+        n_process = n_process or settings.NLP_PROCESSES
+
+        by_language: Dict[str, List[int]] = {}
+        for index, text in enumerate(texts):
+            if text:
+                by_language.setdefault(detect_language(text), []).append(index)
+
+        docs: List[Optional[Any]] = [None] * len(texts)
+        for language, indexes in by_language.items():
+            model = self.get(language)
+            if model is None:
+                continue
+
+            processes = n_process if len(indexes) > batch_size else 1
+            language_docs = model.pipe(
+                (texts[index] for index in indexes),
+                batch_size=batch_size,
+                n_process=processes
+            )
+            for index, doc in zip(indexes, language_docs):
+                docs[index] = doc
+        return docs
+
+
+_registry: Optional[NlpModelRegistry] = None
+
+
+def get_nlp_registry() -> NlpModelRegistry:
+    """
+    Get process-wide model registry configured from settings.
+
+    Returns:
+        Shared NlpModelRegistry instance
+    """
+    global _registry
+    if _registry is None:
+        _registry = NlpModelRegistry()
+    return _registry
@@ -0,0 +1,279 @@
+"""
+Per-channel parse locks shared by the API and all workers.
+
+A parse of a channel in a given mode holds the lock keyed by channel ID
+and parse mode (the idempotency key), owned by the Celery task ID. A
+second request for the same key is coalesced: it gets the ID of the task
+already holding the lock instead of queueing another fetch.
+
+Locks expire after PARSE_LOCK_TTL_SECONDS without a heartbeat, so the
+lock of a worker that died is released automatically. Running parses
+refresh it with every committed batch.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] - lock key; ARGV - owner, TTL in seconds
+_CLAIM_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if not holder or holder == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return ARGV[1]
+end
+return holder
+"""
+
+# KEYS[1] - lock key; ARGV - owner, TTL in seconds
+_REFRESH_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS[1] - lock key; ARGV - owner
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def parse_lock_key(channel_id: int, parse_mode: str) -> str:
+    """
+    Build idempotency key of a channel parse.
+
+    Args:
+        channel_id: Channel ID in database
+        parse_mode: "new_only", "full_history" or "fill_gaps"
+
+    Returns:
+        Lock key
+    """
+    return f"tgcursor2:parse_lock:{channel_id}:{parse_mode}"
+
+
+class InMemoryParseLock:
+    """Parse locks kept in process memory."""
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Initialize locks.
+
+        Args:
+            clock: Time source, injectable for tests
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._locks: Dict[str, Tuple[str, float]] = {}  # key -> (owner, expires_at)
+
+    def _holder(self, key: str) -> Optional[str]:
+        """Get current owner of an unexpired lock (caller holds self._lock)."""
+        entry = self._locks.get(key)
+        if entry is None:
+            return None
+        owner, expires_at = entry
+        if expires_at <= self._clock():
+            del self._locks[key]
+            return None
+        return owner
+
+    def claim(self, key: str, owner: str, ttl: int) -> str:
+        """
+        Take the lock unless another owner holds it.
+
+        Claiming a lock already held by the same owner refreshes it.
+
+        Args:
+            key: Lock key
+            owner: Claiming task ID
+            ttl: Seconds until the lock expires without a refresh
+
+        Returns:
+            Owner holding the lock afterwards (owner itself if claimed)
+        """
+        with self._lock:
+            holder = self._holder(key)
+            if holder is None or holder == owner:
+                self._locks[key] = (owner, self._clock() + ttl)
+                return owner
+            return holder
+
+    def refresh(self, key: str, owner: str, ttl: int) -> bool:
+        """
+        Extend a lock held by owner.
+
+        Args:
+            key: Lock key
+            owner: Task ID holding the lock
+            ttl: Seconds until the lock expires without another refresh
+
+        Returns:
+            False if the lock expired or belongs to someone else
+        """
+        with self._lock:
+            if self._holder(key) != owner:
+                return False
+            self._locks[key] = (owner, self._clock() + ttl)
+            return True
+
+    def release(self, key: str, owner: str) -> bool:
+        """
+        Release a lock held by owner.
+
+        Args:
+            key: Lock key
+            owner: Task ID holding the lock
+
+        Returns:
+            False if the lock expired or belongs to someone else
+        """
+        with self._lock:
+            if self._holder(key) != owner:
+                return False
+            del self._locks[key]
+            return True
+
+    def holder(self, key: str) -> Optional[str]:
+        """Get task ID currently holding the lock."""
+        with self._lock:
+            return self._holder(key)
+
+
+class RedisParseLock:
+    """Parse locks stored in Redis and shared by the API and all workers."""
+
+    def __init__(self, redis_url: str = None):
+        """
+        Initialize locks.
+
+        Args:
+            redis_url: Redis connection URL
+        """
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.fallback = InMemoryParseLock()
+        self._client = None
+
+    def _get_client(self):
+        """Get synchronous Redis client."""
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def _eval(self, script: str, key: str, *args):
+        """Run Lua script against a lock key."""
+        return self._get_client().eval(script, 1, key, *args)
+
+    def claim(self, key: str, owner: str, ttl: int) -> str:
+        """Take the lock unless another owner holds it (see InMemoryParseLock.claim)."""
+        from redis.exceptions import RedisError
+
+        try:
+            holder = self._eval(_CLAIM_SCRIPT, key, owner, int(ttl))
+            return holder.decode() if isinstance(holder, bytes) else holder
+        except RedisError as e:
+            logger.warning(f"Redis parse lock unavailable, using local lock: {e}")
+            return self.fallback.claim(key, owner, ttl)
+
+    def refresh(self, key: str, owner: str, ttl: int) -> bool:
+        """Extend a lock held by owner."""
+        from redis.exceptions import RedisError
+
+        try:
+            return bool(self._eval(_REFRESH_SCRIPT, key, owner, int(ttl)))
+        except RedisError as e:
+            logger.warning(f"Redis parse lock unavailable, using local lock: {e}")
+            return self.fallback.refresh(key, owner, ttl)
+
+    def release(self, key: str, owner: str) -> bool:
+        """Release a lock held by owner."""
+        from redis.exceptions import RedisError
+
+        try:
+            return bool(self._eval(_RELEASE_SCRIPT, key, owner))
+        except RedisError as e:
+            logger.warning(f"Redis parse lock unavailable, using local lock: {e}")
+            return self.fallback.release(key, owner)
+
+    def holder(self, key: str) -> Optional[str]:
+        """Get task ID currently holding the lock."""
+        from redis.exceptions import RedisError
+
+        try:
+            holder = self._get_client().get(key)
+        except RedisError as e:
+            logger.warning(f"Redis parse lock unavailable, using local lock: {e}")
+            return self.fallback.holder(key)
+        return holder.decode() if holder is not None else None
+
+
+class ChannelParseLease:
+    """Lock on one channel and parse mode, held by one task."""
+
+    def __init__(self, channel_id: int, parse_mode: str, owner: str, lock=None):
+        """
+        Initialize lease.
+
+        Args:
+            channel_id: Channel ID in database
+            parse_mode: "new_only" or "full_history"
+            owner: Task ID taking the lease
+            lock: Lock backend (shared parse lock if not given)
+        """
+        self.key = parse_lock_key(channel_id, parse_mode)
+        self.owner = owner
+        self.lock = lock or get_parse_lock()
+        self.holder: Optional[str] = None
+        self.kept = False
+
+    def acquire(self) -> bool:
+        """
+        Take the lease.
+
+        Returns:
+            True if owned by this task, otherwise self.holder is the task holding it
+        """
+        self.holder = self.lock.claim(self.key, self.owner, settings.PARSE_LOCK_TTL_SECONDS)
+        return self.holder == self.owner
+
+    def heartbeat(self, ttl: Optional[int] = None):
+        """Keep the lease alive for ttl seconds (PARSE_LOCK_TTL_SECONDS if not given)."""
+        self.lock.refresh(self.key, self.owner, ttl or settings.PARSE_LOCK_TTL_SECONDS)
+
+    def keep(self, seconds: float):
+        """Hold the lease across a delayed retry running under the same task ID."""
+        self.heartbeat(int(seconds) + settings.PARSE_LOCK_TTL_SECONDS)
+        self.kept = True
+
+    def release(self):
+        """Release the lease unless it is kept for a retry."""
+        if not self.kept:
+            self.lock.release(self.key, self.owner)
+
+
+_parse_lock = None
+
+
+def get_parse_lock():
+    """
+    Get process-wide parse lock backend configured from settings.
+
+    Returns:
+        Shared RedisParseLock or InMemoryParseLock instance
+    """
+    global _parse_lock
+    if _parse_lock is None:
+        if settings.PARSE_LOCK_BACKEND == "redis":
+            _parse_lock = RedisParseLock()
+        else:
+            _parse_lock = InMemoryParseLock()
+    return _parse_lock
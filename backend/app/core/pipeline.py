@@ -0,0 +1,369 @@
+"""
+Staged ingestion pipeline: fetch -> analyze -> normalize -> write.
+
+Stages run concurrently and hand post batches over through bounded
+queues, so a slow stage applies backpressure instead of letting batches
+pile up in memory. Analysis and normalization are CPU work and run in a
+thread pool; the database writer runs in its own thread, so the event
+loop keeps fetching from Telegram while earlier batches are processed.
+
+Batches keep their order through every stage, so the message ID
+checkpoint still advances monotonically with each committed batch. It
+never moves past a post the normalize stage rejected, so the next poll
+fetches that post again.
+"""
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.agents.content_analyzer import ContentAnalyzerAgent
+from app.agents.data_processor import DataProcessorAgent
+from app.core.config import settings
+from app.core.ingestion import advance_message_checkpoint, upsert_posts
+from app.core.metrics import DERIVED_METRICS
+from app.core.trends import record_trends
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetch", "analyze", "normalize", "write")
+
+# Marks the end of the stream in stage queues
+_DONE = object()
+
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+_totals: Dict[str, Dict[str, float]] = {}
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Get process-wide executor for analysis and normalization stages."""
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = ThreadPoolExecutor(
+            max_workers=settings.PIPELINE_WORKERS, thread_name_prefix="ingest-cpu"
+        )
+    return _cpu_executor
+
+
+class IngestionPipeline:
+    """Runs post batches of one channel through analysis and normalization into the database."""
+
+    def __init__(
+        self,
+        db: Session,
+        channel_id: int,
+        on_batch: Optional[Callable[[List[Dict[str, Any]], Dict[str, int]], None]] = None,
+        analyzer: Optional[ContentAnalyzerAgent] = None,
+        processor: Optional[DataProcessorAgent] = None,
+        queue_size: Optional[int] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+        update_fields: Optional[List[str]] = None,
+        advance_checkpoint: bool = True,
+    ):
+        """
+        Initialize pipeline.
+
+        Args:
+            db: Database session, used by the writer thread only while running
+            channel_id: Channel ID in database
+            on_batch: Called with each raw batch and its counts before the commit
+            analyzer: Content analyzer (new instance if not given)
+            processor: Data processor (new instance if not given)
+            queue_size: Batches buffered between two stages (PIPELINE_QUEUE_SIZE if not given)
+            executor: Executor for CPU stages (shared executor if not given)
+            update_fields: Columns refreshed on already stored posts
+                (UPSERT_UPDATE_FIELDS if not given)
+            advance_checkpoint: Whether committed batches move the channel message ID checkpoint
+        """
+        self.db = db
+        self.channel_id = channel_id
+        self.on_batch = on_batch
+        self.analyzer = analyzer or ContentAnalyzerAgent()
+        self.processor = processor or DataProcessorAgent()
+        self.queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+        self.executor = executor or get_cpu_executor()
+        self.update_fields = update_fields
+        self.advance_checkpoint = advance_checkpoint
+        self._queues: Dict[str, asyncio.Queue] = {}
+        # Highest message ID the checkpoint may reach, below the first rejected post
+        self._checkpoint_limit: Optional[int] = None
+        self.stats = {
+            stage: {"batches": 0, "posts": 0, "seconds": 0.0, "max_queue_depth": 0}
+            for stage in STAGES
+        }
+        self.stats["normalize"]["rejected"] = 0
+
+    def _record(self, stage: str, posts: int, started: float):
+        """Account one processed batch to a stage."""
+        stats = self.stats[stage]
+        stats["batches"] += 1
+        stats["posts"] += posts
+        stats["seconds"] += time.monotonic() - started
+
+    async def _put(self, stage: str, item):
+        """Hand item to the queue feeding stage, waiting while it is full."""
+        queue = self._queues[stage]
+        await queue.put(item)
+        stats = self.stats[stage]
+        stats["max_queue_depth"] = max(stats["max_queue_depth"], queue.qsize())
+
+    async def _fetch(self, batches: AsyncIterator[List[Dict[str, Any]]]):
+        """Pull batches from the parser."""
+        started = time.monotonic()
+        async for batch in batches:
+            self._record("fetch", len(batch), started)
+            await self._put("analyze", batch)
+            started = time.monotonic()
+
+    async def _analyze(self):
+        """Extract hashtags, mentions, links and metrics."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._queues["analyze"].get()
+            if batch is _DONE:
+                await self._put("normalize", _DONE)
+                return
+
+            started = time.monotonic()
+            analyzed = await loop.run_in_executor(
+                self.executor,
+                functools.partial(
+                    self.analyzer.analyze_posts_batch, batch, channel_id=self.channel_id
+                ),
+            )
+            self._record("analyze", len(batch), started)
+            await self._put("normalize", (batch, analyzed))
+
+    def _normalize_batch(self, analyzed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate and normalize analyzed posts for the database."""
+        # Derived metrics are recomputed in SQL, an odd ratio (more reactions
+        # than views) must not reject the post
+        return self.processor.batch_process_posts(
+            [
+                {
+                    **{
+                        key: value for key, value in post_data.items() if key not in DERIVED_METRICS
+                    },
+                    "channel_id": self.channel_id,
+                }
+                for post_data in analyzed
+            ]
+        )
+
+    async def _normalize(self):
+        """Validate and normalize posts, dropping invalid ones."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queues["normalize"].get()
+            if item is _DONE:
+                await self._put("write", _DONE)
+                return
+
+            batch, analyzed = item
+            started = time.monotonic()
+            processed = await loop.run_in_executor(self.executor, self._normalize_batch, analyzed)
+            self._record("normalize", len(batch), started)
+            self.stats["normalize"]["rejected"] += len(analyzed) - len(processed)
+            await self._put("write", (batch, processed, _terms(analyzed)))
+
+    def _checkpoint(self, batch: List[Dict[str, Any]], posts: List[Dict[str, Any]]) -> int:
+        """Get message ID the checkpoint may advance to after writing a batch."""
+        rejected = {str(post_data["post_id"]) for post_data in batch} - {
+            post_data["post_id"] for post_data in posts
+        }
+        if rejected:
+            first_rejected = min(int(post_id) for post_id in rejected)
+            logger.warning(
+                f"Checkpoint of channel {self.channel_id} held below rejected post {first_rejected}"
+            )
+            if self._checkpoint_limit is None or first_rejected - 1 < self._checkpoint_limit:
+                self._checkpoint_limit = first_rejected - 1
+
+        checkpoint = max(int(post_data["post_id"]) for post_data in batch)
+        if self._checkpoint_limit is not None:
+            checkpoint = min(checkpoint, self._checkpoint_limit)
+        return checkpoint
+
+    def _write_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        posts: List[Dict[str, Any]],
+        terms: Optional[Dict[str, Dict[str, int]]] = None,
+    ) -> Dict[str, int]:
+        """
+        Upsert posts, count keyword document frequencies of new ones and
+        advance the checkpoint (if enabled) in one transaction.
+        """
+        try:
+            counts = {"inserted": 0, "updated": 0, "skipped": 0}
+            inserted_post_ids = set()
+            if posts:
+                counts = upsert_posts(
+                    self.db,
+                    self.channel_id,
+                    posts,
+                    update_fields=self.update_fields,
+                    inserted_post_ids=inserted_post_ids,
+                )
+            if terms and inserted_post_ids:
+                self.analyzer.keyword_engine.add_documents(
+                    self.db,
+                    self.channel_id,
+                    [terms.get(post_id, {}) for post_id in sorted(inserted_post_ids)],
+                )
+            if self.advance_checkpoint:
+                advance_message_checkpoint(self.db, self.channel_id, self._checkpoint(batch, posts))
+            if self.on_batch is not None:
+                self.on_batch(batch, counts)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        if inserted_post_ids:
+            record_trends(
+                post_data for post_data in posts if post_data["post_id"] in inserted_post_ids
+            )
+        return counts
+
+    def ingest_batch(self, batch: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Run one batch through all stages in the calling thread and commit it.
+
+        For micro-batches that do not need stage concurrency, such as
+        real-time pushes.
+
+        Args:
+            batch: Post dictionaries from the parser
+
+        Returns:
+            Dictionary with inserted, updated and skipped counts
+        """
+        started = time.monotonic()
+        analyzed = self.analyzer.analyze_posts_batch(batch, channel_id=self.channel_id)
+        self._record("analyze", len(batch), started)
+
+        started = time.monotonic()
+        processed = self._normalize_batch(analyzed)
+        self._record("normalize", len(batch), started)
+        self.stats["normalize"]["rejected"] += len(analyzed) - len(processed)
+
+        started = time.monotonic()
+        counts = self._write_batch(batch, processed, _terms(analyzed))
+        self._record("write", len(processed), started)
+        return counts
+
+    async def _write(self, writer: ThreadPoolExecutor, totals: Dict[str, int]):
+        """Commit batches in order."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queues["write"].get()
+            if item is _DONE:
+                return
+
+            batch, posts, terms = item
+            started = time.monotonic()
+            counts = await loop.run_in_executor(writer, self._write_batch, batch, posts, terms)
+            self._record("write", len(posts), started)
+            for key, value in counts.items():
+                totals[key] += value
+
+    async def run(self, batches: AsyncIterator[List[Dict[str, Any]]]) -> Dict[str, int]:
+        """
+        Ingest all batches.
+
+        If fetching fails, batches fetched before the failure are still
+        written before the error is raised. A failing later stage stops
+        the whole pipeline.
+
+        Args:
+            batches: Async iterator of post batches (ChannelParserAgent.iter_post_batches)
+
+        Returns:
+            Dictionary with inserted, updated and skipped counts for the whole run
+        """
+        self._queues = {stage: asyncio.Queue(maxsize=self.queue_size) for stage in STAGES[1:]}
+        totals = {"inserted": 0, "updated": 0, "skipped": 0}
+        fetch_error = None
+
+        async def fetch():
+            nonlocal fetch_error
+            try:
+                await self._fetch(batches)
+            except Exception as e:
+                fetch_error = e
+            await self._put("analyze", _DONE)
+
+        # One writer thread: the session is never used by two threads at once
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-writer") as writer:
+            tasks = [
+                asyncio.ensure_future(fetch()),
+                asyncio.ensure_future(self._analyze()),
+                asyncio.ensure_future(self._normalize()),
+                asyncio.ensure_future(self._write(writer, totals)),
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            finally:
+                _accumulate(self.stats)
+                logger.info(f"Ingestion pipeline for channel {self.channel_id}: {self.get_stats()}")
+
+        if fetch_error is not None:
+            raise fetch_error
+        return totals
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-stage throughput and queue depths of this run."""
+        return _with_throughput(self.stats, self._queues)
+
+
+def _terms(analyzed: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Keyword candidates by post ID; not stored with the post, kept for the frequency tables."""
+    return {str(post_data["post_id"]): post_data.get("terms") or {} for post_data in analyzed}
+
+
+def _with_throughput(
+    stats: Dict[str, Dict[str, float]], queues: Optional[Dict[str, asyncio.Queue]] = None
+) -> Dict[str, Any]:
+    """Add posts per second and current queue depth to stage counters."""
+    queues = queues or {}
+    result = {}
+    for stage, counters in stats.items():
+        seconds = counters["seconds"]
+        result[stage] = {
+            **counters,
+            "seconds": round(seconds, 4),
+            "posts_per_second": round(counters["posts"] / seconds, 1) if seconds else None,
+            "queue_depth": queues[stage].qsize() if stage in queues else 0,
+        }
+    return result
+
+
+def _accumulate(stats: Dict[str, Dict[str, float]]):
+    """Add stage counters of a finished run to the process totals."""
+    for stage, counters in stats.items():
+        total = _totals.setdefault(stage, {})
+        for key, value in counters.items():
+            if key == "max_queue_depth":
+                total[key] = max(total.get(key, 0), value)
+            else:
+                total[key] = total.get(key, 0) + value
+
+
+def get_pipeline_stats() -> Dict[str, Any]:
+    """
+    Get per-stage throughput and maximum queue depths of all runs in this process.
+
+    Returns:
+        Dictionary of stage name to counters
+    """
+    return _with_throughput(_totals)
@@ -0,0 +1,477 @@
+"""
+Rate limiting for Telegram API requests.
+
+A token bucket throttles every API request (one history page, one entity
+lookup, ...) instead of every parsed message. The bucket adapts to
+FloodWaitError: the reported wait blocks the whole bucket and the refill
+rate is halved, then recovers gradually on successful requests.
+
+The bucket state lives in Redis so every Celery worker shares one budget.
+The in-memory bucket is used for tests and as a fallback when Redis is down.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Refill rate is multiplied by this factor on every FloodWaitError
+FLOOD_BACKOFF_FACTOR = 0.5
+# Share of the base rate restored after every successful request
+RECOVERY_FACTOR = 0.05
+# Lower bound for the adaptive rate, as a share of the base rate
+MIN_RATE_FACTOR = 0.05
+
+
+class RateLimitDeferred(Exception):
+    """Raised instead of waiting when the budget stays exhausted longer than allowed."""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"Telegram API budget exhausted for {seconds:.0f} seconds")
+        self.seconds = seconds
+
+
+class InMemoryTokenBucket:
+    """Token bucket kept in process memory."""
+
+    def __init__(self, capacity: int, rate: float, clock=time.monotonic):
+        """
+        Initialize bucket.
+
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            rate: Refill rate in tokens per second
+            clock: Time source, injectable for tests
+        """
+        self.capacity = float(capacity)
+        self.base_rate = float(rate)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._rate = float(rate)
+        self._updated_at = clock()
+        self._blocked_until = 0.0
+        self._stats = {
+            "requests": 0.0,
+            "waits": 0.0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "flood_waits": 0.0,
+            "flood_wait_seconds": 0.0,
+            "messages": 0.0,
+            "fetch_seconds": 0.0,
+            "deferrals": 0.0,
+        }
+
+    def _refill(self, now: float):
+        """Add tokens accumulated since the last update."""
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self._rate)
+        self._updated_at = now
+
+    async def try_acquire(self, tokens: int = 1) -> float:
+        """
+        Try to take tokens from the bucket.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            0 if tokens were taken, otherwise seconds to wait before retrying
+        """
+        with self._lock:
+            now = self._clock()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self._rate = min(self.base_rate, self._rate + self.base_rate * RECOVERY_FACTOR)
+                return 0.0
+
+            return (tokens - self._tokens) / self._rate
+
+    async def penalize(self, seconds: float):
+        """
+        Block the bucket after FloodWaitError and slow down the refill rate.
+
+        Args:
+            seconds: Wait time reported by Telegram
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens = 0.0
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._rate = max(self.base_rate * MIN_RATE_FACTOR, self._rate * FLOOD_BACKOFF_FACTOR)
+
+    async def record(self, field: str, value: float = 1.0):
+        """Increment a statistics counter."""
+        with self._lock:
+            if field == "max_wait_seconds":
+                self._stats[field] = max(self._stats[field], value)
+            else:
+                self._stats[field] += value
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """
+        Get current bucket state and statistics.
+
+        Returns:
+            Dictionary with budget and wait-time statistics
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return {
+                "backend": "memory",
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 3),
+                "rate_per_second": round(self._rate, 6),
+                "base_rate_per_second": round(self.base_rate, 6),
+                "blocked_for_seconds": round(max(0.0, self._blocked_until - now), 3),
+                **self._stats,
+            }
+
+
+# KEYS[1] - bucket key; ARGV - capacity, base rate, requested tokens, recovery step
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local base_rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local recovery = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at', 'blocked_until', 'rate')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+local blocked_until = tonumber(state[3]) or 0
+local rate = tonumber(state[4]) or base_rate
+local wait = 0
+if now < blocked_until then
+    wait = blocked_until - now
+else
+    tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+    updated_at = now
+    if tokens >= requested then
+        tokens = tokens - requested
+        rate = math.min(base_rate, rate + recovery)
+    else
+        wait = (requested - tokens) / rate
+    end
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', updated_at,
+    'blocked_until', blocked_until, 'rate', rate)
+redis.call('EXPIRE', KEYS[1], 86400)
+return tostring(wait)
+"""
+
+# KEYS[1] - bucket key; ARGV - capacity, base rate, flood wait seconds, backoff, min rate
+_PENALIZE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local base_rate = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'blocked_until', 'rate')
+local blocked_until = tonumber(state[1]) or 0
+local rate = tonumber(state[2]) or base_rate
+blocked_until = math.max(blocked_until, now + tonumber(ARGV[3]))
+rate = math.max(tonumber(ARGV[5]), rate * tonumber(ARGV[4]))
+redis.call('HSET', KEYS[1], 'tokens', 0, 'updated_at', now,
+    'blocked_until', blocked_until, 'rate', rate)
+redis.call('EXPIRE', KEYS[1], 86400)
+return tostring(now)
+"""
+
+# KEYS[1] - bucket key; ARGV - capacity, base rate
+_SNAPSHOT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at', 'blocked_until', 'rate')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+local blocked_until = tonumber(state[3]) or 0
+local rate = tonumber(state[4]) or tonumber(ARGV[2])
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+return {tostring(tokens), tostring(rate), tostring(math.max(0, blocked_until - now))}
+"""
+
+
+class RedisTokenBucket:
+    """Token bucket stored in Redis and shared by all workers."""
+
+    def __init__(
+        self,
+        capacity: int,
+        rate: float,
+        redis_url: str = None,
+        key: str = "tgcursor2:telegram_rate_limit"
+    ):
+        """
+        Initialize bucket.
+
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            rate: Refill rate in tokens per second
+            redis_url: Redis connection URL
+            key: Redis key holding the bucket state
+        """
+        self.capacity = float(capacity)
+        self.base_rate = float(rate)
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.key = key
+        self.stats_key = f"{key}:stats"
+        self.fallback = InMemoryTokenBucket(capacity, rate)
+        self._client = None
+        self._client_loop = None
+
+    def _get_client(self):
+        """Get Redis client bound to the running event loop."""
+        import redis.asyncio as aioredis
+
+        # Celery tasks run asyncio.run() per task, so each loop needs its own client
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = aioredis.from_url(self.redis_url)
+            self._client_loop = loop
+        return self._client
+
+    async def _eval(self, script: str, *args):
+        """Run Lua script against the bucket key."""
+        client = self._get_client()
+        return await client.eval(script, 1, self.key, self.capacity, self.base_rate, *args)
+
+    async def try_acquire(self, tokens: int = 1) -> float:
+        """
+        Try to take tokens from the shared bucket.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            0 if tokens were taken, otherwise seconds to wait before retrying
+        """
+        from redis.exceptions import RedisError
+
+        try:
+            wait = await self._eval(_ACQUIRE_SCRIPT, tokens, self.base_rate * RECOVERY_FACTOR)
+            return float(wait)
+        except RedisError as e:
+            logger.warning(f"Redis rate limiter unavailable, using local bucket: {e}")
+            return await self.fallback.try_acquire(tokens)
+
+    async def penalize(self, seconds: float):
+        """
+        Block the shared bucket after FloodWaitError and slow down the refill rate.
+
+        Args:
+            seconds: Wait time reported by Telegram
+        """
+        from redis.exceptions import RedisError
+
+        await self.fallback.penalize(seconds)
+        try:
+            await self._eval(
+                _PENALIZE_SCRIPT,
+                seconds,
+                FLOOD_BACKOFF_FACTOR,
+                self.base_rate * MIN_RATE_FACTOR
+            )
+        except RedisError as e:
+            logger.warning(f"Could not store flood wait in Redis: {e}")
+
+    async def record(self, field: str, value: float = 1.0):
+        """Increment a shared statistics counter."""
+        from redis.exceptions import RedisError
+
+        await self.fallback.record(field, value)
+        try:
+            client = self._get_client()
+            if field == "max_wait_seconds":
+                current = await client.hget(self.stats_key, field)
+                if current is None or float(current) < value:
+                    await client.hset(self.stats_key, field, value)
+            else:
+                await client.hincrbyfloat(self.stats_key, field, value)
+        except RedisError as e:
+            logger.debug(f"Could not record rate limiter stats: {e}")
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """
+        Get current shared bucket state and statistics.
+
+        Returns:
+            Dictionary with budget and wait-time statistics
+        """
+        from redis.exceptions import RedisError
+
+        try:
+            tokens, rate, blocked_for = await self._eval(_SNAPSHOT_SCRIPT)
+            raw_stats = await self._get_client().hgetall(self.stats_key)
+        except RedisError as e:
+            logger.warning(f"Redis rate limiter unavailable, reporting local bucket: {e}")
+            return await self.fallback.snapshot()
+
+        stats = {key.decode(): float(value) for key, value in raw_stats.items()}
+        return {
+            "backend": "redis",
+            "capacity": self.capacity,
+            "tokens": round(float(tokens), 3),
+            "rate_per_second": round(float(rate), 6),
+            "base_rate_per_second": round(self.base_rate, 6),
+            "blocked_for_seconds": round(float(blocked_for), 3),
+            "requests": stats.get("requests", 0.0),
+            "waits": stats.get("waits", 0.0),
+            "wait_seconds": stats.get("wait_seconds", 0.0),
+            "max_wait_seconds": stats.get("max_wait_seconds", 0.0),
+            "flood_waits": stats.get("flood_waits", 0.0),
+            "flood_wait_seconds": stats.get("flood_wait_seconds", 0.0),
+            "messages": stats.get("messages", 0.0),
+            "fetch_seconds": stats.get("fetch_seconds", 0.0),
+            "deferrals": stats.get("deferrals", 0.0),
+        }
+
+
+class TelegramRateLimiter:
+    """Throttles Telegram API requests through a token bucket."""
+
+    def __init__(self, bucket=None, sleep=asyncio.sleep):
+        """
+        Initialize rate limiter.
+
+        Args:
+            bucket: Token bucket (in-memory bucket from settings if not given)
+            sleep: Async sleep function, injectable for tests
+        """
+        self.bucket = bucket or InMemoryTokenBucket(
+            settings.TELEGRAM_REQUEST_BURST,
+            settings.TELEGRAM_REQUESTS_PER_MINUTE / 60
+        )
+        self._sleep = sleep
+
+    async def acquire(self, tokens: int = 1, max_wait: Optional[float] = None) -> float:
+        """
+        Wait until the bucket allows an API request.
+
+        Args:
+            tokens: Number of API requests about to be made
+            max_wait: Raise RateLimitDeferred instead of sleeping longer than
+                this at once (wait as long as needed if not given)
+
+        Returns:
+            Total seconds spent waiting
+
+        Raises:
+            RateLimitDeferred: If the bucket is blocked for more than max_wait
+        """
+        waited = 0.0
+        while True:
+            wait = await self.bucket.try_acquire(tokens)
+            if wait <= 0:
+                break
+            if max_wait is not None and wait > max_wait:
+                await self.bucket.record("deferrals")
+                raise RateLimitDeferred(wait)
+            await self._sleep(wait)
+            waited += wait
+
+        await self.bucket.record("requests", tokens)
+        if waited > 0:
+            await self.bucket.record("waits")
+            await self.bucket.record("wait_seconds", waited)
+            await self.bucket.record("max_wait_seconds", waited)
+
+        return waited
+
+    async def report_flood_wait(self, seconds: float):
+        """
+        Adapt to FloodWaitError reported by Telegram.
+
+        Args:
+            seconds: Wait time from FloodWaitError.seconds
+        """
+        logger.warning(f"Telegram flood wait for {seconds} seconds, throttling all workers")
+        await self.bucket.penalize(seconds)
+        await self.bucket.record("flood_waits")
+        await self.bucket.record("flood_wait_seconds", seconds)
+
+    async def record_fetched(self, messages: int, seconds: float):
+        """
+        Record fetched history for throughput statistics.
+
+        Args:
+            messages: Number of messages received
+            seconds: Time spent fetching them, including waits
+        """
+        await self.bucket.record("messages", messages)
+        await self.bucket.record("fetch_seconds", seconds)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Get current budget, wait-time and throughput statistics.
+
+        Returns:
+            Dictionary with bucket state and counters
+        """
+        stats = await self.bucket.snapshot()
+        fetch_seconds = stats.get("fetch_seconds", 0.0)
+        stats["messages_per_second"] = (
+            round(stats.get("messages", 0.0) / fetch_seconds, 3) if fetch_seconds else 0.0
+        )
+        return stats
+
+
+def _build_rate_limiter(requests_per_minute: int, burst: int, key: str) -> TelegramRateLimiter:
+    """Create rate limiter on the configured backend."""
+    rate = requests_per_minute / 60
+    if settings.TELEGRAM_RATE_LIMIT_BACKEND == "redis":
+        bucket = RedisTokenBucket(burst, rate, key=key)
+    else:
+        bucket = InMemoryTokenBucket(burst, rate)
+    return TelegramRateLimiter(bucket)
+
+
+_rate_limiter: Optional[TelegramRateLimiter] = None
+_takeout_rate_limiter: Optional[TelegramRateLimiter] = None
+
+
+def get_rate_limiter() -> TelegramRateLimiter:
+    """
+    Get process-wide Telegram rate limiter configured from settings.
+
+    Returns:
+        Shared TelegramRateLimiter instance
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = _build_rate_limiter(
+            settings.TELEGRAM_REQUESTS_PER_MINUTE,
+            settings.TELEGRAM_REQUEST_BURST,
+            "tgcursor2:telegram_rate_limit"
+        )
+    return _rate_limiter
+
+
+def get_takeout_rate_limiter() -> TelegramRateLimiter:
+    """
+    Get rate limiter for takeout sessions.
+
+    Takeout requests have their own, more lenient flood limits, so they use
+    a separate budget and their statistics are kept apart from polling.
+
+    Returns:
+        Shared TelegramRateLimiter instance for takeout requests
+    """
+    global _takeout_rate_limiter
+    if _takeout_rate_limiter is None:
+        _takeout_rate_limiter = _build_rate_limiter(
+            settings.TELEGRAM_TAKEOUT_REQUESTS_PER_MINUTE,
+            settings.TELEGRAM_TAKEOUT_REQUEST_BURST,
+            "tgcursor2:telegram_takeout_rate_limit"
+        )
+    return _takeout_rate_limiter
@@ -0,0 +1,489 @@
+"""
+Real-time push ingestion of channel posts.
+
+A long-running daemon listens to NewMessage and MessageEdited updates for
+all active channels and writes them in micro-batches through the same
+analyze -> normalize -> write steps as IngestionPipeline, so new posts
+appear within seconds without polling and are stored like polled ones.
+Telegram only pushes updates of channels the account is subscribed to.
+
+Polling remains as catch-up: on start and after every reconnect, a batch
+parse fetches whatever was posted while updates were not received. The
+catch-up starts from the message ID checkpoint, so pushed posts do not
+advance it from the moment a disconnect is noticed until the catch-up
+parse has finished; otherwise the missed range would be skipped.
+
+Run with: python -m app.core.realtime
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from telethon import TelegramClient, events
+
+from app.agents.channel_parser import ChannelParserAgent
+from app.agents.content_analyzer import ContentAnalyzerAgent
+from app.agents.data_processor import DataProcessorAgent
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.pipeline import IngestionPipeline
+from app.models.channel import Channel
+
+logger = logging.getLogger(__name__)
+
+# Columns refreshed when a pushed message is already stored (edits change
+# the text and what is derived from it)
+REALTIME_UPDATE_FIELDS = [
+    "text",
+    "content_type",
+    "views",
+    "likes",
+    "hashtags",
+    "mentions",
+    "links",
+    "category",
+    "keywords",
+    "reading_time",
+    "analyzer_version",
+]
+
+
+def queue_catch_up(channel_ids: List[int]):
+    """
+    Queue a batch parse fetching posts missed while updates were not received.
+
+    Returns:
+        Celery AsyncResult of the queued parse
+    """
+    from app.core.tasks import parse_channels_batch_task
+
+    return parse_channels_batch_task.delay(channel_ids, "new_only")
+
+
+def catch_up_result(task_id: str):
+    """
+    Get handle of a parse task a catch-up waits for, e.g. a batch queued again after a deferral.
+
+    Returns:
+        Celery AsyncResult of the task
+    """
+    from app.core.tasks import parse_channels_batch_task
+
+    return parse_channels_batch_task.AsyncResult(task_id)
+
+
+class RealtimeIngestor:
+    """Collects pushed channel messages and writes them in micro-batches."""
+
+    def __init__(
+        self,
+        client: TelegramClient,
+        session_factory: Optional[Callable] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        on_catch_up: Optional[Callable[[List[int]], Any]] = None,
+        parser: Optional[ChannelParserAgent] = None,
+        analyzer: Optional[ContentAnalyzerAgent] = None,
+        follow_task: Optional[Callable[[str], Any]] = None,
+    ):
+        """
+        Initialize ingestor.
+
+        Args:
+            client: Connected and authorized Telegram client receiving updates
+            session_factory: Creates database sessions (SessionLocal if not given)
+            batch_size: Buffered posts that trigger an early flush
+            flush_interval: Seconds between flushes
+            on_catch_up: Called with channel IDs that need a catch-up poll; may return
+                a handle whose ready() tells when the poll has finished and whose
+                result is the parse_channels_batch_task result
+            parser: Parser used for peer lookup and post extraction
+            analyzer: Content analyzer (new instance if not given)
+            follow_task: Gets the handle of a task by ID (catch_up_result if not given)
+        """
+        self.client = client
+        self.parser = parser or ChannelParserAgent(client=client)
+        self.analyzer = analyzer or ContentAnalyzerAgent()
+        self.processor = DataProcessorAgent()
+        self._session_factory = session_factory or SessionLocal
+        self.batch_size = batch_size or settings.REALTIME_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.REALTIME_FLUSH_SECONDS
+        self._on_catch_up = on_catch_up or queue_catch_up
+        self._follow_task = follow_task or catch_up_result
+
+        self._channels: Dict[
+            int, Tuple[int, str]
+        ] = {}  # Telegram channel ID -> (channel ID, username)
+        self._pending: Dict[
+            int, Dict[str, Dict[str, Any]]
+        ] = {}  # channel ID -> post_id -> post data
+        self._flush_now: Optional[asyncio.Event] = None
+        self._running = False
+        self._disconnected = False
+        # Running catch-up polls: (handle, channel IDs, whether to poll again once it is ready)
+        self._catch_ups: List[Tuple[Any, List[int], bool]] = []
+        # channel ID -> number of running catch-up polls covering it
+        self._held: Dict[int, int] = {}
+        self.stats = {
+            "received": 0,
+            "ignored": 0,
+            "written": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "reconnects": 0,
+            "catch_ups": 0,
+            "last_flush_seconds": 0.0,
+        }
+
+    @property
+    def channel_ids(self) -> List[int]:
+        """IDs of channels currently listened to."""
+        return [channel_id for channel_id, _ in self._channels.values()]
+
+    def pending_count(self) -> int:
+        """Number of buffered posts waiting for the next flush."""
+        return sum(len(posts) for posts in self._pending.values())
+
+    async def refresh_channels(self):
+        """Listen to updates of all active channels, replacing previous handlers."""
+        db = self._session_factory()
+        try:
+            rows = [
+                (channel.id, channel.channel_username)
+                for channel in db.query(Channel).filter(Channel.is_active.is_(True))
+            ]
+        finally:
+            db.close()
+
+        channels = {}
+        peers = []
+        for channel_id, username in rows:
+            try:
+                peer = await self.parser.get_input_peer(username)
+            except Exception as e:
+                logger.warning(f"Could not resolve {username} for real-time updates: {e}")
+                continue
+            channels[peer.channel_id] = (channel_id, username)
+            peers.append(peer)
+
+        self.client.remove_event_handler(self._on_message)
+        self._channels = channels
+        if peers:
+            self.client.add_event_handler(self._on_message, events.NewMessage(chats=peers))
+            self.client.add_event_handler(self._on_message, events.MessageEdited(chats=peers))
+
+        logger.info(f"Listening to real-time updates of {len(peers)} channels")
+
+    async def _on_message(self, event):
+        """Buffer new or edited channel message."""
+        message = event.message
+        channel = self._channels.get(getattr(message.peer_id, "channel_id", None))
+        if channel is None:
+            self.stats["ignored"] += 1
+            return
+
+        channel_id, username = channel
+        try:
+            post_data = await self.parser.extract_post_data(message, username)
+        except Exception as e:
+            logger.error(f"Error extracting pushed post {message.id} of {username}: {e}")
+            return
+
+        # A later edit of the same message replaces the buffered copy
+        self._pending.setdefault(channel_id, {})[post_data["post_id"]] = post_data
+        self.stats["received"] += 1
+        if self._flush_now is not None and self.pending_count() >= self.batch_size:
+            self._flush_now.set()
+
+    def _hold(self, handle: Any, channel_ids: List[int], poll_again: bool = False):
+        """Hold checkpoints of channels until a catch-up task is ready (event loop thread only)."""
+        self._catch_ups.append((handle, channel_ids, poll_again))
+        for channel_id in channel_ids:
+            self._held[channel_id] = self._held.get(channel_id, 0) + 1
+
+    def _release(self, channel_ids: List[int]):
+        """Drop one hold of each channel (event loop thread only)."""
+        for channel_id in channel_ids:
+            count = self._held.pop(channel_id, 0) - 1
+            if count > 0:
+                self._held[channel_id] = count
+
+    def _finish_catch_up(self, handle: Any, channel_ids: List[int]):
+        """
+        Lift the hold of channels the finished catch-up poll parsed (event loop thread only).
+
+        Deferred channels stay held until the batch queued again for them
+        has run. Skipped channels were being parsed by another task, which
+        may have started before the disconnect, so they are polled again
+        once that task is ready. Failed channels are released: their
+        missed posts are left to gap filling.
+        """
+        result = handle.result
+        if not isinstance(result, dict):
+            logger.warning(
+                f"Catch-up poll failed, polling {len(channel_ids)} channels again: {result}"
+            )
+            self.catch_up(channel_ids)
+            self._release(channel_ids)
+            return
+
+        statuses = {
+            channel_id: result.get("channels", {}).get(str(channel_id), {})
+            for channel_id in channel_ids
+        }
+        deferred = [
+            channel_id
+            for channel_id, status in statuses.items()
+            if status.get("status") == "deferred"
+        ]
+        if deferred:
+            if result.get("requeued_task_id"):
+                self._hold(self._follow_task(result["requeued_task_id"]), deferred)
+            else:
+                self.catch_up(deferred)
+
+        running: Dict[str, List[int]] = {}
+        for channel_id, status in statuses.items():
+            if status.get("status") == "skipped":
+                running.setdefault(status.get("task_id"), []).append(channel_id)
+        for task_id, skipped in running.items():
+            if task_id:
+                self._hold(self._follow_task(task_id), skipped, poll_again=True)
+            else:
+                self.catch_up(skipped)
+
+        failed = [
+            channel_id
+            for channel_id, status in statuses.items()
+            if status.get("status") not in ("ok", "deferred", "skipped")
+        ]
+        if failed:
+            logger.warning(
+                f"Catch-up poll failed for channels {failed}, "
+                "their missed posts are left to gap filling"
+            )
+        self._release(channel_ids)
+
+    def _update_catch_ups(self):
+        """Handle catch-up polls that have finished (event loop thread only)."""
+        catch_ups, self._catch_ups = self._catch_ups, []
+        for handle, channel_ids, poll_again in catch_ups:
+            if not handle.ready():
+                self._catch_ups.append((handle, channel_ids, poll_again))
+            elif poll_again:
+                self.catch_up(channel_ids)
+                self._release(channel_ids)
+            else:
+                self._finish_catch_up(handle, channel_ids)
+
+    def held_channels(self, channel_ids: Iterable[int]) -> Set[int]:
+        """
+        Get channels whose checkpoints pushed posts must not advance (event loop thread only).
+
+        Every channel is held while disconnected, and a channel stays held
+        until a catch-up poll has parsed it.
+
+        Args:
+            channel_ids: Channel IDs in database
+
+        Returns:
+            Held channel IDs among the given ones
+        """
+        self._update_catch_ups()
+        if self._disconnected:
+            return set(channel_ids)
+        return {channel_id for channel_id in channel_ids if channel_id in self._held}
+
+    def _take_pending(self) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        """Swap the buffer for an empty one (event loop thread only)."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _restore_pending(self, failed: Dict[int, Dict[str, Dict[str, Any]]]):
+        """
+        Buffer posts of failed writes again unless a newer copy arrived (event loop thread only).
+        """
+        for channel_id, posts in failed.items():
+            buffered = self._pending.setdefault(channel_id, {})
+            for post_id, post_data in posts.items():
+                buffered.setdefault(post_id, post_data)
+
+    def _write(
+        self, pending: Dict[int, Dict[str, Dict[str, Any]]], held: Set[int]
+    ) -> Tuple[int, Dict[int, Dict[str, Dict[str, Any]]]]:
+        """
+        Write posts, one transaction per channel (blocking).
+
+        Args:
+            pending: Posts to write by channel ID
+            held: Channels whose checkpoints must not advance
+
+        Returns:
+            Number of posts written and posts of channels whose write failed
+        """
+        if not pending:
+            return 0, {}
+
+        started = time.monotonic()
+        written = 0
+        failed = {}
+        db = self._session_factory()
+        try:
+            for channel_id, posts in pending.items():
+                batch = list(posts.values())
+                try:
+                    IngestionPipeline(
+                        db,
+                        channel_id,
+                        analyzer=self.analyzer,
+                        processor=self.processor,
+                        update_fields=REALTIME_UPDATE_FIELDS,
+                        advance_checkpoint=channel_id not in held,
+                    ).ingest_batch(batch)
+                except Exception as e:
+                    self.stats["flush_errors"] += 1
+                    logger.error(f"Error writing pushed posts of channel {channel_id}: {e}")
+                    failed[channel_id] = posts
+                    continue
+                written += len(batch)
+        finally:
+            db.close()
+
+        self.stats["written"] += written
+        self.stats["flushes"] += 1
+        self.stats["last_flush_seconds"] = round(time.monotonic() - started, 4)
+        return written, failed
+
+    def flush(self) -> int:
+        """
+        Write buffered posts in the calling thread.
+
+        Posts of a channel whose write failed are kept for the next flush
+        unless a newer copy arrived meanwhile.
+
+        Returns:
+            Number of posts written
+        """
+        pending = self._take_pending()
+        written, failed = self._write(pending, self.held_channels(pending))
+        self._restore_pending(failed)
+        return written
+
+    async def flush_async(self) -> int:
+        """
+        Write buffered posts in a worker thread, keeping the event loop free for updates.
+
+        Returns:
+            Number of posts written
+        """
+        loop = asyncio.get_running_loop()
+        pending = self._take_pending()
+        held = self.held_channels(pending)
+        written, failed = await loop.run_in_executor(None, self._write, pending, held)
+        self._restore_pending(failed)
+        return written
+
+    def catch_up(self, channel_ids: Optional[List[int]] = None):
+        """
+        Poll channels for posts missed without updates, holding their checkpoints until parsed.
+
+        Args:
+            channel_ids: Channel IDs in database (all listened channels if not given)
+        """
+        channel_ids = self.channel_ids if channel_ids is None else channel_ids
+        if not channel_ids:
+            return
+        self.stats["catch_ups"] += 1
+        handle = self._on_catch_up(channel_ids)
+        if hasattr(handle, "ready"):
+            self._hold(handle, channel_ids)
+
+    async def _flush_loop(self):
+        """Flush every flush_interval seconds, or earlier when the buffer is full."""
+        while self._running:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush_async()
+
+    async def _watch_connection(self):
+        """Hold checkpoints while disconnected and queue a catch-up poll on reconnect."""
+        was_connected = self.client.is_connected()
+        while self._running:
+            await asyncio.sleep(settings.REALTIME_CONNECTION_CHECK_SECONDS)
+            self.check_connection(was_connected)
+            was_connected = self.client.is_connected()
+
+    def check_connection(self, was_connected: bool):
+        """
+        React to a change of the client connection.
+
+        Args:
+            was_connected: Connection state at the previous check
+        """
+        connected = self.client.is_connected()
+        if was_connected and not connected:
+            logger.warning("Telegram connection lost, holding checkpoints until caught up")
+            self._disconnected = True
+        elif connected and not was_connected:
+            self.stats["reconnects"] += 1
+            logger.info("Telegram connection restored, catching up by polling")
+            # Queued before the hold is lifted, so no flush in between can advance a checkpoint
+            self.catch_up()
+            self._disconnected = False
+
+    async def _refresh_loop(self):
+        """Pick up added and deactivated channels."""
+        while self._running:
+            await asyncio.sleep(settings.REALTIME_REFRESH_SECONDS)
+            try:
+                await self.refresh_channels()
+            except Exception as e:
+                logger.error(f"Error refreshing real-time channels: {e}")
+            logger.info(f"Real-time ingestion stats: {self.get_stats()}")
+
+    async def run(self):
+        """Listen and write posts until cancelled."""
+        await self.refresh_channels()
+        self.catch_up()
+
+        self._flush_now = asyncio.Event()
+        self._running = True
+        try:
+            await asyncio.gather(self._flush_loop(), self._watch_connection(), self._refresh_loop())
+        finally:
+            self._running = False
+            self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get received/written counters, buffer size and listened channel count."""
+        return {**self.stats, "pending": self.pending_count(), "channels": len(self._channels)}
+
+
+def main():
+    """Run real-time ingestion daemon."""
+    from app.core.telegram_client import get_client_factory
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        client = get_client_factory()(0)
+        await client.connect()
+        if not await client.is_user_authorized():
+            raise RuntimeError(
+                "Telegram session is not authorized. Log in once with "
+                f"{settings.TELEGRAM_SESSION_NAME} or set TELEGRAM_SESSION_STRING"
+            )
+        try:
+            await RealtimeIngestor(client).run()
+        finally:
+            await client.disconnect()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Re-analysis of stored posts after the analyzer changed.
+
+Every post records the analyzer version (ContentAnalyzerAgent.cache_version(),
+which covers the code, the taxonomy and the spaCy models) that produced
+its hashtags, mentions, links, category, keywords and reading time. Posts
+with another version are stale.
+
+Stale posts are paged in ID order with keyset queries, each its own
+short read, analyzed in chunks (optionally in a process pool) and
+written back with one bulk UPDATE per batch. Written posts carry the current version, so
+an interrupted run simply continues with the posts still stale. A run
+pauses between batches and stops after REANALYSIS_MAX_SECONDS, returning
+the last post ID to continue after, so it never holds a long transaction
+or starves the API of database time.
+"""
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.agents.content_analyzer import ContentAnalyzerAgent
+from app.core.config import settings
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+# Post fields derived from the text, rewritten by re-analysis
+DERIVED_FIELDS = ("hashtags", "mentions", "links", "category", "keywords", "reading_time")
+
+_process_analyzer: Optional[ContentAnalyzerAgent] = None
+
+
+def _analyze_texts(texts: List[str]) -> List[Dict[str, Any]]:
+    """Analyze texts in a pool process with its own analyzer."""
+    global _process_analyzer
+    if _process_analyzer is None:
+        _process_analyzer = ContentAnalyzerAgent()
+    return _process_analyzer.analyze_texts(texts)
+
+
+def stale_posts_filter(version: str):
+    """
+    Build filter matching posts analyzed by another analyzer version.
+
+    Args:
+        version: Current analyzer version
+
+    Returns:
+        SQLAlchemy filter expression
+    """
+    return or_(Post.analyzer_version.is_(None), Post.analyzer_version != version)
+
+
+class PostReanalyzer:
+    """Brings derived fields of stored posts up to the current analyzer version."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        analyzer: Optional[ContentAnalyzerAgent] = None,
+        batch_size: Optional[int] = None,
+        processes: Optional[int] = None,
+        pause_seconds: Optional[float] = None,
+        max_seconds: Optional[float] = None,
+        clock=time.monotonic,
+        sleep=time.sleep
+    ):
+        """
+        Initialize re-analyzer.
+
+        Args:
+            session_factory: Creates database sessions (SessionLocal if not given)
+            analyzer: Content analyzer (new instance if not given)
+            batch_size: Posts per analyzed and committed batch
+                (REANALYSIS_BATCH_SIZE if not given)
+            processes: Analysis processes, 1 analyzes in this process
+                (REANALYSIS_PROCESSES if not given)
+            pause_seconds: Pause between batches (REANALYSIS_PAUSE_SECONDS if not given)
+            max_seconds: Run time after which a run stops (REANALYSIS_MAX_SECONDS if not given)
+            clock: Time source, injectable for tests
+            sleep: Sleep function, injectable for tests
+        """
+        if session_factory is None:
+            from app.core.database import SessionLocal
+
+            session_factory = SessionLocal
+        self._session_factory = session_factory
+        self.analyzer = analyzer or ContentAnalyzerAgent()
+        self.batch_size = batch_size or settings.REANALYSIS_BATCH_SIZE
+        self.processes = processes or settings.REANALYSIS_PROCESSES
+        if pause_seconds is None:
+            pause_seconds = settings.REANALYSIS_PAUSE_SECONDS
+        if max_seconds is None:
+            max_seconds = settings.REANALYSIS_MAX_SECONDS
+        self.pause_seconds = pause_seconds
+        self.max_seconds = max_seconds
+        self._clock = clock
+        self._sleep = sleep
+
+    def _next_batch(self, db: Session, version: str, after_id: int) -> List[Any]:
+        """Read the next stale posts after a post ID, ending the read transaction right away."""
+        try:
+            return db.query(
+                Post.id, Post.channel_id, Post.text, Post.content_type, Post.media_urls
+            ).filter(
+                stale_posts_filter(version),
+                Post.id > after_id
+            ).order_by(Post.id).limit(self.batch_size).all()
+        finally:
+            db.commit()
+
+    def _analyze_texts(
+        self,
+        texts: List[str],
+        pool: Optional[ProcessPoolExecutor]
+    ) -> List[Dict[str, Any]]:
+        """Analyze texts here or split over the pool processes."""
+        if pool is None:
+            return self.analyzer.analyze_texts(texts)
+
+        chunk_size = -(-len(texts) // self.processes)
+        chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        return [analysis for analyses in pool.map(_analyze_texts, chunks) for analysis in analyses]
+
+    def _analyze_batch(
+        self,
+        rows: List[Any],
+        pool: Optional[ProcessPoolExecutor]
+    ) -> List[Dict[str, Any]]:
+        """
+        Re-analyze one batch of posts.
+
+        Args:
+            rows: Stale post rows
+            pool: Process pool, or None to analyze in this process
+
+        Returns:
+            Update parameters (post ID, derived fields and version) for every row
+        """
+        text_analyses = self._analyze_texts([row.text or "" for row in rows], pool)
+
+        # Keywords are ranked against the frequencies of each post's channel
+        indexes_by_channel = defaultdict(list)
+        for index, row in enumerate(rows):
+            indexes_by_channel[row.channel_id].append(index)
+
+        updates: List[Dict[str, Any]] = [{} for _ in rows]
+        for channel_id, indexes in indexes_by_channel.items():
+            posts = [
+                {
+                    "text": rows[i].text,
+                    "content_type": rows[i].content_type,
+                    "media_urls": rows[i].media_urls,
+                }
+                for i in indexes
+            ]
+            enhanced = self.analyzer.enhance_posts(
+                posts,
+                [text_analyses[i] for i in indexes],
+                channel_id=channel_id
+            )
+            for i, post_data in zip(indexes, enhanced):
+                updates[i] = {
+                    "id": rows[i].id,
+                    **{field: post_data[field] for field in DERIVED_FIELDS},
+                    "analyzer_version": post_data["analyzer_version"],
+                }
+        return updates
+
+    def run(self, after_id: int = 0) -> Dict[str, Any]:
+        """
+        Re-analyze stale posts until none are left or the run time is used up.
+
+        Args:
+            after_id: Only posts with a greater ID are processed (resume point of a previous run)
+
+        Returns:
+            Dictionary with version, processed count, last processed post ID and
+            whether all stale posts were processed
+        """
+        version = self.analyzer.cache_version()
+        started = self._clock()
+        result = {"version": version, "processed": 0, "last_id": after_id, "done": True}
+
+        db = self._session_factory()
+        pool = ProcessPoolExecutor(max_workers=self.processes) if self.processes > 1 else None
+        try:
+            while True:
+                rows = self._next_batch(db, version, result["last_id"])
+                if not rows:
+                    break
+
+                db.execute(update(Post), self._analyze_batch(rows, pool))
+                db.commit()
+                result["processed"] += len(rows)
+                result["last_id"] = rows[-1].id
+
+                if len(rows) < self.batch_size:
+                    break
+                if self._clock() - started >= self.max_seconds:
+                    result["done"] = False
+                    break
+                self._sleep(self.pause_seconds)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            db.close()
+
+        logger.info(
+            f"Re-analyzed {result['processed']} posts up to post {result['last_id']} "
+            f"for analyzer version {version} (done: {result['done']})"
+        )
+        return result
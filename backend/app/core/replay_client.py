@@ -0,0 +1,449 @@
+"""
+Offline Telegram client replaying recorded or synthetic channel histories.
+
+ReplayTelegramClient implements the subset of the Telethon client API used
+by ChannelParserAgent, so parsing, ingestion and benchmarks run without a
+Telegram account. It serves history in pages with configurable latency and
+injects FloodWaitError the way Telegram does.
+
+Recorded channels are JSONL files with one message per line:
+    {"id": 42, "date": "2024-01-01T12:00:00", "text": "...", "views": 10, "reactions": 3}
+"""
+import asyncio
+import copy
+import json
+import math
+import time
+import zlib
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from telethon.errors import ChannelInvalidError, FloodWaitError
+from telethon.tl.types import (
+    Channel, ChatPhotoEmpty, InputPeerChannel, Message, MessageReactions, PeerChannel,
+    ReactionCount, ReactionEmoji
+)
+
+from app.core.config import settings
+
+DEFAULT_PAGE_SIZE = 100
+SYNTHETIC_START_DATE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _channel_id(username: str) -> int:
+    """Deterministic channel ID of a replayed channel."""
+    return zlib.crc32(username.lower().encode()) % 10 ** 9 + 1
+
+
+def _access_hash(channel_id: int) -> int:
+    """Deterministic access hash of a replayed channel."""
+    return channel_id * 7919 + 17
+
+
+def _make_message(
+    channel_id: int,
+    message_id: int,
+    date: datetime,
+    text: str,
+    views: int,
+    reactions: int = 0
+) -> Message:
+    """Build Telethon message object as received from GetHistory."""
+    return Message(
+        id=message_id,
+        peer_id=PeerChannel(channel_id),
+        date=date,
+        message=text,
+        views=views,
+        post=True,
+        reactions=MessageReactions(
+            results=[ReactionCount(reaction=ReactionEmoji(emoticon="👍"), count=reactions)]
+        ) if reactions else None
+    )
+
+
+class ReplayChannel(ABC):
+    """Message history of one replayed channel."""
+
+    def __init__(self, username: str, channel_id: int, title: Optional[str] = None):
+        self.username = username.lower()
+        self.channel_id = channel_id
+        self.title = title or username
+
+    @property
+    @abstractmethod
+    def latest_id(self) -> int:
+        """Newest message ID."""
+
+    @abstractmethod
+    def message_ids(self, min_id: int = 0, max_id: int = 0, reverse: bool = False) -> Iterator[int]:
+        """Existing message IDs strictly between min_id and max_id (0 = unbounded)."""
+
+    @abstractmethod
+    def get_message(self, message_id: int) -> Message:
+        """Build message with given existing ID."""
+
+    def entity(self) -> Channel:
+        """Channel entity as returned by get_entity()."""
+        return Channel(
+            id=self.channel_id,
+            title=self.title,
+            photo=ChatPhotoEmpty(),
+            date=SYNTHETIC_START_DATE,
+            access_hash=_access_hash(self.channel_id),
+            username=self.username,
+            broadcast=True
+        )
+
+
+class SyntheticChannel(ReplayChannel):
+    """
+    Generated channel history of any size.
+
+    Messages are built on demand from their ID, so millions of messages
+    cost no memory. Every gap_every-th ID is missing, like deleted posts.
+    """
+
+    def __init__(
+        self,
+        username: str,
+        message_count: int,
+        channel_id: Optional[int] = None,
+        gap_every: int = 0,
+        interval: timedelta = timedelta(minutes=10)
+    ):
+        super().__init__(username, channel_id or _channel_id(username))
+        self.message_count = message_count
+        self.gap_every = gap_every
+        self.interval = interval
+
+    @property
+    def latest_id(self) -> int:
+        return self.message_count
+
+    def _exists(self, message_id: int) -> bool:
+        """Whether message ID was not deleted."""
+        return not (self.gap_every and message_id % self.gap_every == 0)
+
+    def message_ids(self, min_id: int = 0, max_id: int = 0, reverse: bool = False) -> Iterator[int]:
+        low = min_id + 1
+        high = min(max_id - 1, self.message_count) if max_id else self.message_count
+        ids = range(low, high + 1) if reverse else range(high, low - 1, -1)
+        return (message_id for message_id in ids if self._exists(message_id))
+
+    def get_message(self, message_id: int) -> Message:
+        return _make_message(
+            self.channel_id,
+            message_id,
+            SYNTHETIC_START_DATE + self.interval * message_id,
+            f"Post {message_id} about #topic{message_id % 50} by @author{message_id % 20} "
+            f"https://example.com/posts/{message_id}",
+            views=(message_id * 7919) % 10000,
+            reactions=message_id % 7
+        )
+
+
+class RecordedChannel(ReplayChannel):
+    """Channel history loaded from a JSONL recording."""
+
+    def __init__(self, username: str, records: Iterable[Dict[str, Any]], channel_id: Optional[int] = None):
+        super().__init__(username, channel_id or _channel_id(username))
+        self._records: Dict[int, Tuple[datetime, str, int, int]] = {}
+        for record in records:
+            date = datetime.fromisoformat(record["date"])
+            if date.tzinfo is None:
+                date = date.replace(tzinfo=timezone.utc)
+            self._records[int(record["id"])] = (
+                date,
+                record.get("text") or "",
+                int(record.get("views") or 0),
+                int(record.get("reactions") or 0),
+            )
+        self._ids = sorted(self._records)
+
+    @classmethod
+    def from_jsonl(cls, path: str, username: Optional[str] = None) -> "RecordedChannel":
+        """
+        Load recording from a JSONL file.
+
+        Args:
+            path: File with one message per line
+            username: Channel username (file name without extension if not given)
+
+        Returns:
+            RecordedChannel instance
+        """
+        path = Path(path)
+        with path.open(encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return cls(username or path.stem, records)
+
+    @property
+    def latest_id(self) -> int:
+        return self._ids[-1] if self._ids else 0
+
+    def message_ids(self, min_id: int = 0, max_id: int = 0, reverse: bool = False) -> Iterator[int]:
+        low = bisect_right(self._ids, min_id)
+        high = bisect_left(self._ids, max_id) if max_id else len(self._ids)
+        positions = range(low, high) if reverse else range(high - 1, low - 1, -1)
+        return (self._ids[position] for position in positions)
+
+    def get_message(self, message_id: int) -> Message:
+        date, text, views, reactions = self._records[message_id]
+        return _make_message(self.channel_id, message_id, date, text, views, reactions)
+
+
+def record_messages(messages: Iterable[Message], path: str) -> int:
+    """
+    Write Telethon messages to a JSONL recording.
+
+    Args:
+        messages: Messages, e.g. from TelegramClient.iter_messages()
+        path: Output file
+
+    Returns:
+        Number of recorded messages
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for message in messages:
+            reactions = sum(r.count for r in message.reactions.results) if message.reactions else 0
+            f.write(json.dumps({
+                "id": message.id,
+                "date": message.date.isoformat(),
+                "text": message.raw_text or "",
+                "views": message.views or 0,
+                "reactions": reactions,
+            }, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+class ReplayTelegramClient:
+    """Telegram client stand-in serving replayed channel histories."""
+
+    def __init__(
+        self,
+        channels: Iterable[ReplayChannel],
+        latency: float = 0.0,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        flood_wait_every: int = 0,
+        flood_wait_seconds: int = 1,
+        sleep: Callable = asyncio.sleep,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize client.
+
+        Args:
+            channels: Replayed channels
+            latency: Seconds every request takes
+            page_size: Messages per history request
+            flood_wait_every: Raise FloodWaitError on every N-th request (0 = never)
+            flood_wait_seconds: Wait time reported by injected flood waits
+            sleep: Async sleep function, injectable for tests
+            clock: Time source for flood wait expiry
+        """
+        self.channels = {channel.username: channel for channel in channels}
+        self._by_id = {channel.channel_id: channel for channel in self.channels.values()}
+        self.latency = latency
+        self.page_size = page_size
+        self.flood_wait_every = flood_wait_every
+        self.flood_wait_seconds = flood_wait_seconds
+        self._sleep = sleep
+        self._clock = clock
+        self._connected = False
+        self._takeout = False
+        self._blocked_until = 0.0
+        self._handlers: List[Tuple[Callable, Any]] = []
+        self.stats = {
+            "requests": 0,
+            "takeout_requests": 0,
+            "messages": 0,
+            "flood_waits": 0,
+        }
+
+    async def _request(self):
+        """Account for one API request: latency, flood limits and counters."""
+        self.stats["requests"] += 1
+        if self._takeout:
+            self.stats["takeout_requests"] += 1
+        if self.latency:
+            await self._sleep(self.latency)
+
+        now = self._clock()
+        if now < self._blocked_until:
+            self.stats["flood_waits"] += 1
+            raise FloodWaitError(request=None, capture=math.ceil(self._blocked_until - now))
+        if self.flood_wait_every and self.stats["requests"] % self.flood_wait_every == 0:
+            self.stats["flood_waits"] += 1
+            self._blocked_until = now + self.flood_wait_seconds
+            raise FloodWaitError(request=None, capture=self.flood_wait_seconds)
+
+    def _channel(self, entity) -> ReplayChannel:
+        """Find replayed channel for username, entity or input peer."""
+        if isinstance(entity, str):
+            channel = self.channels.get(entity.lstrip("@").lower())
+            if channel is None:
+                raise ValueError(f'No user has "{entity}" as username')
+            return channel
+
+        channel_id = getattr(entity, "channel_id", None) or getattr(entity, "id", None)
+        channel = self._by_id.get(channel_id)
+        if channel is None:
+            raise ChannelInvalidError(request=None)
+        access_hash = getattr(entity, "access_hash", None)
+        if access_hash is not None and access_hash != _access_hash(channel.channel_id):
+            raise ChannelInvalidError(request=None)
+        return channel
+
+    async def connect(self):
+        """Connect (no network involved)."""
+        self._connected = True
+
+    async def start(self):
+        """Connect like TelegramClient.start() for an authorized session."""
+        self._connected = True
+        return self
+
+    async def disconnect(self):
+        """Disconnect."""
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        """Whether connect() was called."""
+        return self._connected
+
+    async def is_user_authorized(self) -> bool:
+        """Replayed sessions are always authorized."""
+        return True
+
+    async def get_entity(self, entity) -> Channel:
+        """Resolve username or peer to channel entity (one request)."""
+        await self._request()
+        return self._channel(entity).entity()
+
+    async def get_input_entity(self, entity) -> InputPeerChannel:
+        """Get input peer of a channel without a request."""
+        channel = self._channel(entity)
+        return InputPeerChannel(channel.channel_id, _access_hash(channel.channel_id))
+
+    async def get_messages(self, entity, limit: int = 1, **kwargs) -> List[Message]:
+        """Get list of messages, newest first."""
+        messages = []
+        async for message in self.iter_messages(entity, limit=limit, **kwargs):
+            messages.append(message)
+        return messages
+
+    async def iter_messages(
+        self,
+        entity,
+        limit: Optional[int] = None,
+        offset_date: Optional[datetime] = None,
+        min_id: int = 0,
+        max_id: int = 0,
+        reverse: bool = False,
+        wait_time: Optional[float] = None,
+        **kwargs
+    ):
+        """Yield history page by page, newest first unless reverse is set."""
+        channel = self._channel(entity)
+        if offset_date is not None and offset_date.tzinfo is None:
+            offset_date = offset_date.replace(tzinfo=timezone.utc)
+
+        ids = channel.message_ids(min_id or 0, max_id or 0, reverse)
+        served = 0
+        while True:
+            await self._request()
+            page = []
+            for message_id in ids:
+                page.append(message_id)
+                if len(page) >= self.page_size:
+                    break
+
+            for message_id in page:
+                message = channel.get_message(message_id)
+                if offset_date is not None and (
+                    message.date <= offset_date if reverse else message.date >= offset_date
+                ):
+                    continue
+                self.stats["messages"] += 1
+                served += 1
+                yield message
+                if limit and served >= limit:
+                    return
+
+            if len(page) < self.page_size:
+                return
+
+    async def download_profile_photo(self, entity, file=None):
+        """Replayed channels have no photos."""
+        await self._request()
+        return None
+
+    @asynccontextmanager
+    async def takeout(self, finalize: bool = True, **kwargs):
+        """Takeout session: same histories, requests counted separately."""
+        await self._request()
+        takeout_client = copy.copy(self)
+        takeout_client._takeout = True
+        yield takeout_client
+
+    def add_event_handler(self, callback, event=None):
+        """Register update handler (replay never pushes updates)."""
+        self._handlers.append((callback, event))
+
+    def remove_event_handler(self, callback, event=None):
+        """Remove update handler."""
+        self._handlers = [
+            (handler, handler_event) for handler, handler_event in self._handlers
+            if handler != callback
+        ]
+
+
+def parse_replay_source(source: str) -> List[ReplayChannel]:
+    """
+    Build replayed channels from a source description.
+
+    Args:
+        source: "synthetic:name=count,other=count" or a path to a JSONL file
+            or a directory of <username>.jsonl files
+
+    Returns:
+        List of replayed channels
+    """
+    if source.startswith("synthetic:"):
+        channels = []
+        for item in source[len("synthetic:"):].split(","):
+            username, _, count = item.partition("=")
+            channels.append(SyntheticChannel(username.strip(), int(count or 1000)))
+        return channels
+
+    path = Path(source)
+    files = sorted(path.glob("*.jsonl")) if path.is_dir() else [path]
+    return [RecordedChannel.from_jsonl(str(file)) for file in files]
+
+
+@lru_cache(maxsize=4)
+def _load_replay_channels(source: str) -> Tuple[ReplayChannel, ...]:
+    """Load replayed channels once per process."""
+    return tuple(parse_replay_source(source))
+
+
+def create_replay_client() -> ReplayTelegramClient:
+    """
+    Create replay client configured from settings.
+
+    Returns:
+        ReplayTelegramClient serving TELEGRAM_REPLAY_SOURCE
+    """
+    return ReplayTelegramClient(
+        _load_replay_channels(settings.TELEGRAM_REPLAY_SOURCE),
+        latency=settings.TELEGRAM_REPLAY_LATENCY_MS / 1000,
+        flood_wait_every=settings.TELEGRAM_REPLAY_FLOOD_WAIT_EVERY
+    )
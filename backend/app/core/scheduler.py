@@ -0,0 +1,190 @@
+"""
+Adaptive polling schedule for channels.
+
+Each active channel is polled at an interval derived from how often it
+posted recently and how long it has been silent: busy channels every few
+minutes, dormant ones about once a day. Due channels are claimed by
+moving their next_poll_at forward and handed to batch parse tasks.
+Dead-lettered channels are not polled.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.channel import Channel
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+
+# A channel silent for N minutes is polled at least every N * SILENCE_FACTOR minutes
+SILENCE_FACTOR = 0.25
+
+
+def poll_interval(
+    posts_per_day: float,
+    minutes_since_last_post: Optional[float],
+    is_active: bool = True
+) -> Optional[float]:
+    """
+    Compute polling interval for a channel.
+
+    The interval aims at POLL_TARGET_POSTS_PER_POLL new posts per poll and
+    grows with the time the channel has been silent. With real-time push
+    ingestion enabled, polls only catch up and run at the maximum interval.
+
+    Args:
+        posts_per_day: Average posting rate over the activity window
+        minutes_since_last_post: Minutes since the newest stored post (None if no posts)
+        is_active: Whether the channel is enabled
+
+    Returns:
+        Interval in minutes, or None if the channel must not be polled
+    """
+    if not is_active:
+        return None
+
+    min_interval = settings.POLL_MIN_INTERVAL_MINUTES
+    max_interval = settings.POLL_MAX_INTERVAL_MINUTES
+
+    if posts_per_day <= 0 or settings.REALTIME_INGESTION_ENABLED:
+        return float(max_interval)
+
+    interval = MINUTES_PER_DAY * settings.POLL_TARGET_POSTS_PER_POLL / posts_per_day
+    if minutes_since_last_post is not None:
+        interval = max(interval, minutes_since_last_post * SILENCE_FACTOR)
+
+    return float(min(max(interval, min_interval), max_interval))
+
+
+def build_poll_schedule(db: Session, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Build polling schedule of all channels.
+
+    Args:
+        db: Database session
+        now: Current time (UTC)
+
+    Returns:
+        List of schedule entries, most overdue first
+    """
+    now = now or datetime.utcnow()
+    window_days = settings.POLL_ACTIVITY_WINDOW_DAYS
+    window_start = now - timedelta(days=window_days)
+
+    # Only the activity window is aggregated (idx_post_channel_date), so the
+    # cost follows recent posts, not the whole history
+    recent_posts_by_channel = dict(
+        db.query(Post.channel_id, func.count(Post.id))
+        .filter(Post.date >= window_start)
+        .group_by(Post.channel_id)
+    )
+
+    schedule = []
+    for channel in db.query(Channel).all():
+        recent_posts = recent_posts_by_channel.get(channel.id, 0)
+        last_post_at = channel.last_post_at
+        posts_per_day = recent_posts / window_days
+        minutes_since_last_post = (
+            (now - last_post_at).total_seconds() / 60 if last_post_at else None
+        )
+        dead_lettered = channel.dead_lettered_at is not None
+        interval = poll_interval(
+            posts_per_day,
+            minutes_since_last_post,
+            bool(channel.is_active) and not dead_lettered
+        )
+
+        schedule.append({
+            "channel_id": channel.id,
+            "channel_username": channel.channel_username,
+            "is_active": bool(channel.is_active),
+            "dead_lettered": dead_lettered,
+            "posts_per_day": round(posts_per_day, 3),
+            "last_post_at": last_post_at,
+            "last_parsed_at": channel.last_parsed_at,
+            "interval_minutes": round(interval, 1) if interval is not None else None,
+            "next_poll_at": channel.next_poll_at,
+            "due": interval is not None and (
+                channel.next_poll_at is None or channel.next_poll_at <= now
+            ),
+        })
+
+    schedule.sort(key=lambda entry: (
+        entry["interval_minutes"] is None,
+        entry["next_poll_at"] or datetime.min
+    ))
+    return schedule
+
+
+def predict_api_spend(schedule: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Predict daily Telegram API requests of a schedule.
+
+    Every poll costs one history request plus one per full page of
+    expected new posts.
+
+    Args:
+        schedule: Entries from build_poll_schedule()
+
+    Returns:
+        Dictionary with predicted polls and requests per day and budget share
+    """
+    # Deferred: the parser module pulls in telethon, which the API does not need at startup
+    from app.agents.channel_parser import HISTORY_PAGE_SIZE
+
+    polls_per_day = 0.0
+    requests_per_day = 0.0
+    for entry in schedule:
+        if entry["interval_minutes"] is None:
+            continue
+        polls = MINUTES_PER_DAY / entry["interval_minutes"]
+        posts_per_poll = entry["posts_per_day"] / polls
+        polls_per_day += polls
+        requests_per_day += polls * (1 + posts_per_poll / HISTORY_PAGE_SIZE)
+
+    budget_per_day = settings.TELEGRAM_REQUESTS_PER_MINUTE * MINUTES_PER_DAY
+    return {
+        "polled_channels": sum(1 for entry in schedule if entry["interval_minutes"] is not None),
+        "polls_per_day": round(polls_per_day, 1),
+        "requests_per_day": round(requests_per_day, 1),
+        "budget_per_day": budget_per_day,
+        "budget_share": round(requests_per_day / budget_per_day, 4) if budget_per_day else None,
+    }
+
+
+def claim_due_channels(
+    db: Session,
+    now: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> List[int]:
+    """
+    Pick channels due for polling and move their next poll forward.
+
+    Args:
+        db: Database session
+        now: Current time (UTC)
+        limit: Maximum number of channels to claim
+
+    Returns:
+        Claimed channel IDs, most overdue first
+    """
+    now = now or datetime.utcnow()
+    due = [entry for entry in build_poll_schedule(db, now) if entry["due"]]
+    if limit is not None:
+        due = due[:limit]
+
+    next_polls = {
+        entry["channel_id"]: now + timedelta(minutes=entry["interval_minutes"])
+        for entry in due
+    }
+    for channel in db.query(Channel).filter(Channel.id.in_(list(next_polls))):
+        channel.next_poll_at = next_polls[channel.id]
+    db.commit()
+
+    return [entry["channel_id"] for entry in due]
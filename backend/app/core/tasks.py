@@ -1,143 +1,804 @@
 """
 Celery tasks for channel parsing.
 """
+import asyncio
+import math
+from typing import Callable, List, Optional, Tuple
+from uuid import uuid4
 from celery import shared_task
+from celery.exceptions import Retry
 from app.agents.channel_parser import ChannelParserAgent
+from app.core.analysis_cache import get_analysis_cache
+from app.core.backfill import (
+    get_backfill_progress, plan_backfill, queue_pending_chunks, reset_stale_chunks, should_use_takeout
+)
 from app.core.database import SessionLocal
+from app.core.config import settings
+from app.core.dead_letter import record_parse_failure, record_parse_success
+from app.core.ingestion import find_post_gaps, ingest_post_batches, record_checked_gap
+from app.core.metrics import refresh_derived_metrics_in_batches
+from app.core.parse_lock import ChannelParseLease
+from app.core.pipeline import get_pipeline_stats
+from app.core.rate_limiter import RateLimitDeferred
+from app.core.scheduler import claim_due_channels
+from app.core.telegram_pool import get_client_pool, run_async
+from app.models.backfill_chunk import BackfillChunk
 from app.models.channel import Channel
-from app.models.post import Post
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(name="parse_channel")
-def parse_channel_task(channel_url: str, parse_mode: str = "new_only", limit: int = None):
+def _make_parser(client) -> ChannelParserAgent:
+    """Create parser that defers long rate-limit waits instead of sleeping in a worker slot."""
+    return ChannelParserAgent(client=client, max_wait=settings.PARSE_MAX_WAIT_SECONDS)
+
+
+def _defer(task, e: RateLimitDeferred, lease: Optional[ChannelParseLease] = None):
+    """
+    Retry task once the Telegram budget is available again.
+
+    Work committed before the deferral is kept: checkpoints and chunk
+    cursors make the retry resume where this run stopped. The retry runs
+    under the same task ID and keeps the channel parse lease.
+
+    Args:
+        task: Bound Celery task
+        e: Deferral raised by the parser
+        lease: Parse lease held by the task
+
+    Returns:
+        Retry exception to raise
+    """
+    countdown = math.ceil(e.seconds)
+    logger.info(f"Retrying {task.name} in {countdown} seconds: {e}")
+    try:
+        return task.retry(countdown=countdown, max_retries=settings.PARSE_MAX_DEFERRALS, exc=e)
+    except Retry:
+        if lease is not None:
+            lease.keep(countdown)
+        raise
+
+
+def _task_owner(task) -> str:
+    """Get ID owning parse leases of a task (random when called outside a worker)."""
+    return task.request.id or str(uuid4())
+
+
+def _duplicate_result(lease: ChannelParseLease) -> dict:
+    """Result of a task coalesced into the task already parsing the channel."""
+    logger.info(f"Parse {lease.key} is already running in task {lease.holder}, skipping")
+    return {"status": "duplicate", "task_id": lease.holder}
+
+
+def dispatch_channel_parse(
+    channel_id: int,
+    parse_mode: str = "new_only",
+    channel_url: Optional[str] = None
+) -> Tuple[str, bool]:
+    """
+    Queue a parse of a channel unless the same parse is already queued or running.
+
+    The lease is claimed before the task is sent, under the task's ID, so
+    duplicate requests arriving meanwhile get the same task ID.
+
+    Args:
+        channel_id: Channel ID in database
+        parse_mode: "new_only" or "full_history" (a chunked backfill)
+        channel_url: Parse by URL, refreshing channel metadata first
+
+    Returns:
+        Tuple of task ID and whether a new task was queued
+    """
+    task_id = str(uuid4())
+    lease = ChannelParseLease(channel_id, parse_mode, task_id)
+    if not lease.acquire():
+        if lease.holder is not None:
+            return lease.holder, False
+        # The lease expired or was released meanwhile; the task claims it
+        # under its own ID when it starts
+        logger.info(f"Parse {lease.key} was released during the claim, queueing task {task_id}")
+
+    try:
+        if channel_url:
+            parse_channel_task.apply_async((channel_url, parse_mode), task_id=task_id)
+        elif parse_mode == "full_history":
+            backfill_channel_task.apply_async((channel_id,), task_id=task_id)
+        else:
+            parse_channel_posts_task.apply_async((channel_id, parse_mode), task_id=task_id)
+    except Exception:
+        lease.release()
+        raise
+
+    return task_id, True
+
+
+def _checkpoint_range(channel: Channel, parse_mode: str) -> dict:
+    """
+    Build parser ID range for incremental parsing.
+
+    In "new_only" mode with a stored checkpoint only messages newer than
+    channel.last_message_id are fetched, oldest first, so the checkpoint
+    advances with every committed batch. A quiet channel costs one request.
+
+    Args:
+        channel: Channel model
+        parse_mode: "new_only" or "full_history"
+
+    Returns:
+        Keyword arguments for ChannelParserAgent.iter_posts()
+    """
+    if parse_mode == "new_only" and channel.last_message_id:
+        return {"min_id": channel.last_message_id, "reverse": True}
+    return {}
+
+
+@shared_task(bind=True, name="parse_channel")
+def parse_channel_task(self, channel_url: str, parse_mode: str = "new_only", limit: int = None):
     """
     Celery task to parse channel.
-    
+
+    An unlimited "full_history" parse is handed over to a chunked backfill.
+
     Args:
         channel_url: Channel URL
         parse_mode: "new_only" or "full_history"
         limit: Maximum number of posts to parse
+
+    Returns:
+        Dictionary with inserted, updated and skipped post counts,
+        or backfill progress for a full-history parse
     """
-    import asyncio
-    
+    lease = None
+
     async def parse():
-        parser = ChannelParserAgent()
+        nonlocal lease
+        db = SessionLocal()
+        channel_id = None
         try:
-            result = await parser.parse_channel_full(channel_url, parse_mode, limit)
-            
-            # Save to database
-            db = SessionLocal()
-            try:
+            async with get_client_pool().client() as client:
+                parser = _make_parser(client)
+
+                channel_username = await parser.parse_channel_username(channel_url)
+                metadata = await parser.get_channel_metadata(channel_username)
+
                 # Create or update channel
                 channel = db.query(Channel).filter_by(
-                    channel_username=result["metadata"]["channel_username"]
+                    channel_username=metadata["channel_username"]
                 ).first()
-                
+
                 if not channel:
-                    channel = Channel(**result["metadata"])
+                    channel = Channel(**metadata)
                     db.add(channel)
                 else:
-                    for key, value in result["metadata"].items():
+                    for key, value in metadata.items():
                         if key != "channel_username":
                             setattr(channel, key, value)
-                    channel.last_parsed_at = datetime.utcnow()
-                
-                db.commit()
-                
-                # Save posts
-                for post_data in result["posts"]:
-                    existing_post = db.query(Post).filter_by(
-                        post_id=post_data["post_id"],
-                        channel_id=channel.id
-                    ).first()
-                    
-                    if not existing_post:
-                        post_data["channel_id"] = channel.id
-                        # Remove fields not in Post model
-                        post_data.pop("comments", None)
-                        post = Post(**post_data)
-                        db.add(post)
-                
+
                 db.commit()
-                logger.info(f"Successfully parsed channel {channel.channel_username}")
-                
-            except Exception as e:
-                db.rollback()
-                logger.error(f"Error saving to database: {e}")
-                raise
-            finally:
-                db.close()
-            
-            await parser.disconnect()
-            
+                channel_id = channel.id
+
+                lease = ChannelParseLease(channel.id, parse_mode, _task_owner(self))
+                if not lease.acquire():
+                    return _duplicate_result(lease)
+
+                if parse_mode == "full_history" and limit is None:
+                    latest_message_id = await parser.get_latest_message_id(channel_username)
+                    _start_backfill(db, channel.id, latest_message_id)
+                    return get_backfill_progress(db, channel.id)
+
+                # Stream posts into the database, committing every batch
+                counts = await ingest_post_batches(
+                    db,
+                    channel.id,
+                    parser.iter_post_batches(
+                        channel_username,
+                        settings.INGEST_BATCH_SIZE,
+                        parse_mode=parse_mode,
+                        limit=limit,
+                        **_checkpoint_range(channel, parse_mode)
+                    ),
+                    on_batch=lambda batch, counts: lease.heartbeat()
+                )
+
+            channel.last_parsed_at = datetime.utcnow()
+            record_parse_success(channel)
+            db.commit()
+            logger.info(f"Successfully parsed channel {channel.channel_username}: {counts}")
+            return counts
+
+        except RateLimitDeferred:
+            db.rollback()
+            raise
         except Exception as e:
+            db.rollback()
             logger.error(f"Error parsing channel {channel_url}: {e}")
-            await parser.disconnect()
+            # Counts towards the dead-letter threshold like polls, once the channel is stored
+            if channel_id is not None:
+                record_parse_failure(db, channel_id, str(e))
             raise
-    
-    asyncio.run(parse())
+        finally:
+            db.close()
+
+    try:
+        return run_async(parse())
+    except RateLimitDeferred as e:
+        raise _defer(self, e, lease)
+    finally:
+        if lease is not None:
+            lease.release()
 
 
-@shared_task(name="parse_channel_posts")
-def parse_channel_posts_task(channel_id: int, parse_mode: str = "new_only"):
+async def _parse_existing_channel(
+    client,
+    channel_id: int,
+    parse_mode: str,
+    on_batch: Optional[Callable] = None
+) -> dict:
+    """
+    Parse new posts of a stored channel with a connected client.
+
+    Every call uses its own database session, so several channels can be
+    parsed concurrently on one event loop. Failures count towards the
+    channel's dead-letter threshold; rate-limit deferrals do not.
+
+    Args:
+        client: Connected Telegram client
+        channel_id: Channel ID in database
+        parse_mode: "new_only" or "full_history"
+        on_batch: Called with each batch and its counts before the commit
+
+    Returns:
+        Dictionary with inserted, updated and skipped post counts
+    """
+    db = SessionLocal()
+    try:
+        channel = db.query(Channel).filter_by(id=channel_id).first()
+        if not channel:
+            raise ValueError(f"Channel with id {channel_id} not found")
+
+        parser = _make_parser(client)
+
+        # Stream posts into the database, committing every batch
+        counts = await ingest_post_batches(
+            db,
+            channel.id,
+            parser.iter_post_batches(
+                channel.channel_username,
+                settings.INGEST_BATCH_SIZE,
+                parse_mode=parse_mode,
+                **_checkpoint_range(channel, parse_mode)
+            ),
+            on_batch=on_batch
+        )
+
+        channel.last_parsed_at = datetime.utcnow()
+        record_parse_success(channel)
+        db.commit()
+
+        logger.info(f"Successfully parsed posts from channel {channel.channel_username}: {counts}")
+        return counts
+
+    except RateLimitDeferred:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error parsing posts for channel {channel_id}: {e}")
+        record_parse_failure(db, channel_id, str(e))
+        raise
+    finally:
+        db.close()
+
+
+async def parse_channels_concurrently(
+    channel_ids: List[int],
+    parse_mode: str = "new_only",
+    concurrency: Optional[int] = None,
+    owner: Optional[str] = None
+) -> dict:
+    """
+    Parse several stored channels concurrently on one event loop.
+
+    Channels share one pooled client and the shared rate limiter, so the
+    total request rate stays within the Telegram budget however many
+    channels are in flight. A failing channel does not affect the others.
+    Channels deferred by an exhausted budget are reported with the seconds
+    until they can be retried, channels already being parsed by another
+    task are skipped.
+
+    Args:
+        channel_ids: Channel IDs in database
+        parse_mode: "new_only" or "full_history"
+        concurrency: Maximum number of channels parsed at once
+        owner: Task ID owning the channel parse leases
+
+    Returns:
+        Dictionary with per-channel results and succeeded/failed/deferred/skipped counts
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.PARSE_CONCURRENCY)
+    owner = owner or str(uuid4())
+    results = {}
+
+    async with get_client_pool().client() as client:
+        async def parse_one(channel_id: int):
+            async with semaphore:
+                lease = ChannelParseLease(channel_id, parse_mode, owner)
+                if not lease.acquire():
+                    results[str(channel_id)] = {"status": "skipped", "task_id": lease.holder}
+                    return
+
+                try:
+                    counts = await _parse_existing_channel(
+                        client,
+                        channel_id,
+                        parse_mode,
+                        on_batch=lambda batch, counts: lease.heartbeat()
+                    )
+                except RateLimitDeferred as e:
+                    results[str(channel_id)] = {
+                        "status": "deferred",
+                        "retry_in": math.ceil(e.seconds),
+                    }
+                except Exception as e:
+                    results[str(channel_id)] = {"status": "error", "error": str(e)}
+                else:
+                    results[str(channel_id)] = {"status": "ok", **counts}
+                finally:
+                    lease.release()
+
+        await asyncio.gather(*(parse_one(channel_id) for channel_id in channel_ids))
+
+    by_status = {status: 0 for status in ("ok", "error", "deferred", "skipped")}
+    for result in results.values():
+        by_status[result["status"]] += 1
+    logger.info(
+        f"Parsed {by_status['ok']} of {len(results)} channels, "
+        f"{by_status['deferred']} deferred, {by_status['skipped']} already running"
+    )
+    return {
+        "channels": results,
+        "succeeded": by_status["ok"],
+        "failed": by_status["error"],
+        "deferred": by_status["deferred"],
+        "skipped": by_status["skipped"],
+    }
+
+
+@shared_task(bind=True, name="parse_channel_posts")
+def parse_channel_posts_task(self, channel_id: int, parse_mode: str = "new_only"):
     """
     Celery task to parse new posts from existing channel.
-    
+
     Args:
         channel_id: Channel ID in database
         parse_mode: "new_only" or "full_history"
+
+    Returns:
+        Dictionary with inserted, updated and skipped post counts, or the
+        ID of the task already parsing the channel
     """
-    import asyncio
-    
+    lease = ChannelParseLease(channel_id, parse_mode, _task_owner(self))
+    if not lease.acquire():
+        return _duplicate_result(lease)
+
     async def parse():
+        async with get_client_pool().client() as client:
+            return await _parse_existing_channel(
+                client,
+                channel_id,
+                parse_mode,
+                on_batch=lambda batch, counts: lease.heartbeat()
+            )
+
+    try:
+        return run_async(parse())
+    except RateLimitDeferred as e:
+        raise _defer(self, e, lease)
+    finally:
+        lease.release()
+
+
+@shared_task(bind=True, name="parse_channels_batch")
+def parse_channels_batch_task(
+    self,
+    channel_ids: List[int],
+    parse_mode: str = "new_only",
+    concurrency: Optional[int] = None
+):
+    """
+    Celery task to parse many existing channels concurrently in one worker slot.
+
+    Channels deferred by an exhausted budget are queued again as a new
+    batch once the budget is available; its task ID is returned as
+    "requeued_task_id".
+
+    Args:
+        channel_ids: Channel IDs in database
+        parse_mode: "new_only" or "full_history"
+        concurrency: Maximum number of channels parsed at once
+
+    Returns:
+        Dictionary with per-channel results and succeeded/failed/deferred/skipped counts
+    """
+    result = run_async(
+        parse_channels_concurrently(channel_ids, parse_mode, concurrency, _task_owner(self))
+    )
+
+    deferred = {
+        int(channel_id): channel_result["retry_in"]
+        for channel_id, channel_result in result["channels"].items()
+        if channel_result["status"] == "deferred"
+    }
+    if deferred:
+        countdown = max(deferred.values())
+        requeued = parse_channels_batch_task.apply_async(
+            (list(deferred), parse_mode, concurrency),
+            countdown=countdown
+        )
+        result["requeued_task_id"] = requeued.id
+        logger.info(f"Queued {len(deferred)} deferred channels again in {countdown} seconds")
+    return result
+
+
+@shared_task(name="schedule_channel_polls")
+def schedule_channel_polls_task():
+    """
+    Celery beat task queueing batch parses for channels due for polling.
+
+    Returns:
+        Dictionary with number of due channels and queued batches
+    """
+    db = SessionLocal()
+    try:
+        channel_ids = claim_due_channels(db)
+    finally:
+        db.close()
+
+    batch_size = settings.POLL_BATCH_SIZE
+    batches = [
+        channel_ids[start:start + batch_size]
+        for start in range(0, len(channel_ids), batch_size)
+    ]
+    for batch in batches:
+        parse_channels_batch_task.delay(batch, "new_only")
+
+    if channel_ids:
+        logger.info(f"Queued {len(channel_ids)} channels for polling in {len(batches)} batches")
+    return {"due": len(channel_ids), "batches": len(batches)}
+
+
+@shared_task(bind=True, name="fill_channel_gaps")
+def fill_channel_gaps_task(self, channel_id: int, max_gaps: int = None):
+    """
+    Celery task to fetch message ID ranges missing from stored posts.
+
+    Args:
+        channel_id: Channel ID in database
+        max_gaps: Maximum number of gaps to fetch, newest first
+
+    Returns:
+        Dictionary with gap count and inserted, updated and skipped post
+        counts, or the ID of the task already filling the channel's gaps
+    """
+    lease = ChannelParseLease(channel_id, "fill_gaps", _task_owner(self))
+    if not lease.acquire():
+        return _duplicate_result(lease)
+
+    async def fill():
         db = SessionLocal()
         try:
             channel = db.query(Channel).filter_by(id=channel_id).first()
             if not channel:
                 raise ValueError(f"Channel with id {channel_id} not found")
-            
-            parser = ChannelParserAgent()
-            
-            offset_date = None
-            if parse_mode == "new_only" and channel.last_parsed_at:
-                offset_date = channel.last_parsed_at
-            
-            posts = await parser.parse_posts(
-                channel.channel_username,
-                parse_mode=parse_mode,
-                offset_date=offset_date
-            )
-            
-            # Save new posts
-            for post_data in posts:
-                existing_post = db.query(Post).filter_by(
-                    post_id=post_data["post_id"],
-                    channel_id=channel.id
-                ).first()
-                
-                if not existing_post:
-                    post_data["channel_id"] = channel.id
-                    post_data.pop("comments", None)
-                    post = Post(**post_data)
-                    db.add(post)
-            
-            channel.last_parsed_at = datetime.utcnow()
-            db.commit()
-            
-            logger.info(f"Successfully parsed {len(posts)} posts from channel {channel.channel_username}")
-            
-            await parser.disconnect()
-            
+
+            gaps = find_post_gaps(db, channel.id, limit=max_gaps)
+            totals = {"gaps": len(gaps), "inserted": 0, "updated": 0, "skipped": 0}
+
+            async with get_client_pool().client() as client:
+                parser = _make_parser(client)
+
+                for first_id, last_id in gaps:
+                    counts = await ingest_post_batches(
+                        db,
+                        channel.id,
+                        parser.iter_post_batches(
+                            channel.channel_username,
+                            settings.INGEST_BATCH_SIZE,
+                            min_id=first_id - 1,
+                            max_id=last_id + 1,
+                            reverse=True
+                        ),
+                        on_batch=lambda batch, counts: lease.heartbeat()
+                    )
+                    # Whatever is still missing in the range does not exist
+                    record_checked_gap(db, channel.id, first_id, last_id)
+                    db.commit()
+                    for key, value in counts.items():
+                        totals[key] += value
+
+            logger.info(f"Filled gaps for channel {channel.channel_username}: {totals}")
+            return totals
+
+        except RateLimitDeferred:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
-            logger.error(f"Error parsing posts for channel {channel_id}: {e}")
+            logger.error(f"Error filling gaps for channel {channel_id}: {e}")
             raise
         finally:
             db.close()
-    
-    asyncio.run(parse())
 
+    # Fetched gaps are recorded as checked, so a retry only looks up the remaining ones
+    try:
+        return run_async(fill())
+    except RateLimitDeferred as e:
+        raise _defer(self, e, lease)
+    finally:
+        lease.release()
+
+
+def _start_backfill(db, channel_id: int, latest_message_id: int) -> list:
+    """
+    Plan or resume backfill of a channel and dispatch the first chunks.
+
+    Args:
+        db: Database session
+        channel_id: Channel ID in database
+        latest_message_id: Newest Telegram message ID of the channel
+
+    Returns:
+        IDs of dispatched chunks
+    """
+    use_takeout = should_use_takeout(db, channel_id, latest_message_id)
+    plan_backfill(db, channel_id, latest_message_id, use_takeout=use_takeout)
+    reset_stale_chunks(db, channel_id)
+
+    chunk_ids = queue_pending_chunks(db, channel_id)
+    for chunk_id in chunk_ids:
+        backfill_chunk_task.delay(chunk_id)
+
+    logger.info(f"Dispatched {len(chunk_ids)} backfill chunks for channel {channel_id}")
+    return chunk_ids
+
+
+@shared_task(bind=True, name="backfill_channel")
+def backfill_channel_task(self, channel_id: int):
+    """
+    Celery task to start or resume chunked full-history backfill of a channel.
+
+    Completed chunks are kept, failed and abandoned ones are queued again.
+
+    Args:
+        channel_id: Channel ID in database
+
+    Returns:
+        Backfill progress of the channel, or the ID of the task already
+        starting it
+    """
+    lease = ChannelParseLease(channel_id, "full_history", _task_owner(self))
+    if not lease.acquire():
+        return _duplicate_result(lease)
+
+    async def backfill():
+        db = SessionLocal()
+        try:
+            channel = db.query(Channel).filter_by(id=channel_id).first()
+            if not channel:
+                raise ValueError(f"Channel with id {channel_id} not found")
+
+            async with get_client_pool().client() as client:
+                parser = _make_parser(client)
+                latest_message_id = await parser.get_latest_message_id(channel.channel_username)
+
+            _start_backfill(db, channel.id, latest_message_id)
+            return get_backfill_progress(db, channel.id)
+
+        except RateLimitDeferred:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error starting backfill for channel {channel_id}: {e}")
+            raise
+        finally:
+            db.close()
+
+    try:
+        return run_async(backfill())
+    except RateLimitDeferred as e:
+        raise _defer(self, e, lease)
+    finally:
+        lease.release()
+
+
+async def _run_backfill_chunk(client, chunk_id: int) -> dict:
+    """
+    Parse one backfill chunk, resuming after its cursor.
+
+    The cursor and post count are updated in the same transaction as
+    every committed batch of posts. A chunk deferred by an exhausted
+    budget stays queued for the retry.
+
+    Args:
+        client: Connected Telegram client
+        chunk_id: Backfill chunk ID
+
+    Returns:
+        Dictionary with chunk ID, status and inserted, updated and skipped counts
+    """
+    db = SessionLocal()
+    try:
+        chunk = db.query(BackfillChunk).filter_by(id=chunk_id).first()
+        if not chunk:
+            raise ValueError(f"Backfill chunk with id {chunk_id} not found")
+        if chunk.status == "done":
+            return {"chunk_id": chunk.id, "status": chunk.status}
+
+        channel = db.query(Channel).filter_by(id=chunk.channel_id).first()
+        chunk.status = "running"
+        chunk.error = None
+        db.commit()
+
+        def record_progress(batch, counts):
+            chunk.cursor_id = max(int(post_data["post_id"]) for post_data in batch)
+            chunk.posts_count = (chunk.posts_count or 0) + len(batch)
+            chunk.updated_at = datetime.utcnow()
+
+        parser = _make_parser(client)
+        counts = await ingest_post_batches(
+            db,
+            channel.id,
+            parser.iter_post_batches(
+                channel.channel_username,
+                settings.INGEST_BATCH_SIZE,
+                min_id=chunk.cursor_id or chunk.min_id,
+                max_id=chunk.max_id,
+                reverse=True,
+                takeout=bool(chunk.use_takeout)
+            ),
+            on_batch=record_progress
+        )
+
+        chunk.status = "done"
+        chunk.finished_at = datetime.utcnow()
+        db.commit()
+
+        logger.info(f"Finished backfill chunk {chunk.id} of channel {channel.channel_username}: {counts}")
+        return {"chunk_id": chunk.id, "status": chunk.status, **counts}
+
+    except RateLimitDeferred:
+        db.rollback()
+        db.query(BackfillChunk).filter_by(id=chunk_id).update(
+            {"status": "queued", "updated_at": datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+        raise
+    except Exception as e:
+        db.rollback()
+        db.query(BackfillChunk).filter_by(id=chunk_id).update(
+            {"status": "failed", "error": str(e)},
+            synchronize_session=False
+        )
+        db.commit()
+        logger.error(f"Error in backfill chunk {chunk_id}: {e}")
+        raise
+    finally:
+        db.close()
+
+
+@shared_task(bind=True, name="backfill_chunk")
+def backfill_chunk_task(self, chunk_id: int):
+    """
+    Celery task to parse one backfill chunk and queue the next pending ones.
+
+    Args:
+        chunk_id: Backfill chunk ID
+
+    Returns:
+        Dictionary with chunk ID, status and inserted, updated and skipped counts
+    """
+    async def run():
+        async with get_client_pool().client() as client:
+            return await _run_backfill_chunk(client, chunk_id)
+
+    try:
+        return run_async(run())
+    except RateLimitDeferred as e:
+        raise _defer(self, e)
+    finally:
+        db = SessionLocal()
+        try:
+            chunk = db.query(BackfillChunk).filter_by(id=chunk_id).first()
+            if chunk:
+                for next_chunk_id in queue_pending_chunks(db, chunk.channel_id):
+                    backfill_chunk_task.delay(next_chunk_id)
+        finally:
+            db.close()
+
+
+@shared_task(bind=True, name="reanalyze_posts")
+def reanalyze_posts_task(self, after_id: int = 0):
+    """
+    Celery task bringing derived fields of stored posts up to the current analyzer version.
+
+    A run stops after REANALYSIS_MAX_SECONDS and queues the next one to
+    continue after the last processed post.
+
+    Args:
+        after_id: Only posts with a greater ID are processed
+
+    Returns:
+        Dictionary with version, processed count, last post ID and whether
+        all stale posts were processed
+    """
+    from app.core.reanalysis import PostReanalyzer
+
+    result = PostReanalyzer().run(after_id=after_id)
+    if not result["done"]:
+        reanalyze_posts_task.apply_async(
+            args=[result["last_id"]],
+            countdown=settings.REANALYSIS_PAUSE_SECONDS
+        )
+    return result
+
+
+@shared_task(name="refresh_post_metrics")
+def refresh_post_metrics_task(
+    channel_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+):
+    """
+    Celery task recomputing derived post metrics from the stored counters in batches.
+
+    Args:
+        channel_id: Only posts of this channel (all posts if not given)
+        date_from: Only posts published at or after this ISO timestamp
+        date_to: Only posts published at or before this ISO timestamp
+
+    Returns:
+        Dictionary with number of batches and updated posts
+    """
+    return refresh_derived_metrics_in_batches(
+        SessionLocal,
+        channel_id=channel_id,
+        date_from=datetime.fromisoformat(date_from) if date_from else None,
+        date_to=datetime.fromisoformat(date_to) if date_to else None
+    )
+
+
+@shared_task(name="telegram_pool_stats")
+def telegram_pool_stats_task():
+    """
+    Celery task reporting Telegram client pool statistics of the worker that runs it.
+
+    Returns:
+        Dictionary with connect/reconnect counts and per-client utilisation
+    """
+    return get_client_pool().get_stats()
+
+
+@shared_task(name="ingestion_pipeline_stats")
+def ingestion_pipeline_stats_task():
+    """
+    Celery task reporting ingestion pipeline statistics of the worker that runs it.
+
+    Returns:
+        Dictionary of stage name to posts, seconds, throughput and queue depths
+    """
+    return get_pipeline_stats()
+
+
+@shared_task(name="analysis_cache_stats")
+def analysis_cache_stats_task():
+    """
+    Celery task reporting analysis cache statistics of the worker that runs it.
+
+    Returns:
+        Dictionary with hits per tier, misses, evictions and hit rate
+    """
+    return get_analysis_cache().get_stats()
@@ -0,0 +1,70 @@
+"""
+Telegram client interface used by the parser, and backend selection.
+
+ChannelParserAgent and the ingestion tasks only rely on the methods of
+TelegramClientProtocol. TELEGRAM_CLIENT_BACKEND chooses what implements
+them: a real Telethon client ("telethon") or the offline replay client
+("replay", see app.core.replay_client) for benchmarks and tests.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, List, Optional, Protocol
+
+from telethon.tl.types import Message
+
+from app.core.config import settings
+
+
+class TelegramClientProtocol(Protocol):
+    """Subset of the Telethon client API the parser depends on."""
+
+    async def connect(self) -> None: ...
+
+    async def start(self) -> Any: ...
+
+    async def disconnect(self) -> None: ...
+
+    def is_connected(self) -> bool: ...
+
+    async def is_user_authorized(self) -> bool: ...
+
+    async def get_entity(self, entity: Any) -> Any: ...
+
+    async def get_messages(self, entity: Any, limit: int = 1, **kwargs) -> List[Message]: ...
+
+    def iter_messages(
+        self,
+        entity: Any,
+        limit: Optional[int] = None,
+        offset_date: Optional[datetime] = None,
+        min_id: int = 0,
+        max_id: int = 0,
+        reverse: bool = False,
+        wait_time: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[Message]: ...
+
+    async def download_profile_photo(self, entity: Any, file: Any = None) -> Any: ...
+
+    def takeout(self, finalize: bool = True, **kwargs) -> Any: ...
+
+    def add_event_handler(self, callback: Callable, event: Any = None) -> None: ...
+
+    def remove_event_handler(self, callback: Callable, event: Any = None) -> None: ...
+
+
+def get_client_factory() -> Callable[[int], TelegramClientProtocol]:
+    """
+    Get factory building pool clients for the configured backend.
+
+    Returns:
+        Function creating a disconnected client for a pool index
+    """
+    if settings.TELEGRAM_CLIENT_BACKEND == "replay":
+        from app.core.replay_client import create_replay_client
+
+        return lambda index: create_replay_client()
+
+    from app.core.telegram_pool import create_pooled_client, load_session_string
+
+    session_string = load_session_string()
+    return lambda index: create_pooled_client(index, session_string)
@@ -0,0 +1,257 @@
+"""
+Worker-scoped pool of long-lived Telegram clients.
+
+Every Celery worker process keeps one event loop and a small pool of
+connected TelegramClient instances for its whole lifetime, instead of
+building, authorizing and disconnecting a client in every task.
+
+Each pooled client gets its own in-memory session holding a copy of the
+authorized auth key, so workers never lock a shared SQLite session file.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from telethon import TelegramClient
+from telethon.sessions import SQLiteSession, StringSession
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def load_session_string() -> str:
+    """
+    Get authorized session as a string.
+
+    Uses TELEGRAM_SESSION_STRING if set, otherwise reads the auth key from
+    the TELEGRAM_SESSION_NAME SQLite session once and closes the file.
+
+    Returns:
+        StringSession string ('' if no authorized session exists)
+    """
+    if settings.TELEGRAM_SESSION_STRING:
+        return settings.TELEGRAM_SESSION_STRING
+
+    base = SQLiteSession(settings.TELEGRAM_SESSION_NAME)
+    try:
+        return StringSession.save(base)
+    finally:
+        base.close()
+
+
+def create_pooled_client(index: int, session_string: str) -> TelegramClient:
+    """
+    Create Telegram client with its own in-memory session.
+
+    Args:
+        index: Client index in the pool
+        session_string: Authorized StringSession string
+
+    Returns:
+        Disconnected TelegramClient
+    """
+    # flood_sleep_threshold=0: flood waits are handled by the rate limiter
+    return TelegramClient(
+        StringSession(session_string),
+        settings.TELEGRAM_API_ID,
+        settings.TELEGRAM_API_HASH,
+        flood_sleep_threshold=0,
+        auto_reconnect=True
+    )
+
+
+class PooledClient:
+    """Telegram client with usage statistics."""
+
+    def __init__(self, index: int, client: TelegramClient):
+        self.index = index
+        self.client = client
+        self.created_at = time.monotonic()
+        self.in_use = False
+        self.uses = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self._acquired_at = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get usage statistics of this client."""
+        busy = self.busy_seconds
+        if self.in_use:
+            busy += time.monotonic() - self._acquired_at
+        lifetime = max(time.monotonic() - self.created_at, 1e-9)
+        return {
+            "index": self.index,
+            "connected": self.client.is_connected(),
+            "in_use": self.in_use,
+            "uses": self.uses,
+            "failures": self.failures,
+            "busy_seconds": round(busy, 3),
+            "utilisation": round(busy / lifetime, 4),
+        }
+
+
+class TelegramClientPool:
+    """Pool of connected Telegram clients for one worker process."""
+
+    def __init__(
+        self,
+        size: int,
+        client_factory: Optional[Callable[[int], TelegramClient]] = None
+    ):
+        """
+        Initialize pool.
+
+        Args:
+            size: Number of clients
+            client_factory: Builds client for given index (configured backend if not given)
+        """
+        self.size = size
+        self._client_factory = client_factory
+        self._clients: List[PooledClient] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self.connects = 0
+        self.reconnects = 0
+
+    def _build_clients(self):
+        """Create pool clients on first use."""
+        factory = self._client_factory
+        if factory is None:
+            from app.core.telegram_client import get_client_factory
+
+            factory = get_client_factory()
+
+        self._idle = asyncio.Queue()
+        for index in range(self.size):
+            pooled = PooledClient(index, factory(index))
+            self._clients.append(pooled)
+            self._idle.put_nowait(pooled)
+
+    async def _ensure_connected(self, pooled: PooledClient):
+        """Connect client, or reconnect it if the connection was lost."""
+        if pooled.client.is_connected():
+            return
+
+        if pooled.uses:
+            self.reconnects += 1
+            logger.info(f"Reconnecting pooled Telegram client {pooled.index}")
+        else:
+            self.connects += 1
+            logger.info(f"Connecting pooled Telegram client {pooled.index}")
+
+        await pooled.client.connect()
+        if not await pooled.client.is_user_authorized():
+            await pooled.client.disconnect()
+            raise RuntimeError(
+                "Telegram session is not authorized. Log in once with "
+                f"{settings.TELEGRAM_SESSION_NAME} or set TELEGRAM_SESSION_STRING"
+            )
+
+    @asynccontextmanager
+    async def client(self):
+        """
+        Borrow a connected client for the duration of the block.
+
+        A client whose block fails with a connection error is disconnected,
+        so the next borrower reconnects it.
+
+        Yields:
+            Connected TelegramClient
+        """
+        if self._idle is None:
+            self._build_clients()
+
+        pooled = await self._idle.get()
+        try:
+            await self._ensure_connected(pooled)
+        except Exception:
+            self._idle.put_nowait(pooled)
+            raise
+
+        pooled.in_use = True
+        pooled._acquired_at = time.monotonic()
+        try:
+            yield pooled.client
+        except (ConnectionError, OSError):
+            pooled.failures += 1
+            await pooled.client.disconnect()
+            raise
+        finally:
+            pooled.in_use = False
+            pooled.uses += 1
+            pooled.busy_seconds += time.monotonic() - pooled._acquired_at
+            self._idle.put_nowait(pooled)
+
+    async def close(self):
+        """Disconnect all clients."""
+        for pooled in self._clients:
+            if pooled.client.is_connected():
+                await pooled.client.disconnect()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with connect/reconnect counts and per-client utilisation
+        """
+        return {
+            "pid": os.getpid(),
+            "size": self.size,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "idle": self._idle.qsize() if self._idle is not None else self.size,
+            "clients": [pooled.get_stats() for pooled in self._clients],
+        }
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_pool: Optional[TelegramClientPool] = None
+_pool_pid: Optional[int] = None
+
+
+def run_async(coro):
+    """
+    Run coroutine on the worker's persistent event loop.
+
+    Pooled clients are bound to the loop they connected on, so tasks must
+    not use asyncio.run(), which creates and closes a loop every time.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        Coroutine result
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+def get_client_pool() -> TelegramClientPool:
+    """
+    Get Telegram client pool of the current worker process.
+
+    Returns:
+        TelegramClientPool created once per process
+    """
+    global _pool, _pool_pid
+    # Celery prefork children must not reuse clients created in the parent
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = TelegramClientPool(settings.TELEGRAM_CLIENT_POOL_SIZE)
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def close_client_pool():
+    """Disconnect pooled clients of the current process."""
+    global _pool
+    if _pool is not None and _pool_pid == os.getpid():
+        logger.info(f"Closing Telegram client pool: {_pool.get_stats()}")
+        run_async(_pool.close())
+        _pool = None
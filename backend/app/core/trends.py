@@ -0,0 +1,551 @@
+"""
+Streaming detection of trending hashtags, mentions and link domains.
+
+Newly stored posts are counted as they are ingested, in time buckets of
+TRENDS_BUCKET_SECONDS by publication date. Per entity type and bucket:
+
+- a Count-Min sketch estimates how many posts used any value;
+- a Space-Saving summary of TRENDS_CAPACITY counters keeps the heaviest
+  hitters, the only candidates worth scoring.
+
+A candidate's count over the last TRENDS_WINDOW_BUCKETS is compared with
+its rate over the TRENDS_BASELINE_BUCKETS before them. The burst score is
+(count - expected) / sqrt(expected + 1), so a value that is always
+popular does not trend, but one that suddenly appears does.
+
+Both structures have a fixed size, so updates and /trends reads cost the
+same however many posts are stored. With the "redis" backend, workers
+write into shared Redis structures and the API reads them. Old buckets
+expire on their own.
+"""
+import calendar
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+from app.core.entities import extract_entities
+
+logger = logging.getLogger(__name__)
+
+TREND_TYPES = ("hashtag", "mention", "domain")
+
+KEY_PREFIX = "tgcursor2:trends"
+
+# Space-Saving update of a sorted set.
+# KEYS[1] - summary key; ARGV - capacity, TTL in seconds, then value/count pairs
+_SPACE_SAVING_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+for i = 3, #ARGV, 2 do
+    local value = ARGV[i]
+    local count = tonumber(ARGV[i + 1])
+    if redis.call('ZSCORE', KEYS[1], value) then
+        redis.call('ZINCRBY', KEYS[1], count, value)
+    elseif redis.call('ZCARD', KEYS[1]) < capacity then
+        redis.call('ZADD', KEYS[1], count, value)
+    else
+        local smallest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+        redis.call('ZREM', KEYS[1], smallest[1])
+        redis.call('ZADD', KEYS[1], tonumber(smallest[2]) + count, value)
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def sketch_cells(value: str, width: int, depth: int) -> List[int]:
+    """
+    Get the column of a value in every row of a Count-Min sketch.
+
+    Uses a stable hash, so all processes agree on the cells.
+
+    Args:
+        value: Counted value
+        width: Columns per row
+        depth: Number of rows
+
+    Returns:
+        Column index for each row
+    """
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "little")
+    second = int.from_bytes(digest[8:], "little") | 1
+    return [(first + row * second) % width for row in range(depth)]
+
+
+class CountMinSketch:
+    """Fixed-size frequency estimates; never underestimates."""
+
+    def __init__(self, width: int, depth: int):
+        """
+        Initialize sketch.
+
+        Args:
+            width: Columns per row (error shrinks as it grows)
+            depth: Number of rows (probability of a large error shrinks as it grows)
+        """
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def add(self, value: str, count: int = 1):
+        """Count a value."""
+        for row, column in enumerate(sketch_cells(value, self.width, self.depth)):
+            self.rows[row][column] += count
+
+    def estimate(self, value: str) -> int:
+        """Estimate how often a value was counted."""
+        return min(
+            self.rows[row][column]
+            for row, column in enumerate(sketch_cells(value, self.width, self.depth))
+        )
+
+
+class SpaceSaving:
+    """Heavy hitters of a stream in a fixed number of counters."""
+
+    def __init__(self, capacity: int):
+        """
+        Initialize summary.
+
+        Args:
+            capacity: Number of counters; every value more frequent than
+                total / capacity is guaranteed to be kept
+        """
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, value: str, count: int = 1):
+        """Count a value, replacing the smallest counter when full."""
+        if value in self.counts:
+            self.counts[value] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[value] = count
+        else:
+            smallest = min(self.counts, key=self.counts.get)
+            self.counts[value] = self.counts.pop(smallest) + count
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Get (value, count upper bound) pairs, most frequent first."""
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def _post_timestamp(date) -> Optional[int]:
+    """Get UTC timestamp of a post date (naive datetimes are UTC)."""
+    if isinstance(date, str):
+        try:
+            date = datetime.fromisoformat(date.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(date, datetime):
+        return None
+    return calendar.timegm(date.utctimetuple())
+
+
+def _domain(url: str) -> Optional[str]:
+    """Get host of a link without the "www." prefix."""
+    try:
+        host = urlparse(url).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return host[4:] if host.startswith("www.") else host
+
+
+def post_trend_values(post_data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Get values of a post that count towards trends.
+
+    Analyzed posts carry hashtags, mentions and links; raw posts (real-time
+    ingestion) are tokenized here.
+
+    Args:
+        post_data: Post dictionary
+
+    Returns:
+        Type -> unique lowercase values
+    """
+    if "hashtags" in post_data or "mentions" in post_data or "links" in post_data:
+        entities = {
+            "hashtag": post_data.get("hashtags") or [],
+            "mention": post_data.get("mentions") or [],
+            "url": post_data.get("links") or [],
+        }
+    else:
+        entities = extract_entities(post_data.get("text") or "", post_data.get("entities"))
+
+    return {
+        "hashtag": list(dict.fromkeys(value.lower() for value in entities["hashtag"])),
+        "mention": list(dict.fromkeys(value.lower() for value in entities["mention"])),
+        "domain": list(dict.fromkeys(filter(None, map(_domain, entities["url"])))),
+    }
+
+
+class InMemoryTrendStore:
+    """Trend sketches kept in process memory."""
+
+    def __init__(self, capacity: int, width: int, depth: int, retention_buckets: int):
+        """
+        Initialize store.
+
+        Args:
+            capacity: Space-Saving counters per type and bucket
+            width: Count-Min sketch columns
+            depth: Count-Min sketch rows
+            retention_buckets: Buckets kept before the newest one
+        """
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self.retention_buckets = retention_buckets
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, int], Tuple[SpaceSaving, CountMinSketch]] = {}
+
+    def add(self, counts: Dict[Tuple[str, int], Counter]):
+        """
+        Count values.
+
+        Args:
+            counts: (type, bucket) -> value counts
+        """
+        with self._lock:
+            for key, values in counts.items():
+                entry = self._buckets.get(key)
+                if entry is None:
+                    entry = self._buckets[key] = (SpaceSaving(self.capacity), CountMinSketch(self.width, self.depth))
+                summary, sketch = entry
+                for value, count in values.items():
+                    summary.add(value, count)
+                    sketch.add(value, count)
+
+            newest = max((bucket for _, bucket in self._buckets), default=0)
+            for key in [key for key in self._buckets if key[1] < newest - self.retention_buckets]:
+                del self._buckets[key]
+
+    def candidates(self, trend_type: str, buckets: Iterable[int], limit: int) -> List[str]:
+        """
+        Get heavy hitters of a type over buckets.
+
+        Args:
+            trend_type: Entity type
+            buckets: Bucket numbers
+            limit: Maximum number of values
+
+        Returns:
+            Values with the highest summed counter, most frequent first
+        """
+        totals = Counter()
+        with self._lock:
+            for bucket in buckets:
+                entry = self._buckets.get((trend_type, bucket))
+                if entry is not None:
+                    totals.update(entry[0].counts)
+        return [value for value, _ in totals.most_common(limit)]
+
+    def estimate(self, trend_type: str, buckets: Iterable[int], values: List[str]) -> Dict[int, Dict[str, int]]:
+        """
+        Estimate counts of values per bucket.
+
+        Args:
+            trend_type: Entity type
+            buckets: Bucket numbers
+            values: Values to estimate
+
+        Returns:
+            Bucket -> value -> estimated count (buckets without data are left out)
+        """
+        estimates = {}
+        with self._lock:
+            for bucket in buckets:
+                entry = self._buckets.get((trend_type, bucket))
+                if entry is not None:
+                    estimates[bucket] = {value: entry[1].estimate(value) for value in values}
+        return estimates
+
+
+class RedisTrendStore:
+    """Trend sketches stored in Redis and shared by the API and all workers."""
+
+    def __init__(
+        self,
+        capacity: int,
+        width: int,
+        depth: int,
+        retention_buckets: int,
+        bucket_seconds: int,
+        redis_url: Optional[str] = None
+    ):
+        """
+        Initialize store.
+
+        Args:
+            capacity: Space-Saving counters per type and bucket
+            width: Count-Min sketch columns
+            depth: Count-Min sketch rows
+            retention_buckets: Buckets kept before the newest one
+            bucket_seconds: Bucket width, sets key expiry
+            redis_url: Redis connection URL
+        """
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self.ttl = (retention_buckets + 2) * bucket_seconds
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.fallback = InMemoryTrendStore(capacity, width, depth, retention_buckets)
+        self._client = None
+
+    def _get_client(self):
+        """Get synchronous Redis client."""
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def _key(self, trend_type: str, bucket: int, kind: str) -> str:
+        """Build key of the summary ("top") or sketch ("cms") of a bucket."""
+        return f"{KEY_PREFIX}:{trend_type}:{bucket}:{kind}"
+
+    def add(self, counts: Dict[Tuple[str, int], Counter]):
+        """Count values (see InMemoryTrendStore.add)."""
+        from redis.exceptions import RedisError
+
+        try:
+            pipe = self._get_client().pipeline(transaction=False)
+            for (trend_type, bucket), values in counts.items():
+                cms_key = self._key(trend_type, bucket, "cms")
+                arguments = [self.capacity, self.ttl]
+                cells = Counter()
+                for value, count in values.items():
+                    arguments.extend((value, count))
+                    for row, column in enumerate(sketch_cells(value, self.width, self.depth)):
+                        cells[f"{row}:{column}"] += count
+                for field, count in cells.items():
+                    pipe.hincrby(cms_key, field, count)
+                pipe.expire(cms_key, self.ttl)
+                pipe.eval(_SPACE_SAVING_SCRIPT, 1, self._key(trend_type, bucket, "top"), *arguments)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Redis trend store unavailable, counting in process memory: {e}")
+            self.fallback.add(counts)
+
+    def candidates(self, trend_type: str, buckets: Iterable[int], limit: int) -> List[str]:
+        """Get heavy hitters of a type over buckets (see InMemoryTrendStore.candidates)."""
+        from redis.exceptions import RedisError
+
+        buckets = list(buckets)
+        try:
+            pipe = self._get_client().pipeline(transaction=False)
+            for bucket in buckets:
+                pipe.zrevrange(self._key(trend_type, bucket, "top"), 0, -1, withscores=True)
+            results = pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Redis trend store unavailable, reading process memory: {e}")
+            return self.fallback.candidates(trend_type, buckets, limit)
+
+        totals = Counter()
+        for members in results:
+            for value, count in members:
+                totals[value.decode("utf-8")] += int(count)
+        return [value for value, _ in totals.most_common(limit)]
+
+    def estimate(self, trend_type: str, buckets: Iterable[int], values: List[str]) -> Dict[int, Dict[str, int]]:
+        """Estimate counts of values per bucket (see InMemoryTrendStore.estimate)."""
+        from redis.exceptions import RedisError
+
+        buckets = list(buckets)
+        cells = {value: sketch_cells(value, self.width, self.depth) for value in values}
+        fields = [f"{row}:{column}" for value in values for row, column in enumerate(cells[value])]
+        if not fields:
+            return {}
+        try:
+            pipe = self._get_client().pipeline(transaction=False)
+            for bucket in buckets:
+                pipe.hmget(self._key(trend_type, bucket, "cms"), fields)
+            results = pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Redis trend store unavailable, reading process memory: {e}")
+            return self.fallback.estimate(trend_type, buckets, values)
+
+        estimates = {}
+        for bucket, counters in zip(buckets, results):
+            if not any(counters):
+                continue
+            counters = [int(counter or 0) for counter in counters]
+            estimates[bucket] = {
+                value: min(counters[index * self.depth:(index + 1) * self.depth])
+                for index, value in enumerate(values)
+            }
+        return estimates
+
+
+class TrendDetector:
+    """Counts entities of ingested posts and scores bursts against a baseline."""
+
+    def __init__(
+        self,
+        store=None,
+        bucket_seconds: Optional[int] = None,
+        window_buckets: Optional[int] = None,
+        baseline_buckets: Optional[int] = None,
+        clock=time.time
+    ):
+        """
+        Initialize detector.
+
+        Args:
+            store: Trend store (configured from TRENDS_BACKEND if not given)
+            bucket_seconds: Bucket width (TRENDS_BUCKET_SECONDS if not given)
+            window_buckets: Recent buckets counted as "now" (TRENDS_WINDOW_BUCKETS if not given)
+            baseline_buckets: Older buckets forming the baseline (TRENDS_BASELINE_BUCKETS if not given)
+            clock: Time source (Unix seconds), injectable for tests
+        """
+        self.bucket_seconds = bucket_seconds or settings.TRENDS_BUCKET_SECONDS
+        self.window_buckets = window_buckets or settings.TRENDS_WINDOW_BUCKETS
+        self.baseline_buckets = baseline_buckets or settings.TRENDS_BASELINE_BUCKETS
+        self._clock = clock
+        if store is None:
+            retention = self.window_buckets + self.baseline_buckets
+            if settings.TRENDS_BACKEND == "redis":
+                store = RedisTrendStore(
+                    settings.TRENDS_CAPACITY,
+                    settings.TRENDS_SKETCH_WIDTH,
+                    settings.TRENDS_SKETCH_DEPTH,
+                    retention,
+                    self.bucket_seconds
+                )
+            else:
+                store = InMemoryTrendStore(
+                    settings.TRENDS_CAPACITY,
+                    settings.TRENDS_SKETCH_WIDTH,
+                    settings.TRENDS_SKETCH_DEPTH,
+                    retention
+                )
+        self.store = store
+
+    def _current_bucket(self) -> int:
+        """Get number of the bucket containing now."""
+        return int(self._clock()) // self.bucket_seconds
+
+    def record(self, posts: Iterable[Dict[str, Any]]) -> int:
+        """
+        Count hashtags, mentions and link domains of newly stored posts.
+
+        Posts older than the baseline (e.g. from history backfills) are ignored.
+
+        Args:
+            posts: Post dictionaries with date and entities (or text)
+
+        Returns:
+            Number of posts counted
+        """
+        current = self._current_bucket()
+        oldest = current - self.window_buckets - self.baseline_buckets + 1
+        counts: Dict[Tuple[str, int], Counter] = defaultdict(Counter)
+        counted = 0
+        for post_data in posts:
+            timestamp = _post_timestamp(post_data.get("date"))
+            if timestamp is None:
+                continue
+            # Clock skew must not create buckets in the future
+            bucket = min(timestamp // self.bucket_seconds, current)
+            if bucket < oldest:
+                continue
+            counted += 1
+            for trend_type, values in post_trend_values(post_data).items():
+                counts[(trend_type, bucket)].update(values)
+
+        if counts:
+            self.store.add(counts)
+        return counted
+
+    def trends(
+        self,
+        trend_types: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        min_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Score current heavy hitters against their baseline.
+
+        Args:
+            trend_types: Entity types (all if not given)
+            limit: Trends per type (TRENDS_LIMIT if not given)
+            min_count: Minimum posts in the window (TRENDS_MIN_COUNT if not given)
+
+        Returns:
+            Window bounds and, per type, values with count, baseline count and
+            burst score, highest score first
+        """
+        limit = limit or settings.TRENDS_LIMIT
+        min_count = min_count or settings.TRENDS_MIN_COUNT
+        current = self._current_bucket()
+        window = list(range(current - self.window_buckets + 1, current + 1))
+        baseline = list(range(window[0] - self.baseline_buckets, window[0]))
+
+        result = {
+            "window_start": datetime.utcfromtimestamp(window[0] * self.bucket_seconds),
+            "window_end": datetime.utcfromtimestamp((current + 1) * self.bucket_seconds),
+            "trends": {},
+        }
+        for trend_type in trend_types or TREND_TYPES:
+            # Scoring more candidates than returned lets bursts outrank steady favourites
+            candidates = self.store.candidates(trend_type, window, limit * settings.TRENDS_CANDIDATE_FACTOR)
+            estimates = self.store.estimate(trend_type, window + baseline, candidates)
+
+            scored = []
+            for value in candidates:
+                count = sum(estimates.get(bucket, {}).get(value, 0) for bucket in window)
+                if count < min_count:
+                    continue
+                baseline_count = sum(estimates.get(bucket, {}).get(value, 0) for bucket in baseline)
+                expected = baseline_count * len(window) / len(baseline)
+                scored.append({
+                    "value": value,
+                    "count": count,
+                    "baseline_count": baseline_count,
+                    "score": round((count - expected) / math.sqrt(expected + 1), 3),
+                })
+
+            scored.sort(key=lambda trend: (trend["score"], trend["count"]), reverse=True)
+            result["trends"][trend_type] = scored[:limit]
+        return result
+
+
+_trend_detector: Optional[TrendDetector] = None
+
+
+def get_trend_detector() -> TrendDetector:
+    """
+    Get process-wide trend detector configured from settings.
+
+    Returns:
+        Shared TrendDetector instance
+    """
+    global _trend_detector
+    if _trend_detector is None:
+        _trend_detector = TrendDetector()
+    return _trend_detector
+
+
+def record_trends(posts: Iterable[Dict[str, Any]]):
+    """
+    Feed newly stored posts to the shared trend detector.
+
+    Trends are best effort, errors are logged and never fail ingestion.
+
+    Args:
+        posts: Post dictionaries with date and entities (or text)
+    """
+    try:
+        get_trend_detector().record(posts)
+    except Exception as e:
+        logger.warning(f"Error recording trends: {e}")
@@ -4,7 +4,7 @@ Main FastAPI application entry point.
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.routers import channels, posts, export
+from app.api.routers import channels, posts, export, system, trends
 
 app = FastAPI(
     title="Telegram Content Parser & Analyzer API",
@@ -25,6 +25,8 @@ app.add_middleware(
 app.include_router(channels.router)
 app.include_router(posts.router)
 app.include_router(export.router)
+app.include_router(system.router)
+app.include_router(trends.router)
 
 
 @app.get("/health")
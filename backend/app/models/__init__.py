@@ -4,6 +4,13 @@ Initialize all models.
 from app.models.channel import Channel
 from app.models.post import Post
 from app.models.user import User
+from app.models.telegram_peer import TelegramPeer
+from app.models.backfill_chunk import BackfillChunk
+from app.models.keyword_frequency import KeywordDocumentFrequency
+from app.models.checked_post_gap import CheckedPostGap
 
-__all__ = ["Channel", "Post", "User"]
+__all__ = [
+    "Channel", "Post", "User", "TelegramPeer", "BackfillChunk", "KeywordDocumentFrequency",
+    "CheckedPostGap"
+]
 
@@ -0,0 +1,36 @@
+"""
+Backfill chunk model for resumable full-history parsing.
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Boolean, ForeignKey, UniqueConstraint
+from datetime import datetime
+from app.core.database import Base
+
+
+class BackfillChunk(Base):
+    """Message ID range of a channel backfill and its progress."""
+    
+    __tablename__ = "backfill_chunks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    channel_id = Column(Integer, ForeignKey("channels.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Message ID range, both bounds exclusive (Telethon min_id/max_id semantics)
+    min_id = Column(BigInteger, nullable=False)
+    max_id = Column(BigInteger, nullable=False)
+    cursor_id = Column(BigInteger, nullable=True)  # Highest message ID committed so far
+    use_takeout = Column(Boolean, default=False)  # Fetch through a takeout session
+    
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending, queued, running, done, failed
+    posts_count = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        UniqueConstraint('channel_id', 'min_id', name='uq_backfill_chunk_channel_min_id'),
+    )
+    
+    def __repr__(self):
+        return f"<BackfillChunk(channel_id={self.channel_id}, range=({self.min_id}, {self.max_id}), status={self.status})>"
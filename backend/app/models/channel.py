@@ -1,7 +1,7 @@
 """
 Channel model for storing Telegram channel information.
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -23,6 +23,12 @@ class Channel(Base):
     is_active = Column(Boolean, default=True)
     parse_mode = Column(String(50), default="new_only")  # "new_only" or "full_history"
     last_parsed_at = Column(DateTime, nullable=True)
+    last_message_id = Column(BigInteger, nullable=True)  # Highest ingested Telegram message ID
+    last_post_at = Column(DateTime, nullable=True)  # Newest stored post date, kept by upsert_posts()
+    next_poll_at = Column(DateTime, nullable=True, index=True)  # Set by the polling scheduler
+    failure_count = Column(Integer, default=0)  # Consecutive failed parses
+    last_error = Column(Text, nullable=True)
+    dead_lettered_at = Column(DateTime, nullable=True, index=True)  # Not polled until requeued
     
     # Relationships
     posts = relationship("Post", back_populates="channel", cascade="all, delete-orphan")
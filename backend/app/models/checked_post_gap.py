@@ -0,0 +1,29 @@
+"""
+Checked post gap model for message ID ranges already fetched once.
+"""
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from datetime import datetime
+from app.core.database import Base
+
+
+class CheckedPostGap(Base):
+    """Missing message ID range of a channel that was fetched from Telegram."""
+    
+    __tablename__ = "checked_post_gaps"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    channel_id = Column(
+        Integer, ForeignKey("channels.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    
+    # Inclusive range; whatever is still missing inside it was deleted or a service message
+    first_id = Column(BigInteger, nullable=False)
+    last_id = Column(BigInteger, nullable=False)
+    
+    checked_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return (
+            f"<CheckedPostGap(channel_id={self.channel_id}, "
+            f"range=({self.first_id}, {self.last_id}))>"
+        )
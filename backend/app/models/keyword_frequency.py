@@ -0,0 +1,18 @@
+"""
+Keyword document frequency model for TF-IDF keyword scoring.
+"""
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+
+class KeywordDocumentFrequency(Base):
+    """Number of posts containing a term, per channel and over all channels."""
+    
+    __tablename__ = "keyword_document_frequencies"
+    
+    channel_id = Column(Integer, primary_key=True, autoincrement=False)  # 0 = all channels
+    term = Column(String(100), primary_key=True)  # Lemma; "" counts all posts of the scope
+    document_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<KeywordDocumentFrequency(channel_id={self.channel_id}, term={self.term}, count={self.document_count})>"
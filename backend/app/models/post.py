@@ -1,7 +1,8 @@
 """
 Post model for storing Telegram post data.
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, JSON, Index
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, JSON, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -35,6 +36,12 @@ class Post(Base):
     mentions = Column(JSON, nullable=True)  # List of mentions
     links = Column(JSON, nullable=True)  # List of URLs
     
+    # Content analysis
+    category = Column(String(50), nullable=True, index=True)  # Best matching taxonomy category
+    keywords = Column(ARRAY(Text), nullable=True)  # Keyword lemmas, best first
+    reading_time = Column(Integer, nullable=True)  # Seconds
+    analyzer_version = Column(String(100), nullable=True)  # ContentAnalyzerAgent.cache_version() of the fields above
+    
     # Metadata
     parsed_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -45,8 +52,11 @@ class Post(Base):
     
     # Indexes for full-text search
     __table_args__ = (
+        UniqueConstraint('channel_id', 'post_id', name='uq_post_channel_post_id'),
         Index('idx_post_text_search', 'text', postgresql_ops={'text': 'gin_trgm_ops'}),
         Index('idx_post_date_channel', 'date', 'channel_id'),
+        Index('idx_post_channel_date', 'channel_id', 'date'),
+        Index('idx_post_keywords', 'keywords', postgresql_using='gin'),
     )
     
     def __repr__(self):
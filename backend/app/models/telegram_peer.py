@@ -0,0 +1,21 @@
+"""
+Telegram peer model for caching resolved channel usernames.
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class TelegramPeer(Base):
+    """Resolved Telegram peer (id + access_hash) keyed by username."""
+    
+    __tablename__ = "telegram_peers"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String(255), unique=True, nullable=False, index=True)  # Lowercase, without @
+    peer_id = Column(BigInteger, nullable=False)  # Telegram channel ID
+    access_hash = Column(BigInteger, nullable=False)
+    resolved_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<TelegramPeer(username={self.username}, peer_id={self.peer_id})>"
@@ -35,6 +35,11 @@ class ChannelResponse(ChannelBase):
     updated_at: datetime
     is_active: bool
     last_parsed_at: Optional[datetime] = None
+    last_message_id: Optional[int] = None
+    next_poll_at: Optional[datetime] = None
+    failure_count: Optional[int] = 0
+    last_error: Optional[str] = None
+    dead_lettered_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
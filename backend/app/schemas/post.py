@@ -14,7 +14,7 @@ class PostBase(BaseModel):
     author: Optional[str] = None
     views: int = 0
     likes: int = 0
-    content_type: str = Field(..., pattern="^(text|photo|video|document|link|poll|mixed)$")
+    content_type: str = Field(..., pattern="^(text|photo|video|document|link|poll|mixed|photo_gallery|media_only)$")
 
 
 class PostCreate(PostBase):
@@ -42,6 +42,9 @@ class PostResponse(PostBase):
     hashtags: Optional[List[str]] = None
     mentions: Optional[List[str]] = None
     links: Optional[List[str]] = None
+    category: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    reading_time: Optional[int] = None
     parsed_at: datetime
     created_at: datetime
     updated_at: datetime
@@ -0,0 +1,3 @@
+"""
+Performance benchmarks, run offline against the replay Telegram client.
+"""
@@ -0,0 +1,105 @@
+"""
+Cold-start import benchmark for the API and worker entry points.
+
+Imports a module in fresh interpreters (-X importtime), reports the
+median wall time, the slowest imported packages and any heavy dependency
+that should only load on first use. Exits with status 1 when the import
+is slower than --max-seconds or pulls in a deferred dependency, so it
+can guard cold-start latency in CI.
+
+Usage (from backend/):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --module app.core.celery --allow telethon
+    python -m benchmarks.import_time --max-seconds 2.5 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+# Loaded on first use: spaCy models (analysis), telethon (parsing), openpyxl/pandas (export)
+DEFERRED_MODULES = ["spacy", "telethon", "openpyxl", "pandas", "celery"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "modules": sorted(sys.modules)}}))
+"""
+
+
+def _import_once(module: str) -> Dict[str, Any]:
+    """Import module in a fresh interpreter, returning its timing and import tree."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        check=True
+    )
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # Lines look like "import time:  self [us] | cumulative | package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if "." not in name:
+            cumulative[name] = max(cumulative.get(name, 0), int(cumulative_us))
+    probe["top_level_us"] = cumulative
+    return probe
+
+
+def run_benchmark(module: str = "app.main", runs: int = 3, allow: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Measure cold import of a module.
+
+    Args:
+        module: Module to import
+        runs: Fresh interpreters to average over
+        allow: Deferred modules this entry point may import
+
+    Returns:
+        Dictionary with median seconds, slowest packages and deferred modules loaded
+    """
+    probes = [_import_once(module) for _ in range(runs)]
+    last = probes[-1]
+    loaded = set(last["modules"])
+    deferred = [name for name in DEFERRED_MODULES if name in loaded and name not in (allow or [])]
+    slowest = sorted(last["top_level_us"].items(), key=lambda item: item[1], reverse=True)[:10]
+
+    return {
+        "module": module,
+        "runs": runs,
+        "median_seconds": round(statistics.median(probe["seconds"] for probe in probes), 3),
+        "slowest_packages_ms": {name: round(us / 1000, 1) for name, us in slowest},
+        "deferred_modules_loaded": deferred,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail when the median import is slower")
+    parser.add_argument("--allow", nargs="*", default=[], help="Deferred modules the entry point may import")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.module, args.runs, args.allow)
+    print(json.dumps(result, indent=2))
+
+    failed = bool(result["deferred_modules_loaded"])
+    if args.max_seconds is not None and result["median_seconds"] > args.max_seconds:
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
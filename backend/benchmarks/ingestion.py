@@ -0,0 +1,194 @@
+"""
+Ingestion throughput benchmark on the offline replay client.
+
+Measures posts/sec, Telegram API calls per post and peak RSS of the parser
+(and optionally the database writer) for "new_only" and "full_history"
+runs. Every mode runs in a fresh process so peak RSS is not shared.
+
+Usage (from backend/):
+    python -m benchmarks.ingestion --messages 1000000 --latency-ms 50
+    python -m benchmarks.ingestion --modes new_only --new-messages 300 --write-db
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.agents.channel_parser import ChannelParserAgent
+from app.core.entity_cache import EntityCache
+from app.core.rate_limiter import InMemoryTokenBucket, TelegramRateLimiter
+from app.core.replay_client import ReplayTelegramClient, SyntheticChannel
+
+BENCH_CHANNEL = "bench_channel"
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+
+async def _write_to_database(batches) -> int:
+    """Ingest batches into a scratch channel and remove it afterwards."""
+    from app.core.database import SessionLocal
+    from app.core.ingestion import ingest_post_batches
+    from app.models.channel import Channel
+    from app.models.post import Post
+
+    db = SessionLocal()
+    channel = Channel(channel_username=f"{BENCH_CHANNEL}_{time.time_ns()}", channel_name="Benchmark")
+    db.add(channel)
+    db.commit()
+    try:
+        counts = await ingest_post_batches(db, channel.id, batches)
+        return sum(counts.values())
+    finally:
+        db.query(Post).filter_by(channel_id=channel.id).delete()
+        db.delete(channel)
+        db.commit()
+        db.close()
+
+
+async def _run(
+    mode: str,
+    messages: int,
+    new_messages: int,
+    latency_ms: float,
+    page_size: int,
+    flood_wait_every: int,
+    batch_size: int,
+    write_db: bool
+) -> Dict[str, Any]:
+    """Parse one replayed channel and collect measurements."""
+    client = ReplayTelegramClient(
+        [SyntheticChannel(BENCH_CHANNEL, messages)],
+        latency=latency_ms / 1000,
+        page_size=page_size,
+        flood_wait_every=flood_wait_every
+    )
+    # Effectively unlimited budget: measure the pipeline, not the throttle
+    limiter = TelegramRateLimiter(InMemoryTokenBucket(capacity=10 ** 6, rate=10 ** 6))
+    parser = ChannelParserAgent(
+        rate_limiter=limiter,
+        client=client,
+        entity_cache=EntityCache(),
+        takeout_rate_limiter=limiter
+    )
+
+    kwargs = {"parse_mode": mode}
+    if mode == "new_only":
+        kwargs.update(min_id=messages - new_messages, reverse=True)
+
+    started = time.perf_counter()
+    batches = parser.iter_post_batches(BENCH_CHANNEL, batch_size, **kwargs)
+    if write_db:
+        posts = await _write_to_database(batches)
+    else:
+        posts = 0
+        async for batch in batches:
+            posts += len(batch)
+    elapsed = time.perf_counter() - started
+
+    limiter_stats = await limiter.get_stats()
+    return {
+        "mode": mode,
+        "posts": posts,
+        "seconds": round(elapsed, 3),
+        "posts_per_second": round(posts / elapsed, 1) if elapsed else None,
+        "api_calls": client.stats["requests"],
+        "api_calls_per_post": round(client.stats["requests"] / posts, 4) if posts else None,
+        "flood_waits": int(limiter_stats["flood_waits"]),
+        "peak_rss_mb": peak_rss_mb(),
+        "write_db": write_db,
+    }
+
+
+def run_benchmark(
+    mode: str,
+    messages: int = 100000,
+    new_messages: int = 500,
+    latency_ms: float = 0.0,
+    page_size: int = 100,
+    flood_wait_every: int = 0,
+    batch_size: int = 500,
+    write_db: bool = False
+) -> Dict[str, Any]:
+    """
+    Run one benchmark in the current process.
+
+    Args:
+        mode: "new_only" (fetch new_messages after a checkpoint) or "full_history"
+        messages: Size of the replayed channel
+        new_messages: Messages after the checkpoint in "new_only" mode
+        latency_ms: Latency of every API request
+        page_size: Messages per history request
+        flood_wait_every: Inject a 1 second FloodWaitError every N requests
+        batch_size: Posts per ingestion batch
+        write_db: Write posts to the configured database
+
+    Returns:
+        Dictionary with posts, posts/sec, API calls per post, flood waits and peak RSS
+    """
+    return asyncio.run(_run(
+        mode, messages, new_messages, latency_ms, page_size, flood_wait_every, batch_size, write_db
+    ))
+
+
+def run_isolated(modes: List[str], **kwargs) -> List[Dict[str, Any]]:
+    """Run every mode in a fresh process and collect results."""
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for mode in modes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(run_benchmark, mode, **kwargs).result())
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["new_only", "full_history"],
+                        choices=["new_only", "full_history"])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--new-messages", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--flood-wait-every", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--write-db", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_isolated(
+        args.modes,
+        messages=args.messages,
+        new_messages=args.new_messages,
+        latency_ms=args.latency_ms,
+        page_size=args.page_size,
+        flood_wait_every=args.flood_wait_every,
+        batch_size=args.batch_size,
+        write_db=args.write_db
+    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    columns = ["mode", "posts", "seconds", "posts_per_second", "api_calls_per_post", "flood_waits", "peak_rss_mb"]
+    print("  ".join(f"{column:>18}" for column in columns))
+    for result in results:
+        print("  ".join(f"{str(result[column]):>18}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
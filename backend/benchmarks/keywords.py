@@ -0,0 +1,82 @@
+"""
+Keyword extraction throughput benchmark.
+
+Compares per-post extraction with the full spaCy pipeline (the previous
+behaviour) against batched nlp.pipe extraction with trimmed pipelines,
+on synthetic English and Russian posts. Needs the NLP_MODEL_* packages.
+
+Usage (from backend/):
+    python -m benchmarks.keywords --posts 5000
+    python -m benchmarks.keywords --posts 20000 --batch-size 512 --processes 4
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from app.agents.content_analyzer import ContentAnalyzerAgent
+from app.core.nlp import NlpModelRegistry, detect_language
+
+_WORDS = {
+    "en": "release update library channel market price news company product report team model".split(),
+    "ru": "релиз обновление библиотека канал рынок цена новость компания продукт отчёт команда".split(),
+}
+
+
+def make_texts(posts: int, seed: int = 0) -> List[str]:
+    """Build synthetic posts, half English and half Russian."""
+    rng = random.Random(seed)
+    texts = []
+    for index in range(posts):
+        words = _WORDS["ru" if index % 2 else "en"]
+        texts.append(" ".join(rng.choice(words) for _ in range(rng.randint(20, 80))) + ".")
+    return texts
+
+
+def run_benchmark(posts: int = 5000, batch_size: int = 256, processes: int = 1) -> Dict[str, Any]:
+    """
+    Time per-post and batched keyword extraction over the same posts.
+
+    Returns:
+        Dictionary with posts/sec of both runs and the speedup
+    """
+    import spacy
+
+    texts = make_texts(posts)
+    registry = NlpModelRegistry()
+    analyzer = ContentAnalyzerAgent(nlp_registry=registry)
+    if not registry.is_available():
+        raise SystemExit("No spaCy model installed, see NLP_MODEL_* settings")
+
+    full = {language: spacy.load(name) for language, name in registry.models.items() if registry.get(language)}
+    started = time.perf_counter()
+    for text in texts:
+        full.get(detect_language(text), full[registry.default_language])(text)
+    per_post_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    analyzer.extract_keywords_batch(texts, batch_size=batch_size, n_process=processes)
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "posts": posts,
+        "per_post_posts_per_second": round(posts / per_post_seconds, 1),
+        "batch_posts_per_second": round(posts / batch_seconds, 1),
+        "speedup": round(per_post_seconds / batch_seconds, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.posts, args.batch_size, args.processes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Tests for the content-hash analysis cache.
+"""
+from types import SimpleNamespace
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.agents.content_analyzer import ContentAnalyzerAgent
+from app.core.analysis_cache import AnalysisCache, analysis_key, normalize_text
+from app.core.categorizer import TaxonomyCategorizer
+from app.core.nlp import NlpModelRegistry
+
+
+class FakeRedis:
+    """Minimal Redis stand-in for MGET and pipelined SET."""
+
+    def __init__(self, fail=False):
+        self.data = {}
+        self.fail = fail
+        self.ttls = {}
+
+    def mget(self, keys):
+        if self.fail:
+            raise RedisConnectionError("connection refused")
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8")
+        self.ttls[key] = ex
+
+    def execute(self):
+        if self.fail:
+            raise RedisConnectionError("connection refused")
+
+
+class TestAnalysisCache:
+    """Test LRU and Redis tiers."""
+
+    def test_normalized_copies_share_key(self):
+        """Test that whitespace and Unicode form differences do not change the key."""
+        first = analysis_key(normalize_text("Скидка  20%\n\nна всё"), "1")
+        second = analysis_key(normalize_text(" Скидка 20% на всё "), "1")
+
+        assert first == second
+        assert first != analysis_key(normalize_text("Скидка 20% на всё"), "2")
+
+    def test_lru_eviction(self):
+        """Test that the least recently used result is evicted."""
+        cache = AnalysisCache(maxsize=2, use_redis=False)
+        cache.set_many({"a": {"v": 1}, "b": {"v": 2}})
+        cache.get_many(["a"])
+        cache.set_many({"c": {"v": 3}})
+
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 3
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.75
+
+    def test_redis_tier(self):
+        """Test that results stored by one worker are found by another through Redis."""
+        redis = FakeRedis()
+        writer = AnalysisCache(maxsize=10, use_redis=True, ttl=60)
+        writer._client = redis
+        writer.set_many({"key": {"category": "news", "keywords": ["релиз"]}})
+
+        reader = AnalysisCache(maxsize=10, use_redis=True)
+        reader._client = redis
+
+        assert reader.get_many(["key", "other"]) == {"key": {"category": "news", "keywords": ["релиз"]}}
+        assert redis.ttls == {"key": 60}
+        assert reader.get_stats()["redis_hits"] == 1
+        # Promoted to process memory
+        reader.get_many(["key"])
+        assert reader.get_stats()["hits"] == 1
+
+    def test_redis_down(self):
+        """Test that the cache keeps working in process memory when Redis fails."""
+        cache = AnalysisCache(maxsize=10, use_redis=True)
+        cache._client = FakeRedis(fail=True)
+
+        cache.set_many({"key": {"v": 1}})
+
+        assert cache.get_many(["key"]) == {"key": {"v": 1}}
+        assert cache.get_many(["other"]) == {}
+        assert cache.get_stats()["redis_errors"] == 1
+
+
+class TestCachedAnalysis:
+    """Test that the analyzer reuses cached text analysis."""
+
+    def _analyzer(self, cache, taxonomy_path=""):
+        """Analyzer counting texts sent to spaCy."""
+        piped = []
+
+        class FakeModel:
+            def pipe(self, texts, batch_size=1000, n_process=1):
+                texts = list(texts)
+                piped.extend(texts)
+                for text in texts:
+                    yield [
+                        SimpleNamespace(pos_="NOUN", lemma_=word, is_stop=False, is_punct=False)
+                        for word in text.split()
+                    ]
+
+        analyzer = ContentAnalyzerAgent(
+            nlp_registry=NlpModelRegistry(models={"en": "fake"}, loader=lambda name: FakeModel()),
+            categorizer=TaxonomyCategorizer(path=taxonomy_path),
+            cache=cache
+        )
+        return analyzer, piped
+
+    def test_duplicates_analyzed_once(self):
+        """Test that reposted texts skip keyword extraction."""
+        analyzer, piped = self._analyzer(AnalysisCache(maxsize=100, use_redis=False))
+        footer = "Breaking news #daily via @channel"
+        posts = [
+            {"post_id": "1", "text": footer, "views": 100, "likes": 1},
+            {"post_id": "2", "text": footer + "\n", "views": 200, "likes": 50},
+            {"post_id": "3", "text": "Other post", "views": 10, "likes": 0},
+        ]
+
+        analyzed = analyzer.analyze_posts_batch(posts)
+        analyzer.analyze_post({"post_id": "4", "text": footer, "views": 1, "likes": 0})
+
+        assert piped == [footer, "Other post"]
+        assert analyzed[0]["category"] == analyzed[1]["category"] == "news"
+        assert analyzed[1]["hashtags"] == ["#daily"]
+        assert analyzed[1]["mentions"] == ["@channel"]
+        # Per-post metrics are never taken from the cache
+        assert analyzed[0]["engagement_rate"] == 0.01
+        assert analyzed[1]["engagement_rate"] == 0.25
+        assert analyzer.cache.get_stats()["hits"] == 1
+
+    def test_cached_lists_not_shared(self):
+        """Test that changing an analyzed post does not change the cached result."""
+        analyzer, _ = self._analyzer(AnalysisCache(maxsize=100, use_redis=False))
+
+        first = analyzer.analyze_post({"post_id": "1", "text": "#a", "views": 1, "likes": 0})
+        first["hashtags"].append("#b")
+
+        assert analyzer.analyze_post({"post_id": "2", "text": "#a", "views": 1, "likes": 0})["hashtags"] == ["#a"]
+
+    def test_taxonomy_change_invalidates(self, tmp_path):
+        """Test that results cached under another taxonomy are not reused."""
+        path = tmp_path / "taxonomy.json"
+        path.write_text('{"crypto": ["bitcoin"]}', encoding="utf-8")
+        cache = AnalysisCache(maxsize=100, use_redis=False)
+        analyzer, piped = self._analyzer(cache)
+        analyzer.analyze_post({"post_id": "1", "text": "bitcoin", "views": 1, "likes": 0})
+
+        other, other_piped = self._analyzer(cache, taxonomy_path=str(path))
+        analyzed = other.analyze_post({"post_id": "1", "text": "bitcoin", "views": 1, "likes": 0})
+
+        assert analyzed["category"] == "crypto"
+        assert other_piped == ["bitcoin"]
@@ -0,0 +1,105 @@
+"""
+Tests for chunked full-history backfill.
+"""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app.core import backfill
+from app.core.backfill import (
+    get_backfill_progress, plan_backfill, queue_pending_chunks, reset_stale_chunks, should_use_takeout
+)
+from app.models.backfill_chunk import BackfillChunk
+from app.models.channel import Channel
+
+
+class TestBackfillPlanning:
+    """Test backfill chunk planning and queueing."""
+
+    @pytest.fixture
+    def channel(self, db_session):
+        """Create test channel."""
+        channel = Channel(channel_username="test_channel", channel_name="Test Channel")
+        db_session.add(channel)
+        db_session.commit()
+        return channel
+
+    def test_plan_covers_all_ids(self, db_session, channel):
+        """Test that chunks cover every message ID exactly once."""
+        chunks = plan_backfill(db_session, channel.id, 250, chunk_size=100)
+
+        assert [(chunk.min_id, chunk.max_id) for chunk in chunks] == [(0, 101), (100, 201), (200, 251)]
+
+    def test_plan_extends_existing(self, db_session, channel):
+        """Test that planning again only adds chunks for new messages."""
+        plan_backfill(db_session, channel.id, 250, chunk_size=100)
+
+        assert plan_backfill(db_session, channel.id, 250, chunk_size=100) == []
+        chunks = plan_backfill(db_session, channel.id, 320, chunk_size=100)
+        assert [(chunk.min_id, chunk.max_id) for chunk in chunks] == [(250, 321)]
+
+    def test_queue_respects_parallel_limit(self, db_session, channel):
+        """Test that at most BACKFILL_PARALLEL_CHUNKS chunks are active, newest first."""
+        plan_backfill(db_session, channel.id, 500, chunk_size=100)
+
+        with patch.object(backfill.settings, "BACKFILL_PARALLEL_CHUNKS", 2):
+            first = queue_pending_chunks(db_session, channel.id)
+            second = queue_pending_chunks(db_session, channel.id)
+
+        queued = db_session.query(BackfillChunk).filter(BackfillChunk.id.in_(first)).all()
+        assert sorted(chunk.max_id for chunk in queued) == [401, 501]
+        assert second == []
+
+    def test_reset_stale_chunks(self, db_session, channel):
+        """Test that failed and abandoned chunks return to pending."""
+        chunks = plan_backfill(db_session, channel.id, 400, chunk_size=100)
+        now = datetime.utcnow()
+        chunks[0].status = "failed"
+        chunks[1].status = "running"
+        chunks[1].updated_at = now - timedelta(hours=2)
+        chunks[2].status = "running"
+        chunks[2].updated_at = now
+        chunks[3].status = "done"
+        db_session.commit()
+
+        assert reset_stale_chunks(db_session, channel.id, now) == 2
+
+        db_session.expire_all()
+        assert [chunk.status for chunk in chunks] == ["pending", "pending", "running", "done"]
+
+    def test_progress(self, db_session, channel):
+        """Test that progress counts finished chunks and cursors."""
+        chunks = plan_backfill(db_session, channel.id, 400, chunk_size=100)
+        chunks[0].status = "done"
+        chunks[0].posts_count = 90
+        chunks[1].status = "running"
+        chunks[1].cursor_id = 150
+        chunks[1].posts_count = 40
+        db_session.commit()
+
+        progress = get_backfill_progress(db_session, channel.id)
+
+        assert progress["chunks"] == 4
+        assert progress["done"] == 1
+        assert progress["running"] == 1
+        assert progress["pending"] == 2
+        assert progress["posts"] == 130
+        assert progress["progress"] == pytest.approx(150 / 400)
+        assert not progress["complete"]
+
+    def test_takeout_for_initial_large_backfill(self, db_session, channel):
+        """Test that only initial backfills of large channels use takeout."""
+        threshold = backfill.settings.TAKEOUT_MIN_MESSAGES
+
+        assert not should_use_takeout(db_session, channel.id, threshold - 1)
+        assert should_use_takeout(db_session, channel.id, threshold)
+
+        plan_backfill(db_session, channel.id, threshold, use_takeout=True)
+        assert get_backfill_progress(db_session, channel.id)["takeout_chunks"] > 0
+        assert not should_use_takeout(db_session, channel.id, threshold * 2)
+
+    def test_no_takeout_for_stored_channel(self, db_session, channel):
+        """Test that channels with ingested posts are not re-exported by takeout."""
+        channel.last_message_id = 10
+        db_session.commit()
+
+        assert not should_use_takeout(db_session, channel.id, backfill.settings.TAKEOUT_MIN_MESSAGES)
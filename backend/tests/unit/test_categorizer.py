@@ -0,0 +1,111 @@
+"""
+Tests for the taxonomy keyword categorizer.
+"""
+import json
+import os
+from app.core.categorizer import DEFAULT_TAXONOMY, KeywordAutomaton, TaxonomyCategorizer
+
+
+class TestKeywordAutomaton:
+    """Test single-pass multi-keyword matching."""
+
+    def test_word_boundaries(self):
+        """Test that keywords match whole words unless they end with '*'."""
+        automaton = KeywordAutomaton({"ads": ["ad"], "news": ["новост*"]})
+
+        assert automaton.rank("Read the ad below") == [("ads", 1.0)]
+        assert automaton.rank("Bad address, loading...") == []
+        assert automaton.rank("Главные НОВОСТИ дня") == [("news", 1.0)]
+        assert automaton.rank("Нет новостей") == [("news", 1.0)]
+        assert automaton.rank("Сверхновость") == []
+
+    def test_phrases_and_overlaps(self):
+        """Test phrases and keywords that are suffixes of each other."""
+        automaton = KeywordAutomaton({
+            "edu": ["how to", "to"],
+            "pronouns": ["he", "she", "hers"],
+        })
+
+        assert automaton.scores("How to: she and hers") == {"edu": 2.0, "pronouns": 2.0}
+        assert automaton.scores("ushers, shows") == {}
+
+    def test_ranking(self):
+        """Test that categories are ranked by weighted matches, ties in taxonomy order."""
+        automaton = KeywordAutomaton({
+            "news": ["news", "update*"],
+            "advertisement": {"weight": 3.0, "keywords": ["sale"]},
+            "entertainment": ["meme*"],
+        })
+
+        assert automaton.rank("News update: memes") == [("news", 2.0), ("entertainment", 1.0)]
+        assert automaton.rank("Sale news") == [("advertisement", 3.0), ("news", 1.0)]
+        assert automaton.rank("meme news") == [("news", 1.0), ("entertainment", 1.0)]
+
+    def test_ё_is_е(self):
+        """Test that 'ё' and 'е' match each other."""
+        automaton = KeywordAutomaton({"fun": ["ёлка"]})
+
+        assert automaton.rank("Новогодняя елка") == [("fun", 1.0)]
+
+    def test_default_taxonomy(self):
+        """Test that the built-in taxonomy covers RU and EN texts."""
+        automaton = KeywordAutomaton(DEFAULT_TAXONOMY)
+
+        assert automaton.rank("Последние обновления и новости")[0] == ("news", 2.0)
+        assert automaton.rank("Скидки 50% по промокоду")[0] == ("advertisement", 2.0)
+        assert automaton.rank("Random text without keywords") == []
+
+    def test_thousands_of_keywords(self):
+        """Test that large taxonomies still match exactly."""
+        taxonomy = {f"category_{i}": [f"keyword{i}", f"phrase {i} here"] for i in range(3000)}
+        automaton = KeywordAutomaton(taxonomy)
+
+        assert automaton.rank("keyword42 and phrase 2999 here, keyword4200") == [
+            ("category_42", 1.0),
+            ("category_2999", 1.0),
+        ]
+
+
+class TestTaxonomyCategorizer:
+    """Test taxonomy loading and reloading."""
+
+    def _write(self, path, taxonomy, mtime):
+        """Write taxonomy file with a fixed modification time."""
+        path.write_text(json.dumps(taxonomy, ensure_ascii=False), encoding="utf-8")
+        os.utime(path, (mtime, mtime))
+
+    def test_default_without_file(self):
+        """Test that the built-in taxonomy is used without a file."""
+        categorizer = TaxonomyCategorizer(path="")
+
+        assert categorizer.rank("Breaking news") == [("news", 2.0)]
+
+    def test_reload_on_change(self, tmp_path):
+        """Test that file changes are picked up after the check interval."""
+        now = [0.0]
+        path = tmp_path / "taxonomy.json"
+        self._write(path, {"crypto": ["bitcoin"]}, mtime=1000)
+        categorizer = TaxonomyCategorizer(path=str(path), check_seconds=30, clock=lambda: now[0])
+
+        assert categorizer.rank("Bitcoin up") == [("crypto", 1.0)]
+
+        self._write(path, {"crypto": ["bitcoin", "ethereum"]}, mtime=2000)
+        now[0] = 10
+        assert categorizer.rank("Ethereum up") == []
+
+        now[0] = 31
+        assert categorizer.rank("Ethereum up") == [("crypto", 1.0)]
+
+    def test_broken_file_keeps_taxonomy(self, tmp_path):
+        """Test that an invalid taxonomy file does not replace the loaded one."""
+        now = [0.0]
+        path = tmp_path / "taxonomy.json"
+        self._write(path, {"crypto": ["bitcoin"]}, mtime=1000)
+        categorizer = TaxonomyCategorizer(path=str(path), check_seconds=1, clock=lambda: now[0])
+
+        path.write_text("{not json", encoding="utf-8")
+        os.utime(path, (2000, 2000))
+        now[0] = 5
+
+        assert categorizer.rank("Bitcoin up") == [("crypto", 1.0)]
+        assert categorizer.reload() is False
@@ -4,18 +4,66 @@ Tests for Channel Parser Agent.
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime
-from app.agents.channel_parser import ChannelParserAgent
-from telethon.tl.types import Channel, Message, MessageMediaPhoto, MessageMediaVideo
-from telethon.errors import ChannelInvalidError, ChannelPrivateError, FloodWaitError
+from app.agents.channel_parser import ChannelParserAgent, HISTORY_PAGE_SIZE
+from app.core.entity_cache import EntityCache
+from app.core.rate_limiter import InMemoryTokenBucket, RateLimitDeferred, TelegramRateLimiter
+from telethon.tl.types import (
+    Channel, Message, MessageEntityBold, MessageEntityHashtag, MessageEntityMention,
+    MessageEntityTextUrl, MessageEntityUrl, MessageMediaPhoto, PeerChannel
+)
+from telethon.errors import ChannelInvalidError, ChannelPrivateError, FloodWaitError, TakeoutInitDelayError
 
 
 class TestChannelParserAgent:
     """Test Channel Parser Agent."""
     
+    def _make_rate_limiter(self):
+        """Create in-process rate limiter on a fake clock that never sleeps."""
+        clock = {"now": 0.0}
+        
+        async def fake_sleep(seconds):
+            clock["now"] += seconds
+        
+        bucket = InMemoryTokenBucket(capacity=1000, rate=1000.0, clock=lambda: clock["now"])
+        return TelegramRateLimiter(bucket, sleep=fake_sleep)
+    
+    @pytest.fixture
+    def rate_limiter(self):
+        """Create rate limiter for regular requests."""
+        return self._make_rate_limiter()
+    
     @pytest.fixture
-    def parser(self):
-        """Create parser instance."""
-        return ChannelParserAgent()
+    def parser(self, rate_limiter):
+        """Create parser instance that never connects to Telegram."""
+        parser = ChannelParserAgent(
+            rate_limiter=rate_limiter,
+            entity_cache=EntityCache(),
+            takeout_rate_limiter=self._make_rate_limiter()
+        )
+        with patch.object(parser, 'connect', new_callable=AsyncMock):
+            yield parser
+        parser.client.session.close()
+    
+    def _make_channel(self):
+        """Create mock resolved channel."""
+        channel = MagicMock(spec=Channel)
+        channel.id = 1
+        channel.access_hash = 2
+        return channel
+    
+    def _make_message(self, message_id):
+        """Create mock text message."""
+        message = MagicMock(spec=Message)
+        message.id = message_id
+        message.date = datetime(2024, 1, 1)
+        message.text = f"Post {message_id}"
+        message.views = 10
+        message.photo = None
+        message.video = None
+        message.document = None
+        message.entities = None
+        message.reactions = None
+        return message
     
     @pytest.mark.asyncio
     async def test_parse_channel_username_from_url(self, parser):
@@ -34,6 +82,8 @@ class TestChannelParserAgent:
         """Test getting channel metadata."""
         # Mock Telegram client
         mock_channel = MagicMock(spec=Channel)
+        mock_channel.id = 1
+        mock_channel.access_hash = 2
         mock_channel.title = "Test Channel"
         mock_channel.participants_count = 1000
         mock_channel.about = "Test description"
@@ -89,6 +139,37 @@ class TestChannelParserAgent:
         assert post_data["content_type"] == "text"
         assert post_data["views"] == 1000
         assert post_data["likes"] == 0
+        assert post_data["entities"] is None
+    
+    @pytest.mark.asyncio
+    async def test_extract_post_data_entities(self, parser):
+        """Test that Telegram entities become post entities with character offsets."""
+        # The emoji is two UTF-16 code units, Telegram offsets after it are shifted by one
+        text = "🔥 #release by @team: example.com, docs"
+        message = Message(
+            id=1,
+            peer_id=PeerChannel(1),
+            date=datetime(2024, 1, 1),
+            message=text,
+            entities=[
+                MessageEntityHashtag(offset=3, length=8),
+                MessageEntityMention(offset=15, length=5),
+                MessageEntityUrl(offset=22, length=11),
+                MessageEntityTextUrl(offset=35, length=4, url="https://docs.example.com"),
+                MessageEntityBold(offset=0, length=2),
+            ]
+        )
+        
+        post_data = await parser._extract_post_data(message, "test_channel")
+        
+        assert post_data["entities"] == [
+            {"type": "hashtag", "value": "#release", "offset": 2, "length": 8},
+            {"type": "mention", "value": "@team", "offset": 14, "length": 5},
+            {"type": "url", "value": "example.com", "offset": 21, "length": 11},
+            {"type": "url", "value": "https://docs.example.com", "offset": 34, "length": 4},
+        ]
+        for entity in post_data["entities"][:3]:
+            assert text[entity["offset"]:entity["offset"] + entity["length"]] == entity["value"]
     
     @pytest.mark.asyncio
     async def test_extract_post_data_photo(self, parser):
@@ -113,6 +194,8 @@ class TestChannelParserAgent:
     async def test_parse_channel_full(self, parser):
         """Test parsing full channel."""
         mock_channel = MagicMock(spec=Channel)
+        mock_channel.id = 1
+        mock_channel.access_hash = 2
         mock_channel.title = "Test Channel"
         mock_channel.participants_count = 1000
         mock_channel.about = None
@@ -133,7 +216,7 @@ class TestChannelParserAgent:
         with patch.object(parser.client, 'get_entity', new_callable=AsyncMock) as mock_get:
             mock_get.return_value = mock_channel
             
-            with patch.object(parser.client, 'iter_messages', new_callable=AsyncMock) as mock_iter:
+            with patch.object(parser.client, 'iter_messages') as mock_iter:
                 async def mock_iter_messages(*args, **kwargs):
                     yield mock_message
                 
@@ -144,4 +227,209 @@ class TestChannelParserAgent:
                 assert "metadata" in result
                 assert "posts" in result
                 assert len(result["posts"]) == 1
+                # Posts are fetched with the peer cached while reading metadata
+                assert mock_get.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_parse_posts_throttles_per_page(self, parser):
+        """Test that rate limiter is acquired per history page, not per message."""
+        messages = [self._make_message(i) for i in range(250, 0, -1)]
+        
+        async def mock_iter_messages(*args, **kwargs):
+            for message in messages:
+                yield message
+        
+        with patch.object(parser.client, 'get_entity', new_callable=AsyncMock) as mock_get, \
+                patch.object(parser.client, 'iter_messages', side_effect=mock_iter_messages), \
+                patch.object(parser.rate_limiter, 'acquire', new_callable=AsyncMock) as mock_acquire:
+            mock_get.return_value = self._make_channel()
+            
+            posts = await parser.parse_posts("test_channel")
+        
+        assert len(posts) == 250
+        # get_entity + first page + one per completed page
+        assert mock_acquire.await_count == 2 + 250 // HISTORY_PAGE_SIZE
+    
+    @pytest.mark.asyncio
+    async def test_parse_posts_resumes_after_flood_wait(self, parser):
+        """Test that flood wait is reported and parsing resumes from the last message."""
+        calls = []
+        
+        async def mock_iter_messages(entity, **kwargs):
+            calls.append(kwargs["max_id"])
+            if len(calls) == 1:
+                yield self._make_message(10)
+                yield self._make_message(9)
+                raise FloodWaitError(request=None, capture=5)
+            yield self._make_message(8)
+        
+        with patch.object(parser.client, 'get_entity', new_callable=AsyncMock) as mock_get, \
+                patch.object(parser.client, 'iter_messages', side_effect=mock_iter_messages):
+            mock_get.return_value = self._make_channel()
+            
+            posts = await parser.parse_posts("test_channel")
+        
+        assert [post["post_id"] for post in posts] == ["10", "9", "8"]
+        assert calls == [0, 9]
+        
+        stats = await parser.rate_limiter.get_stats()
+        assert stats["flood_waits"] == 1
+        assert stats["flood_wait_seconds"] == 5
 
+    @pytest.mark.asyncio
+    async def test_iter_post_batches(self, parser):
+        """Test that posts are streamed in bounded batches."""
+        messages = [self._make_message(i) for i in range(5, 0, -1)]
+        
+        async def mock_iter_messages(*args, **kwargs):
+            for message in messages:
+                yield message
+        
+        with patch.object(parser.client, 'get_entity', new_callable=AsyncMock) as mock_get, \
+                patch.object(parser.client, 'iter_messages', side_effect=mock_iter_messages):
+            mock_get.return_value = self._make_channel()
+            
+            batches = [batch async for batch in parser.iter_post_batches("test_channel", batch_size=2)]
+        
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert batches[0][0]["post_id"] == "5"
+    
+    @pytest.mark.asyncio
+    async def test_long_flood_wait_is_deferred(self, parser):
+        """Test that a flood wait above max_wait yields fetched posts, then defers."""
+        parser.max_wait = 30
+        
+        async def mock_iter_messages(*args, **kwargs):
+            for message_id in (5, 4, 3):
+                yield self._make_message(message_id)
+            raise FloodWaitError(request=None, capture=300)
+        
+        batches = []
+        with patch.object(parser.client, 'get_entity', new_callable=AsyncMock) as mock_get, \
+                patch.object(parser.client, 'iter_messages', side_effect=mock_iter_messages):
+            mock_get.return_value = self._make_channel()
+            
+            with pytest.raises(RateLimitDeferred) as exc_info:
+                async for batch in parser.iter_post_batches("test_channel", batch_size=2):
+                    batches.append(batch)
+        
+        assert [[post["post_id"] for post in batch] for batch in batches] == [["5", "4"], ["3"]]
+        assert exc_info.value.seconds == pytest.approx(300)
+    
+    @pytest.mark.asyncio
+    async def test_iter_posts_min_id_resumes_in_reverse(self, parser):
+        """Test that incremental parsing resumes above the last received message."""
+        calls = []
+        
+        async def mock_iter_messages(entity, **kwargs):
+            calls.append((kwargs["min_id"], kwargs["reverse"]))
+            if len(calls) == 1:
+                yield self._make_message(101)
+                raise FloodWaitError(request=None, capture=1)
+            yield self._make_message(102)
+        
+        with patch.object(parser.client, 'get_entity', new_callable=AsyncMock) as mock_get, \
+                patch.object(parser.client, 'iter_messages', side_effect=mock_iter_messages):
+            mock_get.return_value = self._make_channel()
+            
+            posts = [post async for post in parser.iter_posts("test_channel", min_id=100, reverse=True)]
+        
+        assert [post["post_id"] for post in posts] == ["101", "102"]
+        assert calls == [(100, True), (101, True)]
+    
+    @pytest.mark.asyncio
+    async def test_iter_posts_uses_cached_peer(self, parser):
+        """Test that a cached peer is used without resolving the username."""
+        parser.entity_cache.put("test_channel", 1, 2)
+        
+        async def mock_iter_messages(entity, **kwargs):
+            assert entity.channel_id == 1
+            assert entity.access_hash == 2
+            yield self._make_message(1)
+        
+        with patch.object(parser.client, 'get_entity', new_callable=AsyncMock) as mock_get, \
+                patch.object(parser.client, 'iter_messages', side_effect=mock_iter_messages):
+            posts = await parser.parse_posts("test_channel")
+        
+        assert len(posts) == 1
+        mock_get.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_iter_posts_stale_access_hash(self, parser):
+        """Test that a rejected cached access_hash falls back to resolving."""
+        parser.entity_cache.put("test_channel", 1, 999)
+        
+        async def mock_iter_messages(entity, **kwargs):
+            if entity.access_hash == 999:
+                raise ChannelInvalidError(request=None)
+            yield self._make_message(1)
+        
+        with patch.object(parser.client, 'get_entity', new_callable=AsyncMock) as mock_get, \
+                patch.object(parser.client, 'iter_messages', side_effect=mock_iter_messages):
+            mock_get.return_value = self._make_channel()
+            
+            posts = await parser.parse_posts("test_channel")
+        
+        assert len(posts) == 1
+        mock_get.assert_awaited_once_with("test_channel")
+        assert parser.entity_cache.get("test_channel").access_hash == 2
+    
+    @pytest.mark.asyncio
+    async def test_get_latest_message_id(self, parser):
+        """Test that the newest message ID is read with one request."""
+        parser.entity_cache.put("test_channel", 1, 2)
+        
+        with patch.object(parser.client, 'get_messages', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = [self._make_message(4242)]
+            
+            assert await parser.get_latest_message_id("test_channel") == 4242
+            
+            mock_get.return_value = []
+            assert await parser.get_latest_message_id("test_channel") == 0
+    
+    @pytest.mark.asyncio
+    async def test_takeout_uses_separate_budget(self, parser):
+        """Test that takeout history is fetched through the takeout client and budget."""
+        parser.entity_cache.put("test_channel", 1, 2)
+        takeout_client = MagicMock()
+        
+        async def mock_iter_messages(entity, **kwargs):
+            for message_id in (1, 2, 3):
+                yield self._make_message(message_id)
+        
+        takeout_client.iter_messages.side_effect = mock_iter_messages
+        takeout_context = MagicMock()
+        takeout_context.__aenter__ = AsyncMock(return_value=takeout_client)
+        takeout_context.__aexit__ = AsyncMock(return_value=False)
+        
+        with patch.object(parser.client, 'takeout', return_value=takeout_context) as mock_takeout, \
+                patch.object(parser.client, 'iter_messages') as mock_regular:
+            posts = await parser.parse_posts("test_channel", reverse=True, takeout=True)
+        
+        assert [post["post_id"] for post in posts] == ["1", "2", "3"]
+        mock_takeout.assert_called_once_with(finalize=True, channels=True)
+        mock_regular.assert_not_called()
+        
+        takeout_stats = await parser.takeout_rate_limiter.get_stats()
+        regular_stats = await parser.rate_limiter.get_stats()
+        assert takeout_stats["messages"] == 3
+        assert takeout_stats["requests"] == 1
+        assert regular_stats["messages"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_takeout_delay_falls_back_to_regular_requests(self, parser):
+        """Test that a delayed takeout falls back to regular history requests."""
+        parser.entity_cache.put("test_channel", 1, 2)
+        takeout_context = MagicMock()
+        takeout_context.__aenter__ = AsyncMock(side_effect=TakeoutInitDelayError(request=None, capture=3600))
+        takeout_context.__aexit__ = AsyncMock(return_value=False)
+        
+        async def mock_iter_messages(entity, **kwargs):
+            yield self._make_message(1)
+        
+        with patch.object(parser.client, 'takeout', return_value=takeout_context), \
+                patch.object(parser.client, 'iter_messages', side_effect=mock_iter_messages):
+            posts = await parser.parse_posts("test_channel", takeout=True)
+        
+        assert len(posts) == 1
+        assert (await parser.rate_limiter.get_stats())["messages"] == 1
@@ -2,7 +2,9 @@
 Tests for Content Analyzer Agent.
 """
 import pytest
+from types import SimpleNamespace
 from app.agents.content_analyzer import ContentAnalyzerAgent
+from app.core.nlp import NlpModelRegistry
 
 
 class TestContentAnalyzerAgent:
@@ -141,6 +143,28 @@ class TestContentAnalyzerAgent:
         assert analyzed["engagement_rate"] == 0.05
         assert analyzed["reading_time"] > 0
     
+    def test_analyze_post_with_telegram_entities(self, analyzer):
+        """Test that entities marked by Telegram are used instead of scanning the text."""
+        post_data = {
+            "post_id": "124",
+            "text": "Read more, #python",
+            "views": 10,
+            "likes": 1,
+            "content_type": "text",
+            "media_urls": None,
+            "entities": [
+                {"type": "url", "value": "https://example.com/post", "offset": 0, "length": 9},
+                {"type": "hashtag", "value": "#python", "offset": 11, "length": 7},
+            ]
+        }
+        
+        analyzed = analyzer.analyze_post(post_data)
+        
+        assert analyzed["hashtags"] == ["#python"]
+        assert analyzed["mentions"] is None
+        assert analyzed["links"] == ["https://example.com/post"]
+        assert analyzed["content_type"] == "link"
+    
     def test_analyze_posts_batch(self, analyzer):
         """Test batch analysis."""
         posts = [
@@ -167,4 +191,46 @@ class TestContentAnalyzerAgent:
         assert len(analyzed) == 2
         assert analyzed[0]["hashtags"] == ["#test"]
         assert analyzed[1]["hashtags"] == ["#python"]
-
+    
+    def test_extract_keywords_batch(self):
+        """Test batch keyword extraction through nlp.pipe."""
+        calls = []
+        
+        class FakeModel:
+            def pipe(self, texts, batch_size=1000, n_process=1):
+                texts = list(texts)
+                calls.append(texts)
+                for text in texts:
+                    yield [
+                        SimpleNamespace(pos_="NOUN", lemma_=word, is_stop=word == "the", is_punct=False)
+                        for word in text.split()
+                    ]
+        
+        registry = NlpModelRegistry(models={"en": "fake"}, loader=lambda name: FakeModel())
+        analyzer = ContentAnalyzerAgent(nlp_registry=registry)
+        
+        keywords = analyzer.extract_keywords_batch(
+            ["the Release release notes", "", "Bug fix"],
+            max_keywords=2
+        )
+        
+        assert keywords == [["release", "notes"], [], ["bug", "fix"]]
+        assert calls == [["the Release release notes", "Bug fix"]]
+        
+        analyzed = analyzer.analyze_posts_batch([
+            {"post_id": "1", "text": "Bug fix", "views": 10, "likes": 1},
+            {"post_id": "2", "text": "", "views": 10, "likes": 1},
+        ])
+        assert analyzed[0]["keywords"] == ["bug", "fix"]
+        assert analyzed[1]["keywords"] is None
+        assert len(calls) == 2
+    
+    def test_extract_keywords_without_model(self):
+        """Test that keyword extraction degrades to no keywords without spaCy models."""
+        def loader(name):
+            raise OSError(f"Can't find model '{name}'")
+        
+        analyzer = ContentAnalyzerAgent(nlp_registry=NlpModelRegistry(loader=loader))
+        
+        assert analyzer.extract_keywords("Some text") == []
+        assert analyzer.extract_keywords_batch(["One", "Два"]) == [[], []]
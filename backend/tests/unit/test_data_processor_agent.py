@@ -180,6 +180,40 @@ class TestDataProcessorAgent:
         assert prepared["views"] == 1000
         assert prepared["date"].tzinfo is not None
     
+    def test_prepare_for_database_keeps_line_breaks(self, processor):
+        """Test that stored text keeps its paragraphs."""
+        post_data = {
+            "post_id": "1",
+            "channel_id": 1,
+            "text": "\n Title\n\nFirst  paragraph\n",
+            "date": "2024-01-15T10:30:00Z",
+            "content_type": "text"
+        }
+        
+        prepared = processor.prepare_for_database(post_data)
+        
+        assert prepared["text"] == "Title\n\nFirst  paragraph"
+        assert processor.structure_post_for_table(prepared)["text"] == "Title First paragraph"
+    
+    def test_prepare_for_database_keeps_analysis(self, processor):
+        """Test that category, keywords and reading time are passed through."""
+        post_data = {
+            "post_id": "1",
+            "channel_id": 1,
+            "text": "Новый релиз",
+            "date": "2024-01-15T10:30:00Z",
+            "content_type": "text",
+            "category": "news",
+            "keywords": ["релиз"],
+            "reading_time": 12
+        }
+        
+        prepared = processor.prepare_for_database(post_data)
+        
+        assert prepared["category"] == "news"
+        assert prepared["keywords"] == ["релиз"]
+        assert prepared["reading_time"] == 12
+    
     def test_batch_process_posts(self, processor):
         """Test batch processing of posts."""
         posts = [
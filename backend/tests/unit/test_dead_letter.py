@@ -0,0 +1,51 @@
+"""
+Tests for the dead-letter queue of failing channels.
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.core.config import settings
+from app.core.dead_letter import list_dead_letters, record_parse_failure, requeue_dead_letter
+from app.core.scheduler import build_poll_schedule
+from app.models.channel import Channel
+
+NOW = datetime(2024, 3, 1, 12, 0)
+
+
+class TestDeadLetter:
+    """Test dead-lettering and requeueing."""
+
+    @pytest.fixture
+    def channel(self, db_session):
+        """Create test channel."""
+        channel = Channel(channel_username="broken", channel_name="Broken")
+        db_session.add(channel)
+        db_session.commit()
+        return channel
+
+    def test_dead_lettered_after_threshold(self, db_session, channel):
+        """Test that only the failure reaching the threshold dead-letters the channel."""
+        with patch.object(settings, "PARSE_DEAD_LETTER_AFTER", 3):
+            results = [record_parse_failure(db_session, channel.id, "private", NOW) for _ in range(4)]
+
+        assert results == [False, False, True, False]
+        assert channel.failure_count == 4
+        assert channel.dead_lettered_at == NOW
+        assert [entry["channel_id"] for entry in list_dead_letters(db_session)] == [channel.id]
+
+    def test_dead_lettered_channel_not_polled(self, db_session, channel):
+        """Test that the scheduler skips dead-lettered channels until requeued."""
+        with patch.object(settings, "PARSE_DEAD_LETTER_AFTER", 1):
+            record_parse_failure(db_session, channel.id, "private", NOW)
+
+        entry = build_poll_schedule(db_session, NOW)[0]
+        assert entry["dead_lettered"]
+        assert not entry["due"]
+
+        assert requeue_dead_letter(db_session, channel.id)
+        assert not requeue_dead_letter(db_session, channel.id)
+
+        entry = build_poll_schedule(db_session, NOW)[0]
+        assert entry["due"]
+        assert channel.failure_count == 0
+        assert list_dead_letters(db_session) == []
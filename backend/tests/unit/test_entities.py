@@ -0,0 +1,70 @@
+"""
+Tests for single-pass entity extraction.
+"""
+from app.core.entities import extract_entities, group_entities, tokenize_entities
+
+
+class TestTokenizeEntities:
+    """Test regex fallback tokenizer."""
+
+    def test_positions(self):
+        """Test that all entity kinds are found with offsets in one scan."""
+        text = "Check out #python at https://example.com. @user1"
+
+        assert tokenize_entities(text) == [
+            {"type": "hashtag", "value": "#python", "offset": 10, "length": 7},
+            {"type": "url", "value": "https://example.com", "offset": 21, "length": 19},
+            {"type": "mention", "value": "@user1", "offset": 42, "length": 6},
+        ]
+
+    def test_url_boundaries(self):
+        """Test that URLs keep their own '#', '@' and balanced parentheses but not sentence punctuation."""
+        text = (
+            "Docs (https://example.com/wiki/Python_(language)), "
+            "https://example.com/page#part and https://t.me/@channel!"
+        )
+
+        assert [entity["value"] for entity in tokenize_entities(text)] == [
+            "https://example.com/wiki/Python_(language)",
+            "https://example.com/page#part",
+            "https://t.me/@channel",
+        ]
+
+    def test_no_false_positives(self):
+        """Test that e-mail addresses, inner '#' and bare schemes are not entities."""
+        assert tokenize_entities("Mail me at user@example.com, issue C#7, see http://.") == []
+
+    def test_empty(self):
+        """Test empty and missing text."""
+        assert tokenize_entities("") == []
+        assert tokenize_entities(None) == []
+
+
+class TestExtractEntities:
+    """Test grouping of entities by type."""
+
+    def test_unique_in_order(self):
+        """Test that values are deduplicated keeping first appearance order."""
+        grouped = extract_entities("#b #a #b @x https://a.io @x")
+
+        assert grouped == {"hashtag": ["#b", "#a"], "mention": ["@x"], "url": ["https://a.io"]}
+
+    def test_telegram_entities_preferred(self):
+        """Test that given entities are used instead of tokenizing the text."""
+        entities = [
+            {"type": "url", "value": "https://hidden.example", "offset": 0, "length": 4},
+            {"type": "hashtag", "value": "#news", "offset": 5, "length": 5},
+        ]
+
+        assert extract_entities("here #news #ignored", entities) == {
+            "hashtag": ["#news"],
+            "mention": [],
+            "url": ["https://hidden.example"],
+        }
+        assert extract_entities("#ignored", []) == {"hashtag": [], "mention": [], "url": []}
+
+    def test_unknown_types_ignored(self):
+        """Test that other entity types are skipped."""
+        assert group_entities([{"type": "bold", "value": "x", "offset": 0, "length": 1}]) == {
+            "hashtag": [], "mention": [], "url": []
+        }
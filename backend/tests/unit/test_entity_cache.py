@@ -0,0 +1,58 @@
+"""
+Tests for resolved peer cache.
+"""
+from sqlalchemy.orm import sessionmaker
+from app.core.entity_cache import EntityCache
+from app.models.telegram_peer import TelegramPeer
+
+
+class TestEntityCache:
+    """Test entity cache."""
+
+    def test_memory_hit(self):
+        """Test that stored peers are returned from memory."""
+        cache = EntityCache(maxsize=10)
+        cache.put("@Test_Channel", 100, 200)
+
+        peer = cache.get("test_channel")
+
+        assert peer.channel_id == 100
+        assert peer.access_hash == 200
+        assert cache.get_stats()["hits"] == 1
+
+    def test_lru_eviction(self):
+        """Test that the least recently used peer is evicted."""
+        cache = EntityCache(maxsize=2)
+        cache.put("first", 1, 1)
+        cache.put("second", 2, 2)
+        cache.get("first")
+        cache.put("third", 3, 3)
+
+        assert cache.get("second") is None
+        assert cache.get("first") is not None
+        assert cache.get("third") is not None
+
+    def test_invalidate(self):
+        """Test that invalidated peers are no longer returned."""
+        cache = EntityCache(maxsize=10)
+        cache.put("channel", 1, 1)
+        cache.invalidate("channel")
+
+        assert cache.get("channel") is None
+        assert cache.get_stats()["misses"] == 1
+
+    def test_database_tier(self, db_session):
+        """Test that peers survive a new process through the database."""
+        session_factory = sessionmaker(bind=db_session.get_bind())
+        EntityCache(session_factory=session_factory).put("channel", 100, 200)
+        EntityCache(session_factory=session_factory).put("channel", 100, 300)
+
+        cache = EntityCache(session_factory=session_factory)
+        peer = cache.get("channel")
+
+        assert peer.access_hash == 300
+        assert cache.get_stats()["db_hits"] == 1
+        assert db_session.query(TelegramPeer).count() == 1
+
+        cache.invalidate("channel")
+        assert EntityCache(session_factory=session_factory).get("channel") is None
@@ -42,7 +42,10 @@ class TestFilterSearchAgent:
                 content_type="text" if i % 2 == 0 else "photo",
                 views=100 * i,
                 likes=10 * i,
-                hashtags=[f"#hashtag{i}"]
+                hashtags=[f"#hashtag{i}"],
+                category="news" if i < 3 else "entertainment",
+                keywords=["релиз", f"версия{i}"] if i % 3 == 0 else [f"мем{i}"],
+                reading_time=15 * i
             )
             db_session.add(post)
             posts.append(post)
@@ -91,3 +94,22 @@ class TestFilterSearchAgent:
         assert len(result["posts"]) <= 5
         assert result["page"] == 1
         assert result["page_size"] == 5
+    
+    def test_filter_by_category(self, agent, test_posts):
+        """Test filtering by stored category."""
+        query = agent.filter_posts(agent.db.query(Post), {"categories": ["news"]})
+        
+        assert sorted(post.post_id for post in query.all()) == ["post_0", "post_1", "post_2"]
+    
+    def test_filter_by_extracted_keywords(self, agent, test_posts):
+        """Test that posts having any of the keywords match."""
+        query = agent.filter_posts(agent.db.query(Post), {"extracted_keywords": ["Релиз", "мем4"]})
+        
+        assert sorted(post.post_id for post in query.all()) == ["post_0", "post_3", "post_4", "post_6", "post_9"]
+    
+    def test_filter_by_reading_time(self, agent, test_posts):
+        """Test filtering by reading time range."""
+        filters = {"reading_time_min": 30, "reading_time_max": 60, "categories": ["entertainment"]}
+        query = agent.filter_posts(agent.db.query(Post), filters)
+        
+        assert sorted(post.post_id for post in query.all()) == ["post_3", "post_4"]
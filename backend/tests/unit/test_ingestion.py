@@ -0,0 +1,201 @@
+"""
+Tests for batched post ingestion.
+"""
+import pytest
+from datetime import datetime
+from app.core.ingestion import find_post_gaps, ingest_post_batches, record_checked_gap, upsert_posts
+from app.models.channel import Channel
+from app.models.post import Post
+
+
+class TestUpsertPosts:
+    """Test INSERT ... ON CONFLICT post writer."""
+
+    @pytest.fixture
+    def channel(self, db_session):
+        """Create test channel."""
+        channel = Channel(
+            channel_username="test_channel",
+            channel_name="Test Channel"
+        )
+        db_session.add(channel)
+        db_session.commit()
+        return channel
+
+    def _post(self, post_id, views=100, likes=10):
+        """Build parsed post dictionary."""
+        return {
+            "post_id": str(post_id),
+            "date": datetime(2024, 1, 1),
+            "text": f"Post {post_id}",
+            "author": None,
+            "content_type": "text",
+            "media_urls": None,
+            "views": views,
+            "likes": likes,
+            "comments": None,
+        }
+
+    def test_insert_new_posts(self, db_session, channel):
+        """Test that new posts are inserted in chunks."""
+        posts = [self._post(i) for i in range(5)]
+
+        counts = upsert_posts(db_session, channel.id, posts, batch_size=2)
+        db_session.commit()
+
+        assert counts == {"inserted": 5, "updated": 0, "skipped": 0}
+        assert db_session.query(Post).filter_by(channel_id=channel.id).count() == 5
+
+    def test_update_changed_metrics(self, db_session, channel):
+        """Test that existing posts get new metrics and unchanged ones are skipped."""
+        upsert_posts(db_session, channel.id, [self._post(1), self._post(2)])
+        db_session.commit()
+
+        counts = upsert_posts(
+            db_session,
+            channel.id,
+            [self._post(1, views=500, likes=50), self._post(2), self._post(3)]
+        )
+        db_session.commit()
+
+        assert counts == {"inserted": 1, "updated": 1, "skipped": 1}
+        post = db_session.query(Post).filter_by(channel_id=channel.id, post_id="1").one()
+        db_session.refresh(post)
+        assert post.views == 500
+        assert post.likes == 50
+        assert db_session.query(Post).filter_by(channel_id=channel.id).count() == 3
+
+    def test_duplicates_in_batch(self, db_session, channel):
+        """Test that duplicate posts within one batch are written once."""
+        counts = upsert_posts(
+            db_session,
+            channel.id,
+            [self._post(1, views=10), self._post(1, views=20)]
+        )
+        db_session.commit()
+
+        assert counts == {"inserted": 1, "updated": 0, "skipped": 1}
+        post = db_session.query(Post).filter_by(channel_id=channel.id, post_id="1").one()
+        assert post.views == 20
+
+    def test_last_post_at_moves_forward(self, db_session, channel):
+        """Test that the channel keeps the newest stored post date."""
+        newest = {**self._post(2), "date": datetime(2024, 2, 1)}
+        upsert_posts(db_session, channel.id, [self._post(1), newest])
+        db_session.commit()
+        # Backfilled older posts do not move it back
+        upsert_posts(db_session, channel.id, [{**self._post(3), "date": datetime(2023, 6, 1)}])
+        db_session.commit()
+
+        db_session.refresh(channel)
+        assert channel.last_post_at == datetime(2024, 2, 1)
+
+
+class TestIngestPostBatches:
+    """Test streaming ingestion of post batches."""
+
+    @pytest.fixture
+    def channel(self, db_session):
+        """Create test channel."""
+        channel = Channel(
+            channel_username="test_channel",
+            channel_name="Test Channel"
+        )
+        db_session.add(channel)
+        db_session.commit()
+        return channel
+
+    def _post(self, post_id):
+        """Build parsed post dictionary."""
+        return {
+            "post_id": str(post_id),
+            "date": datetime(2024, 1, 1),
+            "text": f"Post {post_id}",
+            "content_type": "text",
+            "views": 1,
+            "likes": 0,
+        }
+
+    @pytest.mark.asyncio
+    async def test_batches_committed_before_failure(self, db_session, channel):
+        """Test that batches committed before a crash are kept."""
+        async def batches():
+            yield [self._post(1), self._post(2)]
+            yield [self._post(3)]
+            raise RuntimeError("worker crashed")
+
+        with pytest.raises(RuntimeError):
+            await ingest_post_batches(db_session, channel.id, batches())
+
+        db_session.rollback()
+        assert db_session.query(Post).filter_by(channel_id=channel.id).count() == 3
+
+    @pytest.mark.asyncio
+    async def test_totals(self, db_session, channel):
+        """Test that counts are summed over all batches."""
+        async def batches():
+            yield [self._post(1), self._post(2)]
+            yield [self._post(2), self._post(3)]
+
+        counts = await ingest_post_batches(db_session, channel.id, batches())
+
+        assert counts == {"inserted": 3, "updated": 0, "skipped": 1}
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_advances(self, db_session, channel):
+        """Test that the message ID checkpoint only moves forward."""
+        async def batches():
+            yield [self._post(10), self._post(12)]
+            yield [self._post(5)]
+
+        await ingest_post_batches(db_session, channel.id, batches())
+
+        db_session.refresh(channel)
+        assert channel.last_message_id == 12
+
+
+class TestFindPostGaps:
+    """Test detection of missing message ID ranges."""
+
+    @pytest.fixture
+    def channel(self, db_session):
+        """Create test channel."""
+        channel = Channel(
+            channel_username="test_channel",
+            channel_name="Test Channel"
+        )
+        db_session.add(channel)
+        db_session.commit()
+        return channel
+
+    def test_find_gaps(self, db_session, channel):
+        """Test that gaps are returned newest first as inclusive ranges."""
+        for post_id in [1, 2, 5, 6, 10]:
+            db_session.add(Post(
+                post_id=str(post_id),
+                channel_id=channel.id,
+                date=datetime(2024, 1, 1),
+                content_type="text"
+            ))
+        db_session.commit()
+
+        assert find_post_gaps(db_session, channel.id) == [(7, 9), (3, 4)]
+        assert find_post_gaps(db_session, channel.id, limit=1) == [(7, 9)]
+
+    def test_checked_gaps_skipped(self, db_session, channel):
+        """Test that gaps inside a checked range are not returned."""
+        for post_id in [1, 3, 6, 10]:
+            db_session.add(Post(
+                post_id=str(post_id),
+                channel_id=channel.id,
+                date=datetime(2024, 1, 1),
+                content_type="text"
+            ))
+        record_checked_gap(db_session, channel.id, 2, 9)
+        db_session.commit()
+
+        assert find_post_gaps(db_session, channel.id) == []
+
+    def test_no_gaps(self, db_session, channel):
+        """Test channel without gaps."""
+        assert find_post_gaps(db_session, channel.id) == []
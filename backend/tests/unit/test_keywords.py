@@ -0,0 +1,134 @@
+"""
+Tests for TF-IDF keyword ranking.
+"""
+from unittest.mock import MagicMock, patch
+from sqlalchemy.orm import sessionmaker
+from app.core import keywords
+from app.core.celery import close_telegram_clients
+from app.core.keywords import DOCUMENTS_TERM, GLOBAL_SCOPE, KeywordEngine
+from app.models.keyword_frequency import KeywordDocumentFrequency
+
+
+class TestScoring:
+    """Test ranking against in-memory document frequencies."""
+
+    def test_channel_boilerplate_ranks_last(self):
+        """Test that terms every post of the channel repeats rank below distinctive ones."""
+        engine = KeywordEngine(refresh_seconds=3600)
+        history = [{"подписка": 1, "канал": 1, "новость": 1} for _ in range(50)]
+        history.append({"подписка": 1, "релиз": 1})
+        engine.add_documents(None, 1, history)
+
+        keywords = engine.score_batch(1, [
+            {"подписка": 3, "канал": 1, "релиз": 1},
+            {"новость": 1, "бюджет": 1},
+        ], max_keywords=2)
+
+        assert keywords == [["релиз", "подписка"], ["бюджет", "новость"]]
+
+    def test_generic_terms_demoted_globally(self):
+        """Test that terms common in all channels rank below ones rare everywhere."""
+        engine = KeywordEngine(refresh_seconds=3600)
+        engine.add_documents(None, 1, [{"год": 1} for _ in range(30)])
+
+        assert engine.score_batch(2, [{"год": 1, "квант": 1}]) == [["квант", "год"]]
+
+    def test_ties_keep_order(self):
+        """Test that without frequencies keywords are ordered by count, then appearance."""
+        engine = KeywordEngine(refresh_seconds=3600)
+
+        assert engine.score_batch(1, [{"b": 1, "a": 2, "c": 1}, {}]) == [["a", "b", "c"], []]
+        assert engine.score_batch(1, []) == []
+
+
+class TestDocumentFrequencies:
+    """Test persisted frequency tables."""
+
+    def test_add_documents_persists_and_reloads(self, db_session):
+        """Test that counts are incremented in the channel and global tables and read back."""
+        channel_id = 5
+        session_factory = sessionmaker(bind=db_session.get_bind())
+
+        now = [0.0]
+        writer = KeywordEngine(
+            session_factory=session_factory,
+            refresh_seconds=60,
+            flush_seconds=10,
+            clock=lambda: now[0]
+        )
+        writer.add_documents(
+            db_session, channel_id, [{"релиз": 2, "python": 1}, {"релиз": 1}]
+        )
+        writer.add_documents(db_session, channel_id, [{"релиз": 1}])
+        db_session.commit()
+
+        # Global counts wait in the buffer
+        global_rows = db_session.query(KeywordDocumentFrequency).filter_by(channel_id=GLOBAL_SCOPE)
+        assert global_rows.count() == 0
+        writer.flush_global()
+
+        rows = {
+            (row.channel_id, row.term): row.document_count
+            for row in db_session.query(KeywordDocumentFrequency)
+        }
+        assert rows == {
+            (channel_id, DOCUMENTS_TERM): 3,
+            (channel_id, "релиз"): 3,
+            (channel_id, "python"): 1,
+            (GLOBAL_SCOPE, DOCUMENTS_TERM): 3,
+            (GLOBAL_SCOPE, "релиз"): 3,
+            (GLOBAL_SCOPE, "python"): 1,
+        }
+
+        reader = KeywordEngine(
+            session_factory=session_factory,
+            refresh_seconds=60,
+            min_global_count=2,
+            clock=lambda: now[0]
+        )
+        assert reader._scope(channel_id).counts == {"релиз": 3, "python": 1}
+        # Global terms seen once are left out
+        assert reader._scope(GLOBAL_SCOPE).counts == {"релиз": 3}
+        assert reader._scope(GLOBAL_SCOPE).documents == 3
+
+        writer.add_documents(db_session, channel_id, [{"python": 1}])
+        db_session.commit()
+        assert reader._scope(channel_id).counts["python"] == 1
+
+        now[0] = 61
+        assert reader._scope(channel_id).counts["python"] == 2
+
+    def test_rolled_back_documents_not_counted(self, db_session):
+        """Test that rolled back counts reach neither memory nor the global table."""
+        session_factory = sessionmaker(bind=db_session.get_bind())
+        engine = KeywordEngine(session_factory=session_factory, refresh_seconds=60, flush_seconds=0)
+        assert engine._scope(1).documents == 0
+
+        engine.add_documents(db_session, 1, [{"релиз": 1}])
+        db_session.rollback()
+        assert engine._scope(1).documents == 0
+        assert engine._pending_global == {}
+
+        engine.add_documents(db_session, 1, [{"релиз": 1}])
+        db_session.commit()
+        assert engine._scope(1).counts == {"релиз": 1}
+        # Flushed right after the commit
+        rows = {
+            row.term: row.document_count
+            for row in db_session.query(KeywordDocumentFrequency).filter_by(channel_id=GLOBAL_SCOPE)
+        }
+        assert rows == {DOCUMENTS_TERM: 1, "релиз": 1}
+
+
+class TestWorkerShutdown:
+    """Test flushing of buffered counts when a Celery child exits."""
+
+    def test_shutdown_flushes_global_counts(self, monkeypatch):
+        """Test that worker_process_shutdown writes the buffer, atexit never runs there."""
+        engine = MagicMock()
+        monkeypatch.setattr(keywords, "_keyword_engine", engine)
+
+        with patch("app.core.telegram_pool.close_client_pool"):
+            close_telegram_clients()
+
+        engine.flush_global.assert_called_once_with()
@@ -0,0 +1,106 @@
+"""
+Tests for derived post metrics recomputed in SQL.
+"""
+import pytest
+from datetime import datetime
+from sqlalchemy.orm import sessionmaker
+from app.core.ingestion import upsert_posts
+from app.core.metrics import refresh_derived_metrics, refresh_derived_metrics_in_batches
+from app.models.channel import Channel
+from app.models.post import Post
+
+
+@pytest.fixture
+def channels(db_session):
+    """Create two test channels."""
+    channels = [
+        Channel(channel_username=f"channel_{i}", channel_name=f"Channel {i}")
+        for i in range(2)
+    ]
+    db_session.add_all(channels)
+    db_session.commit()
+    return channels
+
+
+def _add_posts(db_session, channel, count, engagement_rate=0.5):
+    """Store posts whose engagement rate does not match their counters."""
+    db_session.add_all([
+        Post(
+            post_id=str(i),
+            channel_id=channel.id,
+            date=datetime(2024, 1, i + 1),
+            content_type="text",
+            views=300 * i,
+            likes=100,
+            engagement_rate=engagement_rate
+        )
+        for i in range(count)
+    ])
+    db_session.commit()
+
+
+def _rates(db_session, channel):
+    """Engagement rates of a channel's posts by post ID."""
+    db_session.expire_all()
+    return {
+        post.post_id: post.engagement_rate
+        for post in db_session.query(Post).filter_by(channel_id=channel.id)
+    }
+
+
+class TestRefreshDerivedMetrics:
+    """Test set-based engagement rate updates."""
+
+    def test_channel_and_date_scope(self, db_session, channels):
+        """Test that only posts in scope are updated and correct ones are left alone."""
+        _add_posts(db_session, channels[0], 4)
+        _add_posts(db_session, channels[1], 2)
+
+        updated = refresh_derived_metrics(
+            db_session,
+            channel_id=channels[0].id,
+            date_from=datetime(2024, 1, 1),
+            date_to=datetime(2024, 1, 3)
+        )
+        db_session.commit()
+
+        assert updated == 3
+        assert _rates(db_session, channels[0]) == {
+            "0": None,
+            "1": pytest.approx(0.333333),
+            "2": pytest.approx(0.166667),
+            "3": 0.5,
+        }
+        assert set(_rates(db_session, channels[1]).values()) == {0.5}
+        # Nothing drifted anymore
+        assert refresh_derived_metrics(db_session, channel_id=channels[0].id, date_to=datetime(2024, 1, 3)) == 0
+
+    def test_whole_table_in_batches(self, db_session, channels):
+        """Test that the whole table is refreshed in ID ranges with a pause between them."""
+        _add_posts(db_session, channels[0], 5)
+        _add_posts(db_session, channels[1], 3)
+        pauses = []
+
+        totals = refresh_derived_metrics_in_batches(
+            sessionmaker(bind=db_session.get_bind()),
+            batch_size=3,
+            pause_seconds=1,
+            sleep=pauses.append
+        )
+
+        assert totals == {"batches": 3, "updated": 8}
+        assert pauses == [1, 1]
+        assert _rates(db_session, channels[1])["2"] == pytest.approx(0.166667)
+
+    def test_metric_refresh_on_upsert(self, db_session, channels):
+        """Test that rates come from the stored counters, not from incoming rows."""
+        channel = channels[0]
+        post = {"post_id": "1", "date": datetime(2024, 1, 1), "content_type": "text", "views": 100, "likes": 10}
+        upsert_posts(db_session, channel.id, [{**post, "engagement_rate": 0.9}])
+        db_session.commit()
+        assert _rates(db_session, channel) == {"1": pytest.approx(0.1)}
+
+        upsert_posts(db_session, channel.id, [{**post, "views": 400}], update_fields=["views", "likes"])
+        db_session.commit()
+
+        assert _rates(db_session, channel) == {"1": pytest.approx(0.025)}
@@ -0,0 +1,117 @@
+"""
+Tests for the spaCy model registry.
+"""
+from types import SimpleNamespace
+from app.core.nlp import NlpModelRegistry, detect_language
+
+
+class FakeModel:
+    """spaCy stand-in tagging every word as a noun."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def pipe(self, texts, batch_size=1000, n_process=1):
+        texts = list(texts)
+        self.calls.append({"texts": texts, "batch_size": batch_size, "n_process": n_process})
+        for text in texts:
+            yield [
+                SimpleNamespace(pos_="NOUN", lemma_=f"{self.name}:{word}", is_stop=False, is_punct=False)
+                for word in text.split()
+            ]
+
+
+def _registry(installed=("en_core_web_sm", "ru_core_news_sm")):
+    """Registry loading fake models, failing for packages that are not installed."""
+    loaded = []
+
+    def loader(name):
+        loaded.append(name)
+        if name not in installed:
+            raise OSError(f"Can't find model '{name}'")
+        return FakeModel(name)
+
+    registry = NlpModelRegistry(
+        models={"en": "en_core_web_sm", "ru": "ru_core_news_sm"},
+        loader=loader
+    )
+    return registry, loaded
+
+
+class TestDetectLanguage:
+    """Test alphabet-based language detection."""
+
+    def test_languages(self):
+        """Test that mostly Cyrillic texts are Russian."""
+        assert detect_language("Новый релиз библиотеки") == "ru"
+        assert detect_language("New library release") == "en"
+        assert detect_language("Релиз Python 3.12 вышел") == "ru"
+        assert detect_language("12345") == "en"
+
+
+class TestNlpModelRegistry:
+    """Test lazy per-language model loading."""
+
+    def test_models_loaded_once(self):
+        """Test that a model is loaded on first use and then reused."""
+        registry, loaded = _registry()
+
+        assert loaded == []
+        first = registry.get("ru")
+        assert registry.get("ru") is first
+        assert loaded == ["ru_core_news_sm"]
+
+    def test_fallback_to_default_language(self):
+        """Test that a missing model falls back to the default language and is not retried."""
+        registry, loaded = _registry(installed=("en_core_web_sm",))
+
+        assert registry.get("ru").name == "en_core_web_sm"
+        registry.get("ru")
+
+        assert loaded == ["ru_core_news_sm", "en_core_web_sm"]
+        assert registry.is_available()
+
+    def test_no_models(self):
+        """Test that texts get no docs when nothing is installed."""
+        registry, _ = _registry(installed=())
+
+        assert not registry.is_available()
+        assert registry.pipe(["Hello", "Привет"]) == [None, None]
+
+    def test_pipe_groups_by_language(self):
+        """Test that texts go to their language model and docs keep text order."""
+        registry, _ = _registry()
+        texts = ["Привет мир", "hello world", "", "пока"]
+
+        docs = registry.pipe(texts, batch_size=64, n_process=4)
+
+        assert [[token.lemma_ for token in doc] if doc is not None else None for doc in docs] == [
+            ["ru_core_news_sm:Привет", "ru_core_news_sm:мир"],
+            ["en_core_web_sm:hello", "en_core_web_sm:world"],
+            None,
+            ["ru_core_news_sm:пока"],
+        ]
+        ru_calls = registry.get("ru").calls
+        assert len(ru_calls) == 1
+        assert ru_calls[0]["texts"] == ["Привет мир", "пока"]
+        assert ru_calls[0]["batch_size"] == 64
+        # A single batch is not worth starting processes
+        assert ru_calls[0]["n_process"] == 1
+
+    def test_pipe_multiprocess_for_large_input(self):
+        """Test that processes are only used when there are several batches."""
+        registry, _ = _registry()
+
+        registry.pipe([f"post {i}" for i in range(10)], batch_size=4, n_process=2)
+
+        assert registry.get("en").calls[0]["n_process"] == 2
+
+    def test_warm_up(self):
+        """Test that warm-up loads and runs every installed model once."""
+        registry, loaded = _registry(installed=("en_core_web_sm",))
+
+        registry.warm_up()
+
+        assert loaded == ["en_core_web_sm", "ru_core_news_sm"]
+        assert len(registry.get("en").calls) == 1
@@ -0,0 +1,80 @@
+"""
+Tests for per-channel parse locks.
+"""
+import pytest
+from app.core.parse_lock import ChannelParseLease, InMemoryParseLock, parse_lock_key
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestInMemoryParseLock:
+    """Test lock claiming, expiry and ownership."""
+
+    @pytest.fixture
+    def clock(self):
+        """Create fake clock."""
+        return FakeClock()
+
+    @pytest.fixture
+    def lock(self, clock):
+        """Create lock on the fake clock."""
+        return InMemoryParseLock(clock=clock)
+
+    def test_claim_returns_holder(self, lock):
+        """Test that a second owner gets the ID of the first one."""
+        key = parse_lock_key(1, "new_only")
+
+        assert lock.claim(key, "task-1", 60) == "task-1"
+        assert lock.claim(key, "task-2", 60) == "task-1"
+        assert lock.claim(key, "task-1", 60) == "task-1"
+        assert lock.claim(parse_lock_key(1, "full_history"), "task-2", 60) == "task-2"
+
+    def test_stale_lock_expires(self, lock, clock):
+        """Test that a lock without heartbeat is released after its TTL."""
+        key = parse_lock_key(1, "new_only")
+        lock.claim(key, "dead-task", 60)
+
+        clock.now = 50
+        assert lock.claim(key, "task-2", 60) == "dead-task"
+        clock.now = 61
+        assert lock.claim(key, "task-2", 60) == "task-2"
+
+    def test_refresh_and_release_only_by_owner(self, lock, clock):
+        """Test that only the owner can extend or release a lock."""
+        key = parse_lock_key(1, "new_only")
+        lock.claim(key, "task-1", 60)
+
+        assert not lock.refresh(key, "task-2", 60)
+        assert not lock.release(key, "task-2")
+        clock.now = 50
+        assert lock.refresh(key, "task-1", 60)
+        clock.now = 100
+        assert lock.holder(key) == "task-1"
+        assert lock.release(key, "task-1")
+        assert lock.holder(key) is None
+
+
+class TestChannelParseLease:
+    """Test task leases."""
+
+    def test_kept_lease_survives_release(self):
+        """Test that a lease kept for a retry is not released by the finishing run."""
+        lock = InMemoryParseLock()
+        lease = ChannelParseLease(1, "new_only", "task-1", lock=lock)
+        assert lease.acquire()
+
+        lease.keep(120)
+        lease.release()
+
+        duplicate = ChannelParseLease(1, "new_only", "task-2", lock=lock)
+        assert not duplicate.acquire()
+        assert duplicate.holder == "task-1"
+        assert ChannelParseLease(1, "new_only", "task-1", lock=lock).acquire()
@@ -0,0 +1,215 @@
+"""
+Tests for the staged ingestion pipeline.
+"""
+import asyncio
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy.orm import sessionmaker
+from app.agents.content_analyzer import ContentAnalyzerAgent
+from app.core import keywords, pipeline
+from app.core.analysis_cache import AnalysisCache
+from app.core.keywords import DOCUMENTS_TERM, KeywordEngine
+from app.core.nlp import NlpModelRegistry
+from app.core.pipeline import IngestionPipeline, get_pipeline_stats
+from app.models.channel import Channel
+from app.models.keyword_frequency import KeywordDocumentFrequency
+from app.models.post import Post
+
+
+@pytest.fixture
+def channel(db_session):
+    """Create test channel."""
+    channel = Channel(
+        channel_username="test_channel",
+        channel_name="Test Channel"
+    )
+    db_session.add(channel)
+    db_session.commit()
+    return channel
+
+
+@pytest.fixture(autouse=True)
+def keyword_engine(db_session, monkeypatch):
+    """Keyword engine reading frequencies from the test database."""
+    engine = KeywordEngine(session_factory=sessionmaker(bind=db_session.get_bind()), refresh_seconds=0)
+    monkeypatch.setattr(keywords, "_keyword_engine", engine)
+    return engine
+
+
+@pytest.fixture
+def executor():
+    """Executor for CPU stages."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def _post(post_id, text=None, views=100, likes=10):
+    """Build parsed post dictionary."""
+    return {
+        "post_id": str(post_id),
+        "date": datetime(2024, 1, 1),
+        "text": text if text is not None else f"Post {post_id}",
+        "content_type": "text",
+        "views": views,
+        "likes": likes,
+        "comments": None,
+    }
+
+
+class TestIngestionPipeline:
+    """Test fetch -> analyze -> normalize -> write stages."""
+
+    @pytest.mark.asyncio
+    async def test_analysis_stored(self, db_session, channel, executor):
+        """Test that hashtags and engagement rate are written with the post."""
+        async def batches():
+            yield [_post(1, text="Новости: новый релиз #python #release " + "слово " * 200)]
+
+        counts = await IngestionPipeline(db_session, channel.id, executor=executor).run(batches())
+
+        assert counts == {"inserted": 1, "updated": 0, "skipped": 0}
+        post = db_session.query(Post).filter_by(channel_id=channel.id).one()
+        assert set(post.hashtags) == {"#python", "#release"}
+        assert post.engagement_rate == pytest.approx(0.1)
+        assert post.category == "news"
+        assert post.reading_time == 61
+
+    @pytest.mark.asyncio
+    async def test_backpressure(self, db_session, channel, executor):
+        """Test that a slow writer never lets queues grow past their size."""
+        ingestion_pipeline = IngestionPipeline(db_session, channel.id, queue_size=1, executor=executor)
+        write_batch = ingestion_pipeline._write_batch
+
+        def slow_write(*args):
+            time.sleep(0.01)
+            return write_batch(*args)
+
+        ingestion_pipeline._write_batch = slow_write
+
+        async def batches():
+            for start in range(0, 20, 2):
+                yield [_post(start), _post(start + 1)]
+                await asyncio.sleep(0)
+
+        await ingestion_pipeline.run(batches())
+
+        stats = ingestion_pipeline.get_stats()
+        assert stats["write"]["batches"] == 10
+        assert stats["write"]["posts"] == 20
+        for stage in ("analyze", "normalize", "write"):
+            assert stats[stage]["max_queue_depth"] <= 1
+
+    @pytest.mark.asyncio
+    async def test_fetch_error_keeps_earlier_batches(self, db_session, channel, executor):
+        """Test that batches fetched before a failure are written before it is raised."""
+        async def batches():
+            yield [_post(1), _post(2)]
+            raise RuntimeError("flood wait")
+
+        with pytest.raises(RuntimeError):
+            await IngestionPipeline(db_session, channel.id, executor=executor).run(batches())
+
+        assert db_session.query(Post).filter_by(channel_id=channel.id).count() == 2
+
+    @pytest.mark.asyncio
+    async def test_rejected_posts_hold_checkpoint(self, db_session, channel, executor):
+        """Test that invalid posts are dropped and the checkpoint stays below them."""
+        async def batches():
+            yield [_post(1), _post(7, views=-5), _post(8)]
+            yield [_post(9), _post(10)]
+
+        ingestion_pipeline = IngestionPipeline(db_session, channel.id, executor=executor)
+        counts = await ingestion_pipeline.run(batches())
+
+        db_session.refresh(channel)
+        assert counts["inserted"] == 4
+        assert ingestion_pipeline.get_stats()["normalize"]["rejected"] == 1
+        assert channel.last_message_id == 6
+
+    @pytest.mark.asyncio
+    async def test_text_and_odd_ratios_kept(self, db_session, channel, executor):
+        """Test that line breaks survive and more reactions than views do not reject a post."""
+        async def batches():
+            yield [_post(1, text="Title\n\nBody", views=10, likes=30)]
+
+        ingestion_pipeline = IngestionPipeline(db_session, channel.id, executor=executor)
+        await ingestion_pipeline.run(batches())
+
+        post = db_session.query(Post).filter_by(channel_id=channel.id).one()
+        assert post.text == "Title\n\nBody"
+        assert post.engagement_rate == pytest.approx(3.0)
+        assert ingestion_pipeline.get_stats()["normalize"]["rejected"] == 0
+
+    @pytest.mark.asyncio
+    async def test_write_error_stops_pipeline(self, db_session, channel, executor):
+        """Test that a failing writer stops all stages and rolls back."""
+        ingestion_pipeline = IngestionPipeline(db_session, channel.id, queue_size=1, executor=executor)
+
+        def on_batch(batch, counts):
+            raise ValueError("broken callback")
+
+        ingestion_pipeline.on_batch = on_batch
+
+        async def batches():
+            for post_id in range(10):
+                yield [_post(post_id)]
+
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(ingestion_pipeline.run(batches()), timeout=5)
+
+        assert db_session.query(Post).filter_by(channel_id=channel.id).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_process_stats(self, db_session, channel, executor, monkeypatch):
+        """Test that finished runs are added to process-wide stage stats."""
+        monkeypatch.setattr(pipeline, "_totals", {})
+
+        async def batches():
+            yield [_post(1), _post(2), _post(3)]
+
+        await IngestionPipeline(db_session, channel.id, executor=executor).run(batches())
+
+        stats = get_pipeline_stats()
+        assert set(stats) == {"fetch", "analyze", "normalize", "write"}
+        assert stats["analyze"]["posts"] == 3
+        assert stats["write"]["batches"] == 1
+        assert stats["normalize"]["rejected"] == 0
+
+    @pytest.mark.asyncio
+    async def test_keyword_frequencies_count_new_posts(self, db_session, channel, executor, keyword_engine):
+        """Test that document frequencies count every post once and rank the channel's boilerplate last."""
+        class FakeModel:
+            def pipe(self, texts, batch_size=1000, n_process=1):
+                for text in texts:
+                    yield [
+                        SimpleNamespace(pos_="NOUN", lemma_=word, is_stop=False, is_punct=False)
+                        for word in text.split()
+                    ]
+
+        analyzer = ContentAnalyzerAgent(
+            nlp_registry=NlpModelRegistry(models={"en": "fake"}, loader=lambda name: FakeModel()),
+            cache=AnalysisCache(maxsize=100, use_redis=False),
+            keyword_engine=keyword_engine
+        )
+
+        async def batches():
+            yield [_post(1, text="release footer"), _post(2, text="budget footer")]
+
+        async def rescan():
+            yield [_post(1, text="release footer"), _post(3, text="footer footer launch")]
+
+        await IngestionPipeline(db_session, channel.id, analyzer=analyzer, executor=executor).run(batches())
+        await IngestionPipeline(db_session, channel.id, analyzer=analyzer, executor=executor).run(rescan())
+
+        counts = {
+            row.term: row.document_count
+            for row in db_session.query(KeywordDocumentFrequency).filter_by(channel_id=channel.id)
+        }
+        assert counts == {DOCUMENTS_TERM: 3, "footer": 3, "release": 1, "budget": 1, "launch": 1}
+        post = db_session.query(Post).filter_by(channel_id=channel.id, post_id="3").one()
+        assert post.keywords == ["launch", "footer"]
+        analyzed = analyzer.analyze_posts_batch([_post(4, text="footer footer launch")], channel_id=channel.id)
+        assert analyzed[0]["keywords"] == ["launch", "footer"]
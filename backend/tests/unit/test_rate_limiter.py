@@ -0,0 +1,124 @@
+"""
+Tests for Telegram API rate limiter.
+"""
+import pytest
+from app.core.rate_limiter import InMemoryTokenBucket, RateLimitDeferred, TelegramRateLimiter
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestInMemoryTokenBucket:
+    """Test in-memory token bucket."""
+
+    @pytest.fixture
+    def clock(self):
+        """Create fake clock."""
+        return FakeClock()
+
+    @pytest.fixture
+    def bucket(self, clock):
+        """Create bucket with burst of 2 and 1 token per second."""
+        return InMemoryTokenBucket(capacity=2, rate=1.0, clock=clock)
+
+    @pytest.mark.asyncio
+    async def test_burst_then_wait(self, bucket):
+        """Test that burst is allowed and the next request must wait."""
+        assert await bucket.try_acquire() == 0
+        assert await bucket.try_acquire() == 0
+        assert await bucket.try_acquire() == pytest.approx(1.0)
+
+    @pytest.mark.asyncio
+    async def test_refill(self, bucket, clock):
+        """Test that tokens are refilled over time."""
+        await bucket.try_acquire()
+        await bucket.try_acquire()
+        clock.now += 1.0
+        assert await bucket.try_acquire() == 0
+
+    @pytest.mark.asyncio
+    async def test_penalize_blocks_and_slows_down(self, bucket, clock):
+        """Test that flood wait blocks the bucket and halves the rate."""
+        await bucket.penalize(30)
+
+        assert await bucket.try_acquire() == pytest.approx(30)
+
+        snapshot = await bucket.snapshot()
+        assert snapshot["rate_per_second"] == pytest.approx(0.5)
+        assert snapshot["blocked_for_seconds"] == pytest.approx(30)
+
+        clock.now += 32
+        assert await bucket.try_acquire() == 0
+        snapshot = await bucket.snapshot()
+        assert 0.5 < snapshot["rate_per_second"] <= 1.0
+
+
+class TestTelegramRateLimiter:
+    """Test rate limiter wrapper."""
+
+    @pytest.fixture
+    def clock(self):
+        """Create fake clock."""
+        return FakeClock()
+
+    @pytest.fixture
+    def limiter(self, clock):
+        """Create limiter whose sleep advances the fake clock."""
+        async def fake_sleep(seconds):
+            clock.now += seconds
+
+        bucket = InMemoryTokenBucket(capacity=1, rate=0.5, clock=clock)
+        return TelegramRateLimiter(bucket, sleep=fake_sleep)
+
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_token(self, limiter):
+        """Test that acquire sleeps until a token is available."""
+        assert await limiter.acquire() == 0
+        assert await limiter.acquire() == pytest.approx(2.0)
+
+    @pytest.mark.asyncio
+    async def test_long_wait_is_deferred(self, limiter):
+        """Test that acquire raises instead of sleeping longer than max_wait."""
+        await limiter.report_flood_wait(120)
+
+        with pytest.raises(RateLimitDeferred) as exc_info:
+            await limiter.acquire(max_wait=30)
+
+        assert exc_info.value.seconds == pytest.approx(120)
+        assert (await limiter.get_stats())["deferrals"] == 1
+        assert await limiter.acquire() >= 120
+
+    @pytest.mark.asyncio
+    async def test_stats(self, limiter):
+        """Test that wait and flood statistics are collected."""
+        await limiter.acquire()
+        await limiter.acquire()
+        await limiter.report_flood_wait(10)
+
+        stats = await limiter.get_stats()
+
+        assert stats["backend"] == "memory"
+        assert stats["requests"] == 2
+        assert stats["waits"] == 1
+        assert stats["wait_seconds"] == pytest.approx(2.0)
+        assert stats["flood_waits"] == 1
+        assert stats["flood_wait_seconds"] == 10
+        assert stats["blocked_for_seconds"] == pytest.approx(10)
+
+    @pytest.mark.asyncio
+    async def test_throughput_stats(self, limiter):
+        """Test that fetched messages are reported as throughput."""
+        await limiter.record_fetched(300, 2.0)
+        await limiter.record_fetched(100, 2.0)
+
+        stats = await limiter.get_stats()
+
+        assert stats["messages"] == 400
+        assert stats["messages_per_second"] == pytest.approx(100.0)
@@ -0,0 +1,244 @@
+"""
+Tests for real-time push ingestion.
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from sqlalchemy.orm import sessionmaker
+from telethon.tl.types import Message, PeerChannel
+from app.agents.channel_parser import ChannelParserAgent
+from app.core import keywords
+from app.core.entity_cache import EntityCache
+from app.core.keywords import DOCUMENTS_TERM, KeywordEngine
+from app.core.realtime import RealtimeIngestor
+from app.models.channel import Channel
+from app.models.keyword_frequency import KeywordDocumentFrequency
+from app.models.post import Post
+
+
+@pytest.fixture(autouse=True)
+def keyword_engine(db_session, monkeypatch):
+    """Keyword engine reading frequencies from the test database."""
+    engine = KeywordEngine(session_factory=sessionmaker(bind=db_session.get_bind()), refresh_seconds=0)
+    monkeypatch.setattr(keywords, "_keyword_engine", engine)
+    return engine
+
+
+class FakeResult:
+    """Celery AsyncResult stand-in finished by the test."""
+
+    def __init__(self, result=None):
+        self.result = result
+
+    def ready(self):
+        return self.result is not None
+
+
+def batch_result(channel, status, **extra):
+    """Result of parse_channels_batch_task for one channel."""
+    return {"channels": {str(channel.id): {"status": status}}, **extra}
+
+
+def make_event(channel_id, message_id, text="Post", views=10):
+    """Create mock NewMessage/MessageEdited event."""
+    message = MagicMock(spec=Message)
+    message.id = message_id
+    message.peer_id = PeerChannel(channel_id=channel_id)
+    message.date = datetime(2024, 1, 1)
+    message.text = text
+    message.views = views
+    message.photo = None
+    message.video = None
+    message.document = None
+    message.entities = None
+    message.reactions = None
+    event = MagicMock()
+    event.message = message
+    return event
+
+
+class TestRealtimeIngestor:
+    """Test micro-batched push ingestion."""
+
+    @pytest.fixture
+    def channel(self, db_session):
+        """Create active and inactive channels."""
+        channel = Channel(channel_username="test_channel", channel_name="Test Channel")
+        db_session.add_all([
+            channel,
+            Channel(channel_username="disabled", channel_name="Disabled", is_active=False),
+        ])
+        db_session.commit()
+        return channel
+
+    @pytest.fixture
+    def ingestor(self, db_session, channel):
+        """Create ingestor with a mock client and cached peers."""
+        client = MagicMock()
+        client.is_connected.return_value = True
+        entity_cache = EntityCache()
+        entity_cache.put("test_channel", 1001, 1)
+        entity_cache.put("disabled", 1002, 1)
+        parser = ChannelParserAgent(client=client, entity_cache=entity_cache)
+        self.catch_ups = []
+
+        return RealtimeIngestor(
+            client,
+            session_factory=sessionmaker(bind=db_session.get_bind()),
+            batch_size=2,
+            on_catch_up=self.catch_ups.append,
+            parser=parser
+        )
+
+    @pytest.mark.asyncio
+    async def test_listens_to_active_channels(self, ingestor, channel):
+        """Test that handlers are registered for active channels only."""
+        await ingestor.refresh_channels()
+
+        assert ingestor.channel_ids == [channel.id]
+        assert ingestor.client.add_event_handler.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_batch(self, db_session, ingestor, channel):
+        """Test that buffered posts are written and the checkpoint advances."""
+        await ingestor.refresh_channels()
+        await ingestor._on_message(make_event(1001, 7))
+        await ingestor._on_message(make_event(1001, 8))
+        await ingestor._on_message(make_event(1002, 9))
+
+        assert ingestor.pending_count() == 2
+        assert ingestor.flush() == 2
+
+        db_session.refresh(channel)
+        assert db_session.query(Post).count() == 2
+        assert channel.last_message_id == 8
+        assert ingestor.get_stats()["ignored"] == 1
+
+    @pytest.mark.asyncio
+    async def test_edit_updates_text(self, db_session, ingestor):
+        """Test that an edited message replaces the stored text."""
+        await ingestor.refresh_channels()
+        await ingestor._on_message(make_event(1001, 7, text="Draft"))
+        ingestor.flush()
+        await ingestor._on_message(make_event(1001, 7, text="Final", views=50))
+        ingestor.flush()
+
+        post = db_session.query(Post).one()
+        assert post.text == "Final"
+        assert post.views == 50
+
+    @pytest.mark.asyncio
+    async def test_pushed_posts_analyzed(self, db_session, ingestor, channel):
+        """Test that pushed posts are stored like polled ones and counted in keyword frequencies."""
+        await ingestor.refresh_channels()
+        await ingestor._on_message(make_event(1001, 7, text="Release notes\n\n#python @team https://example.com"))
+        ingestor.flush()
+
+        post = db_session.query(Post).one()
+        assert post.text == "Release notes\n\n#python @team https://example.com"
+        assert post.hashtags == ["#python"]
+        assert post.mentions == ["@team"]
+        assert post.links == ["https://example.com"]
+        assert post.reading_time is not None
+        assert post.analyzer_version == ingestor.analyzer.cache_version()
+        assert db_session.query(KeywordDocumentFrequency).filter_by(
+            channel_id=channel.id, term=DOCUMENTS_TERM
+        ).one().document_count == 1
+
+        # An edit refreshes what is derived from the text
+        await ingestor._on_message(make_event(1001, 7, text="Release notes #rust"))
+        ingestor.flush()
+        db_session.expire_all()
+        assert db_session.query(Post).one().hashtags == ["#rust"]
+
+    @pytest.mark.asyncio
+    async def test_catch_up_polls_listened_channels(self, ingestor, channel):
+        """Test that catch-up is requested for listened channels."""
+        await ingestor.refresh_channels()
+        ingestor.catch_up()
+
+        assert self.catch_ups == [[channel.id]]
+
+    async def _disconnect_and_miss(self, ingestor):
+        """Write message 5, drop the connection and reconnect, missing messages 6..9."""
+        await ingestor.refresh_channels()
+        await ingestor._on_message(make_event(1001, 5))
+        ingestor.flush()
+
+        ingestor.client.is_connected.return_value = False
+        ingestor.check_connection(was_connected=True)
+        ingestor.client.is_connected.return_value = True
+        ingestor.check_connection(was_connected=False)
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_held_until_caught_up(self, db_session, ingestor, channel):
+        """Test that pushes after a disconnect do not move the checkpoint past the missed range."""
+        catch_up = FakeResult()
+        ingestor._on_catch_up = lambda channel_ids: catch_up
+        await self._disconnect_and_miss(ingestor)
+        # The catch-up parse has not run yet
+        await ingestor._on_message(make_event(1001, 10))
+        ingestor.flush()
+
+        db_session.refresh(channel)
+        assert channel.last_message_id == 5
+        assert db_session.query(Post).count() == 2
+
+        catch_up.result = batch_result(channel, "ok")
+        await ingestor._on_message(make_event(1001, 11))
+        assert await ingestor.flush_async() == 1
+
+        db_session.refresh(channel)
+        assert channel.last_message_id == 11
+        assert ingestor.get_stats()["reconnects"] == 1
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_held_while_catch_up_deferred(self, db_session, ingestor, channel):
+        """Test that a deferred channel stays held until the batch queued again has parsed it."""
+        catch_up = FakeResult()
+        requeued = FakeResult()
+        ingestor._on_catch_up = lambda channel_ids: catch_up
+        ingestor._follow_task = {"requeued-task": requeued}.__getitem__
+        await self._disconnect_and_miss(ingestor)
+
+        catch_up.result = batch_result(channel, "deferred", requeued_task_id="requeued-task")
+        await ingestor._on_message(make_event(1001, 10))
+        ingestor.flush()
+
+        db_session.refresh(channel)
+        assert channel.last_message_id == 5
+
+        requeued.result = batch_result(channel, "ok")
+        await ingestor._on_message(make_event(1001, 11))
+        ingestor.flush()
+
+        db_session.refresh(channel)
+        assert channel.last_message_id == 11
+
+    @pytest.mark.asyncio
+    async def test_skipped_channel_polled_again(self, db_session, ingestor, channel):
+        """Test that a channel skipped for a running parse is polled again once that parse is ready."""
+        first, second, running = FakeResult(), FakeResult(), FakeResult()
+        catch_ups = [first, second]
+        ingestor._on_catch_up = lambda channel_ids: catch_ups.pop(0)
+        ingestor._follow_task = {"running-task": running}.__getitem__
+        await self._disconnect_and_miss(ingestor)
+
+        first.result = batch_result(channel, "skipped", task_id="running-task")
+        await ingestor._on_message(make_event(1001, 10))
+        ingestor.flush()
+        running.result = {"inserted": 0}
+        await ingestor._on_message(make_event(1001, 10))
+        ingestor.flush()
+
+        db_session.refresh(channel)
+        assert channel.last_message_id == 5
+        assert catch_ups == []
+
+        second.result = batch_result(channel, "ok")
+        await ingestor._on_message(make_event(1001, 11))
+        ingestor.flush()
+
+        db_session.refresh(channel)
+        assert channel.last_message_id == 11
+        assert ingestor.get_stats()["catch_ups"] == 2
@@ -0,0 +1,151 @@
+"""
+Tests for re-analysis of stored posts.
+"""
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy.orm import sessionmaker
+from app.agents.content_analyzer import ContentAnalyzerAgent
+from app.core.analysis_cache import AnalysisCache
+from app.core.categorizer import TaxonomyCategorizer
+from app.core.keywords import KeywordEngine
+from app.core.nlp import NlpModelRegistry
+from app.core.reanalysis import PostReanalyzer
+from app.models.channel import Channel
+from app.models.post import Post
+
+
+class FakeModel:
+    """spaCy stand-in tagging every word as a noun."""
+
+    def pipe(self, texts, batch_size=1000, n_process=1):
+        for text in texts:
+            yield [
+                SimpleNamespace(pos_="NOUN", lemma_=word.lower(), is_stop=False, is_punct=False)
+                for word in text.split()
+            ]
+
+
+@pytest.fixture
+def analyzer():
+    """Analyzer with a fake model and no shared state."""
+    return ContentAnalyzerAgent(
+        nlp_registry=NlpModelRegistry(models={"en": "fake"}, loader=lambda name: FakeModel()),
+        categorizer=TaxonomyCategorizer(path=""),
+        cache=AnalysisCache(maxsize=100, use_redis=False),
+        keyword_engine=KeywordEngine(refresh_seconds=3600)
+    )
+
+
+@pytest.fixture
+def posts(db_session, analyzer):
+    """Store a channel with stale posts and one already up to date."""
+    channel = Channel(channel_username="test_channel", channel_name="Test Channel")
+    db_session.add(channel)
+    db_session.commit()
+
+    posts = [
+        Post(
+            post_id=str(i),
+            channel_id=channel.id,
+            text=f"Breaking news #tag{i} see https://example.com/{i}",
+            date=datetime(2024, 1, 1),
+            content_type="link",
+            hashtags=["#old"],
+            analyzer_version="0:old" if i % 2 else None
+        )
+        for i in range(5)
+    ]
+    posts.append(Post(
+        post_id="fresh",
+        channel_id=channel.id,
+        text="Breaking news",
+        date=datetime(2024, 1, 1),
+        content_type="text",
+        hashtags=["#kept"],
+        analyzer_version=analyzer.cache_version()
+    ))
+    db_session.add_all(posts)
+    db_session.commit()
+    return posts
+
+
+class TestPostReanalyzer:
+    """Test paging, bulk writes and resuming."""
+
+    def _reanalyzer(self, db_session, analyzer, **kwargs):
+        """Re-analyzer on the test database that never sleeps."""
+        return PostReanalyzer(
+            session_factory=sessionmaker(bind=db_session.get_bind()),
+            analyzer=analyzer,
+            pause_seconds=0,
+            sleep=lambda seconds: None,
+            **kwargs
+        )
+
+    def test_stale_posts_rewritten(self, db_session, analyzer, posts):
+        """Test that stale posts get fresh derived fields and the current version."""
+        result = self._reanalyzer(db_session, analyzer, batch_size=2).run()
+
+        assert result["processed"] == 5
+        assert result["done"] is True
+        db_session.expire_all()
+        post = db_session.query(Post).filter_by(post_id="3").one()
+        assert post.hashtags == ["#tag3"]
+        assert post.links == ["https://example.com/3"]
+        assert post.category == "news"
+        assert post.keywords[:2] == ["breaking", "news"]
+        assert post.reading_time == 1
+        assert post.analyzer_version == analyzer.cache_version()
+        assert db_session.query(Post).filter_by(post_id="fresh").one().hashtags == ["#kept"]
+
+    def test_resumes_after_time_budget(self, db_session, analyzer, posts):
+        """Test that a run stops after its time budget and the next one continues."""
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += 10
+
+        reanalyzer = self._reanalyzer(db_session, analyzer, batch_size=2, max_seconds=5)
+        reanalyzer._clock = lambda: now[0]
+        reanalyzer._sleep = sleep
+
+        first = reanalyzer.run()
+        assert first["processed"] == 4
+        assert first["done"] is False
+
+        now[0] = 0.0
+        second = reanalyzer.run(after_id=first["last_id"])
+        assert second["processed"] == 1
+        assert second["done"] is True
+
+        # Nothing is stale anymore
+        assert reanalyzer.run()["processed"] == 0
+
+    def test_process_pool(self, db_session, analyzer, posts):
+        """Test that texts analyzed in pool processes are written back."""
+        result = self._reanalyzer(db_session, analyzer, processes=2).run()
+
+        assert result["processed"] == 5
+        db_session.expire_all()
+        post = db_session.query(Post).filter_by(post_id="0").one()
+        assert post.hashtags == ["#tag0"]
+        assert post.category == "news"
+
+
+class TestReanalyzePostsTask:
+    """Test chaining of re-analysis runs."""
+
+    def test_unfinished_run_queues_next(self):
+        """Test that a run stopped by its time budget queues a run continuing after its last post."""
+        from app.core import tasks
+
+        result = {"version": "2", "processed": 500, "last_id": 812, "done": False}
+        with patch.object(PostReanalyzer, "__init__", return_value=None), \
+                patch.object(PostReanalyzer, "run", return_value=result) as mock_run, \
+                patch.object(tasks.reanalyze_posts_task, "apply_async") as mock_apply:
+            assert tasks.reanalyze_posts_task(100) == result
+
+        mock_run.assert_called_once_with(after_id=100)
+        assert mock_apply.call_args.kwargs["args"] == [812]
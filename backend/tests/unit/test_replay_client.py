@@ -0,0 +1,167 @@
+"""
+Tests for the offline replay Telegram client.
+"""
+import pytest
+from telethon.errors import FloodWaitError
+from app.agents.channel_parser import ChannelParserAgent
+from app.core.entity_cache import EntityCache
+from app.core.rate_limiter import InMemoryTokenBucket, TelegramRateLimiter
+from app.core.replay_client import (
+    RecordedChannel,
+    ReplayTelegramClient,
+    SyntheticChannel,
+    parse_replay_source,
+    record_messages,
+)
+from benchmarks.ingestion import run_benchmark
+
+
+class TestReplayTelegramClient:
+    """Test replayed histories and request accounting."""
+    
+    @pytest.fixture
+    def clock(self):
+        """Shared fake clock for the client and the rate limiter."""
+        return {"now": 0.0}
+    
+    def _make_parser(self, client, clock):
+        """Create parser on the replay client with a limiter that never sleeps."""
+        async def fake_sleep(seconds):
+            clock["now"] += seconds
+        
+        bucket = InMemoryTokenBucket(capacity=1000, rate=1000.0, clock=lambda: clock["now"])
+        limiter = TelegramRateLimiter(bucket, sleep=fake_sleep)
+        return ChannelParserAgent(
+            rate_limiter=limiter,
+            client=client,
+            entity_cache=EntityCache(),
+            takeout_rate_limiter=limiter
+        )
+    
+    @pytest.mark.asyncio
+    async def test_iter_messages_pages(self):
+        """Test history is served newest first in pages of page_size."""
+        client = ReplayTelegramClient([SyntheticChannel("replay", 250)], page_size=100)
+        
+        ids = [message.id async for message in client.iter_messages("replay")]
+        
+        assert ids == list(range(250, 0, -1))
+        assert client.stats["requests"] == 3
+        assert client.stats["messages"] == 250
+    
+    @pytest.mark.asyncio
+    async def test_iter_messages_id_range_reverse(self):
+        """Test exclusive ID bounds, reverse order and deleted IDs."""
+        client = ReplayTelegramClient([SyntheticChannel("replay", 100, gap_every=5)])
+        
+        ids = [
+            message.id
+            async for message in client.iter_messages("replay", min_id=10, max_id=20, reverse=True)
+        ]
+        
+        assert ids == [11, 12, 13, 14, 16, 17, 18, 19]
+    
+    @pytest.mark.asyncio
+    async def test_injected_flood_wait(self):
+        """Test every N-th request raises FloodWaitError until it expires."""
+        clock = {"now": 0.0}
+        client = ReplayTelegramClient(
+            [SyntheticChannel("replay", 10)],
+            flood_wait_every=3,
+            flood_wait_seconds=5,
+            clock=lambda: clock["now"]
+        )
+        
+        await client.get_entity("replay")
+        await client.get_entity("replay")
+        with pytest.raises(FloodWaitError) as exc_info:
+            await client.get_entity("replay")
+        assert exc_info.value.seconds == 5
+        
+        clock["now"] = 2
+        with pytest.raises(FloodWaitError):
+            await client.get_entity("replay")
+        
+        clock["now"] = 5
+        await client.get_entity("replay")
+        assert client.stats["flood_waits"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_parser_resumes_after_flood_waits(self, clock):
+        """Test parser fetches every post exactly once despite flood waits."""
+        client = ReplayTelegramClient(
+            [SyntheticChannel("replay", 1000)],
+            flood_wait_every=4,
+            flood_wait_seconds=3,
+            clock=lambda: clock["now"]
+        )
+        parser = self._make_parser(client, clock)
+        
+        post_ids = [post["post_id"] async for post in parser.iter_posts("replay", parse_mode="full_history")]
+        
+        assert post_ids == [str(message_id) for message_id in range(1000, 0, -1)]
+        assert client.stats["flood_waits"] > 0
+        assert client.stats["messages"] == 1000
+    
+    @pytest.mark.asyncio
+    async def test_parser_takeout_requests(self, clock):
+        """Test takeout requests are counted separately."""
+        client = ReplayTelegramClient([SyntheticChannel("replay", 250)])
+        parser = self._make_parser(client, clock)
+        
+        posts = [post async for post in parser.iter_posts("replay", takeout=True)]
+        
+        assert len(posts) == 250
+        assert client.stats["takeout_requests"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_stale_access_hash_is_rejected(self, clock):
+        """Test parser re-resolves a channel when the cached access hash is stale."""
+        client = ReplayTelegramClient([SyntheticChannel("replay", 5)])
+        parser = self._make_parser(client, clock)
+        entity = await client.get_entity("replay")
+        parser.entity_cache.put("replay", entity.id, entity.access_hash + 1)
+        
+        posts = [post async for post in parser.iter_posts("replay")]
+        
+        assert len(posts) == 5
+    
+    @pytest.mark.asyncio
+    async def test_recording_round_trip(self, tmp_path):
+        """Test recorded messages replay with the same content."""
+        source = ReplayTelegramClient([SyntheticChannel("replay", 20)])
+        messages = [message async for message in source.iter_messages("replay")]
+        path = tmp_path / "recorded.jsonl"
+        
+        assert record_messages(messages, str(path)) == 20
+        
+        channel = RecordedChannel.from_jsonl(str(path))
+        client = ReplayTelegramClient([channel])
+        replayed = [message async for message in client.iter_messages("recorded", max_id=11)]
+        
+        assert channel.username == "recorded"
+        assert [message.id for message in replayed] == list(range(10, 0, -1))
+        assert replayed[0].message == messages[10].message
+        assert replayed[0].views == messages[10].views
+    
+    def test_parse_replay_source(self):
+        """Test synthetic source specification."""
+        channels = parse_replay_source("synthetic:first=10,second=20")
+        
+        assert [(channel.username, channel.latest_id) for channel in channels] == [
+            ("first", 10),
+            ("second", 20),
+        ]
+
+
+class TestIngestionBenchmark:
+    """Test ingestion benchmark."""
+    
+    def test_run_benchmark(self):
+        """Test benchmark reports throughput and API calls per post."""
+        result = run_benchmark("new_only", messages=5000, new_messages=250, batch_size=100)
+        
+        assert result["posts"] == 250
+        assert result["api_calls"] == 4
+        assert result["api_calls_per_post"] == 0.016
+        assert result["posts_per_second"] > 0
@@ -0,0 +1,104 @@
+"""
+Tests for adaptive polling scheduler.
+"""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from app.core.config import settings
+from app.core.scheduler import build_poll_schedule, claim_due_channels, poll_interval, predict_api_spend
+from app.models.channel import Channel
+from app.models.post import Post
+
+NOW = datetime(2024, 3, 1, 12, 0)
+
+
+class TestPollInterval:
+    """Test polling interval computation."""
+
+    def test_hot_channel_polled_often(self):
+        """Test that busy channels get the minimum interval."""
+        assert poll_interval(1000, 1) == settings.POLL_MIN_INTERVAL_MINUTES
+
+    def test_dormant_channel_polled_daily(self):
+        """Test that channels without recent posts get the maximum interval."""
+        assert poll_interval(0, None) == settings.POLL_MAX_INTERVAL_MINUTES
+
+    def test_interval_follows_posting_rate(self):
+        """Test that the interval targets a fixed number of posts per poll."""
+        assert poll_interval(24, 0) == pytest.approx(60 * settings.POLL_TARGET_POSTS_PER_POLL)
+
+    def test_silence_stretches_interval(self):
+        """Test that a long silence makes polling less frequent."""
+        assert poll_interval(24, 8 * 60) > poll_interval(24, 0)
+
+    def test_realtime_ingestion_only_catches_up(self):
+        """Test that push ingestion leaves polling as a daily safety net."""
+        with patch.object(settings, "REALTIME_INGESTION_ENABLED", True):
+            assert poll_interval(1000, 1) == settings.POLL_MAX_INTERVAL_MINUTES
+
+    def test_inactive_channel_not_polled(self):
+        """Test that disabled channels are not scheduled."""
+        assert poll_interval(1000, 1, is_active=False) is None
+
+
+class TestPollSchedule:
+    """Test schedule building and claiming."""
+
+    @pytest.fixture
+    def channels(self, db_session):
+        """Create hot, dormant and disabled channels."""
+        hot = Channel(channel_username="hot", channel_name="Hot", last_post_at=NOW - timedelta(minutes=30))
+        dormant = Channel(channel_username="dormant", channel_name="Dormant", last_post_at=NOW - timedelta(days=30))
+        disabled = Channel(channel_username="disabled", channel_name="Disabled", is_active=False)
+        db_session.add_all([hot, dormant, disabled])
+        db_session.commit()
+
+        db_session.add_all([
+            Post(
+                post_id=str(i),
+                channel_id=hot.id,
+                date=NOW - timedelta(minutes=30 * i),
+                text="Post",
+                content_type="text"
+            )
+            for i in range(1, 200)
+        ])
+        db_session.add(Post(
+            post_id="1",
+            channel_id=dormant.id,
+            date=NOW - timedelta(days=30),
+            text="Post",
+            content_type="text"
+        ))
+        db_session.commit()
+        return hot, dormant, disabled
+
+    def test_build_schedule(self, db_session, channels):
+        """Test that intervals follow channel activity."""
+        hot, dormant, disabled = channels
+        schedule = {entry["channel_id"]: entry for entry in build_poll_schedule(db_session, NOW)}
+
+        assert schedule[hot.id]["interval_minutes"] < schedule[dormant.id]["interval_minutes"]
+        assert schedule[dormant.id]["interval_minutes"] == settings.POLL_MAX_INTERVAL_MINUTES
+        assert schedule[disabled.id]["interval_minutes"] is None
+        assert schedule[hot.id]["due"] and schedule[dormant.id]["due"]
+        assert not schedule[disabled.id]["due"]
+
+    def test_claim_due_channels(self, db_session, channels):
+        """Test that claimed channels are not due again until their interval passes."""
+        hot, dormant, disabled = channels
+
+        assert sorted(claim_due_channels(db_session, NOW)) == sorted([hot.id, dormant.id])
+        assert claim_due_channels(db_session, NOW + timedelta(minutes=1)) == []
+
+        db_session.refresh(hot)
+        assert hot.next_poll_at > NOW
+        assert claim_due_channels(db_session, hot.next_poll_at) == [hot.id]
+
+    def test_predict_api_spend(self, db_session, channels):
+        """Test that predicted spend counts polls of active channels only."""
+        spend = predict_api_spend(build_poll_schedule(db_session, NOW))
+
+        assert spend["polled_channels"] == 2
+        assert spend["requests_per_day"] >= spend["polls_per_day"] > 1
+        assert spend["budget_per_day"] == settings.TELEGRAM_REQUESTS_PER_MINUTE * 24 * 60
@@ -0,0 +1,31 @@
+"""
+Tests for cold-start imports of the API and workers.
+"""
+import pytest
+from benchmarks.import_time import run_benchmark
+
+
+class TestColdStart:
+    """Test that heavy dependencies are only imported on first use."""
+
+    def test_api_defers_heavy_imports(self):
+        """Test that importing the API loads no spaCy, telethon, openpyxl or Celery."""
+        result = run_benchmark("app.main", runs=1)
+
+        assert result["deferred_modules_loaded"] == []
+
+    def test_worker_defers_analysis_and_export(self):
+        """Test that importing the tasks loads neither spaCy nor openpyxl."""
+        result = run_benchmark("app.core.tasks", runs=1, allow=["telethon", "celery"])
+
+        assert result["deferred_modules_loaded"] == []
+
+    def test_agents_package_exports(self):
+        """Test that agents are still importable from the package."""
+        from app import agents
+        from app.agents import ExportAgent
+        from app.agents.export import ExportAgent as ModuleExportAgent
+
+        assert ExportAgent is ModuleExportAgent
+        with pytest.raises(AttributeError):
+            agents.MissingAgent
@@ -0,0 +1,415 @@
+"""
+Tests for channel parsing tasks.
+"""
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy.orm import sessionmaker
+from app.core import parse_lock, tasks
+from app.core.parse_lock import ChannelParseLease, InMemoryParseLock
+from app.core.rate_limiter import RateLimitDeferred
+from app.core.tasks import parse_channels_concurrently
+from app.core.telegram_pool import TelegramClientPool
+from app.models.backfill_chunk import BackfillChunk
+from app.models.channel import Channel
+from app.models.post import Post
+from tests.unit.test_telegram_pool import make_client
+
+
+@pytest.fixture(autouse=True)
+def parse_locks():
+    """Use in-process parse locks."""
+    lock = InMemoryParseLock()
+    with patch.object(parse_lock, "_parse_lock", lock):
+        yield lock
+
+
+class FakeParser:
+    """Parser returning two posts per channel, failing for one channel."""
+
+    in_flight = 0
+    max_in_flight = 0
+
+    def __init__(self, client=None, max_wait=None):
+        self.client = client
+
+    async def parse_channel_username(self, channel_url):
+        return channel_url.rsplit("/", 1)[-1]
+
+    async def get_channel_metadata(self, channel_username):
+        return {"channel_username": channel_username, "channel_name": channel_username}
+
+    async def iter_post_batches(self, channel_username, batch_size, **kwargs):
+        FakeParser.in_flight += 1
+        FakeParser.max_in_flight = max(FakeParser.max_in_flight, FakeParser.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if channel_username == "broken":
+                raise ValueError("Channel broken is private")
+            if channel_username == "limited":
+                raise RateLimitDeferred(90.5)
+            yield [
+                {"post_id": str(i), "date": datetime(2024, 1, 1), "text": "Post", "content_type": "text", "views": 1, "likes": 0}
+                for i in (1, 2)
+            ]
+        finally:
+            FakeParser.in_flight -= 1
+
+
+class TestParseChannelsConcurrently:
+    """Test concurrent multi-channel parsing."""
+
+    @pytest.fixture
+    def channels(self, db_session):
+        """Create test channels, one of which fails to parse."""
+        channels = [
+            Channel(channel_username=name, channel_name=name)
+            for name in ("first", "broken", "second", "third")
+        ]
+        db_session.add_all(channels)
+        db_session.commit()
+        return channels
+
+    @pytest.fixture(autouse=True)
+    def patched(self, db_session):
+        """Run tasks against the test database, fake parser and mock clients."""
+        FakeParser.in_flight = 0
+        FakeParser.max_in_flight = 0
+        pool = TelegramClientPool(1, client_factory=lambda index: make_client())
+        session_factory = sessionmaker(bind=db_session.get_bind())
+
+        with patch.object(tasks, "SessionLocal", session_factory), \
+                patch.object(tasks, "ChannelParserAgent", FakeParser), \
+                patch.object(tasks, "get_client_pool", return_value=pool):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_errors_are_isolated(self, db_session, channels):
+        """Test that a failing channel does not stop the others."""
+        result = await parse_channels_concurrently([channel.id for channel in channels])
+
+        assert result["succeeded"] == 3
+        assert result["failed"] == 1
+        assert result["channels"][str(channels[1].id)]["status"] == "error"
+        assert result["channels"][str(channels[0].id)]["inserted"] == 2
+        assert db_session.query(Post).count() == 6
+
+        db_session.expire_all()
+        assert channels[0].last_parsed_at is not None
+        assert channels[1].last_parsed_at is None
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self, channels):
+        """Test that at most the configured number of channels run at once."""
+        await parse_channels_concurrently([channel.id for channel in channels], concurrency=2)
+
+        assert FakeParser.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_unknown_channel(self, channels):
+        """Test that unknown channel IDs are reported as errors."""
+        result = await parse_channels_concurrently([channels[0].id, 999999])
+
+        assert result["channels"]["999999"]["status"] == "error"
+        assert result["succeeded"] == 1
+
+    @pytest.mark.asyncio
+    async def test_deferred_channel(self, db_session, channels):
+        """Test that a channel deferred by the rate limiter is not counted as failed."""
+        limited = Channel(channel_username="limited", channel_name="Limited")
+        db_session.add(limited)
+        db_session.commit()
+
+        result = await parse_channels_concurrently([channels[0].id, limited.id])
+
+        assert result["channels"][str(limited.id)] == {"status": "deferred", "retry_in": 91}
+        assert (result["succeeded"], result["failed"], result["deferred"]) == (1, 0, 1)
+        db_session.expire_all()
+        assert limited.failure_count == 0
+
+    def test_batch_task_requeues_deferred_channels(self, db_session, channels):
+        """Test that deferred channels are queued again once the budget is available."""
+        limited = Channel(channel_username="limited", channel_name="Limited")
+        db_session.add(limited)
+        db_session.commit()
+
+        with patch.object(tasks.parse_channels_batch_task, "apply_async") as mock_apply:
+            mock_apply.return_value.id = "requeued-task"
+            result = tasks.parse_channels_batch_task([channels[0].id, limited.id])
+
+        mock_apply.assert_called_once_with(([limited.id], "new_only", None), countdown=91)
+        assert result["requeued_task_id"] == "requeued-task"
+
+    def test_single_channel_task_retries_when_deferred(self, db_session):
+        """Test that a deferred parse is retried with a countdown instead of sleeping."""
+        limited = Channel(channel_username="limited", channel_name="Limited")
+        db_session.add(limited)
+        db_session.commit()
+
+        with patch.object(tasks.parse_channel_posts_task, "retry", return_value=RuntimeError("retry")) as mock_retry:
+            with pytest.raises(RuntimeError):
+                tasks.parse_channel_posts_task(limited.id)
+
+        assert mock_retry.call_args.kwargs["countdown"] == 91
+        assert isinstance(mock_retry.call_args.kwargs["exc"], RateLimitDeferred)
+
+    @pytest.mark.asyncio
+    async def test_channel_being_parsed_is_skipped(self, channels):
+        """Test that a batch skips channels another task holds the lease of."""
+        ChannelParseLease(channels[0].id, "new_only", "other-task").acquire()
+
+        result = await parse_channels_concurrently([channels[0].id, channels[2].id])
+
+        assert result["channels"][str(channels[0].id)] == {"status": "skipped", "task_id": "other-task"}
+        assert (result["succeeded"], result["skipped"]) == (1, 1)
+        assert ChannelParseLease(channels[2].id, "new_only", "next-task").acquire()
+
+    def test_duplicate_task_is_coalesced(self, db_session, channels):
+        """Test that a parse task finds the running task instead of fetching again."""
+        ChannelParseLease(channels[0].id, "new_only", "other-task").acquire()
+
+        result = tasks.parse_channel_posts_task(channels[0].id)
+
+        assert result == {"status": "duplicate", "task_id": "other-task"}
+        assert db_session.query(Post).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_repeated_failures_dead_letter_channel(self, db_session, channels):
+        """Test that a channel failing PARSE_DEAD_LETTER_AFTER times in a row is dead-lettered."""
+        broken = channels[1]
+        with patch.object(tasks.settings, "PARSE_DEAD_LETTER_AFTER", 2):
+            await parse_channels_concurrently([broken.id])
+            db_session.expire_all()
+            assert broken.failure_count == 1
+            assert broken.dead_lettered_at is None
+
+            await parse_channels_concurrently([broken.id])
+
+        db_session.expire_all()
+        assert broken.failure_count == 2
+        assert broken.dead_lettered_at is not None
+        assert broken.last_error == "Channel broken is private"
+
+    def test_parse_by_url_failure_counts(self, db_session, channels):
+        """Test that failures of parses started by URL count towards the dead-letter threshold."""
+        with pytest.raises(ValueError):
+            tasks.parse_channel_task("https://t.me/broken")
+
+        db_session.expire_all()
+        assert channels[1].failure_count == 1
+        assert channels[1].last_error == "Channel broken is private"
+
+
+class TestDispatchChannelParse:
+    """Test parse deduplication at dispatch."""
+
+    def test_duplicate_requests_get_existing_task_id(self):
+        """Test that repeated requests queue one task and return its ID."""
+        with patch.object(tasks.parse_channel_posts_task, "apply_async") as mock_apply, \
+                patch.object(tasks.backfill_channel_task, "apply_async") as mock_backfill:
+            first = tasks.dispatch_channel_parse(1, "new_only")
+            second = tasks.dispatch_channel_parse(1, "new_only")
+            backfill = tasks.dispatch_channel_parse(1, "full_history")
+
+        assert first[1] and not second[1]
+        assert second[0] == first[0]
+        assert backfill[1] and backfill[0] != first[0]
+        mock_apply.assert_called_once_with((1, "new_only"), task_id=first[0])
+        mock_backfill.assert_called_once_with((1,), task_id=backfill[0])
+
+    def test_lease_released_when_queueing_fails(self):
+        """Test that a failed send does not block later requests."""
+        with patch.object(tasks.parse_channel_posts_task, "apply_async", side_effect=ConnectionError("broker down")):
+            with pytest.raises(ConnectionError):
+                tasks.dispatch_channel_parse(1, "new_only")
+
+        with patch.object(tasks.parse_channel_posts_task, "apply_async"):
+            assert tasks.dispatch_channel_parse(1, "new_only")[1]
+
+
+    def test_vanished_holder_queues_task(self):
+        """Test that a lease released between claim and lookup does not report a null task ID."""
+        with patch.object(ChannelParseLease, "acquire", return_value=False), \
+                patch.object(tasks.parse_channel_posts_task, "apply_async") as mock_apply:
+            task_id, queued = tasks.dispatch_channel_parse(1, "new_only")
+
+        assert queued and task_id is not None
+        mock_apply.assert_called_once_with((1, "new_only"), task_id=task_id)
+
+
+class TestSchedulePollsTask:
+    """Test scheduler beat task."""
+
+    def test_due_channels_are_batched(self, db_session):
+        """Test that due channels are queued in batch parse tasks."""
+        db_session.add_all([
+            Channel(channel_username=f"channel_{i}", channel_name=f"Channel {i}")
+            for i in range(5)
+        ])
+        db_session.commit()
+        session_factory = sessionmaker(bind=db_session.get_bind())
+
+        with patch.object(tasks, "SessionLocal", session_factory), \
+                patch.object(tasks.settings, "POLL_BATCH_SIZE", 2), \
+                patch.object(tasks.parse_channels_batch_task, "delay") as mock_delay:
+            result = tasks.schedule_channel_polls_task()
+
+        assert result == {"due": 5, "batches": 3}
+        assert [len(call.args[0]) for call in mock_delay.call_args_list] == [2, 2, 1]
+
+
+class RangeParser:
+    """Parser yielding one post per message ID of the requested range."""
+
+    calls = []
+    fail_after = None
+    defer_after = None
+    deleted = set()
+
+    def __init__(self, client=None, max_wait=None):
+        self.client = client
+
+    async def iter_post_batches(self, channel_username, batch_size, min_id=0, max_id=0, reverse=False, **kwargs):
+        RangeParser.calls.append((min_id, max_id))
+        batch = []
+        for message_id in range(min_id + 1, max_id):
+            if RangeParser.fail_after is not None and message_id > RangeParser.fail_after:
+                raise ConnectionError("lost")
+            if RangeParser.defer_after is not None and message_id > RangeParser.defer_after:
+                raise RateLimitDeferred(60)
+            if message_id in RangeParser.deleted:
+                continue
+            batch.append({"post_id": str(message_id), "date": datetime(2024, 1, 1), "content_type": "text"})
+            if len(batch) == 10:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class TestBackfillChunkTask:
+    """Test resumable backfill chunks."""
+
+    @pytest.fixture
+    def chunk(self, db_session):
+        """Create channel with one backfill chunk of message IDs 1..50."""
+        channel = Channel(channel_username="test_channel", channel_name="Test Channel")
+        db_session.add(channel)
+        db_session.commit()
+        chunk = BackfillChunk(channel_id=channel.id, min_id=0, max_id=51, status="queued", posts_count=0)
+        db_session.add(chunk)
+        db_session.commit()
+        return chunk
+
+    @pytest.fixture(autouse=True)
+    def patched(self, db_session):
+        """Run chunks against the test database and a range parser."""
+        RangeParser.calls = []
+        RangeParser.fail_after = None
+        RangeParser.defer_after = None
+        RangeParser.deleted = set()
+        session_factory = sessionmaker(bind=db_session.get_bind())
+
+        with patch.object(tasks, "SessionLocal", session_factory), \
+                patch.object(tasks, "ChannelParserAgent", RangeParser):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_chunk_resumes_after_failure(self, db_session, chunk):
+        """Test that a failed chunk keeps its cursor and resumes after it."""
+        RangeParser.fail_after = 25
+        with pytest.raises(ConnectionError):
+            await tasks._run_backfill_chunk(make_client(), chunk.id)
+
+        db_session.expire_all()
+        assert chunk.status == "failed"
+        assert chunk.cursor_id == 20
+        assert chunk.posts_count == 20
+
+        RangeParser.fail_after = None
+        result = await tasks._run_backfill_chunk(make_client(), chunk.id)
+
+        db_session.expire_all()
+        assert RangeParser.calls == [(0, 51), (20, 51)]
+        assert result["inserted"] == 30
+        assert chunk.status == "done"
+        assert chunk.posts_count == 50
+        assert db_session.query(Post).count() == 50
+
+    @pytest.mark.asyncio
+    async def test_done_chunk_is_skipped(self, db_session, chunk):
+        """Test that a finished chunk is not fetched again."""
+        chunk.status = "done"
+        db_session.commit()
+
+        result = await tasks._run_backfill_chunk(make_client(), chunk.id)
+
+        assert result["status"] == "done"
+        assert RangeParser.calls == []
+
+    @pytest.mark.asyncio
+    async def test_deferred_chunk_stays_queued(self, db_session, chunk):
+        """Test that a chunk deferred by the rate limiter keeps its cursor and stays queued."""
+        RangeParser.defer_after = 30
+        with pytest.raises(RateLimitDeferred):
+            await tasks._run_backfill_chunk(make_client(), chunk.id)
+
+        db_session.expire_all()
+        assert chunk.status == "queued"
+        assert chunk.cursor_id == 30
+        assert chunk.error is None
+
+
+class TestFillChannelGapsTask:
+    """Test fetching of missing message ID ranges."""
+
+    @pytest.fixture
+    def channel(self, db_session):
+        """Create channel with stored posts 1, 5 and 9."""
+        channel = Channel(channel_username="test_channel", channel_name="Test Channel")
+        db_session.add(channel)
+        db_session.commit()
+        db_session.add_all([
+            Post(post_id=str(post_id), channel_id=channel.id, date=datetime(2024, 1, 1), content_type="text")
+            for post_id in (1, 5, 9)
+        ])
+        db_session.commit()
+        return channel
+
+    @pytest.fixture(autouse=True)
+    def patched(self, db_session):
+        """Run the task against the test database, a range parser and mock clients."""
+        RangeParser.calls = []
+        RangeParser.fail_after = None
+        RangeParser.defer_after = None
+        RangeParser.deleted = set()
+        pool = TelegramClientPool(1, client_factory=lambda index: make_client())
+        session_factory = sessionmaker(bind=db_session.get_bind())
+
+        with patch.object(tasks, "SessionLocal", session_factory), \
+                patch.object(tasks, "ChannelParserAgent", RangeParser), \
+                patch.object(tasks, "get_client_pool", return_value=pool):
+            yield
+
+    def test_empty_gaps_are_not_fetched_again(self, db_session, channel):
+        """Test that a gap of deleted messages is fetched only once."""
+        RangeParser.deleted = {2, 3, 4}
+
+        result = tasks.fill_channel_gaps_task(channel.id)
+
+        assert result == {"gaps": 2, "inserted": 3, "updated": 0, "skipped": 0}
+        assert RangeParser.calls == [(5, 9), (1, 5)]
+
+        RangeParser.calls = []
+        assert tasks.fill_channel_gaps_task(channel.id)["gaps"] == 0
+        assert RangeParser.calls == []
+
+    def test_duplicate_task_is_coalesced(self, channel, parse_locks):
+        """Test that gaps of a channel are filled by one task at a time."""
+        ChannelParseLease(channel.id, "fill_gaps", "running-task", parse_locks).acquire()
+
+        result = tasks.fill_channel_gaps_task(channel.id)
+
+        assert result == {"status": "duplicate", "task_id": "running-task"}
+        assert RangeParser.calls == []
@@ -0,0 +1,89 @@
+"""
+Tests for worker-scoped Telegram client pool.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.core.telegram_pool import TelegramClientPool
+
+
+def make_client():
+    """Create mock Telegram client that tracks its connection state."""
+    client = MagicMock()
+    state = {"connected": False}
+
+    async def connect():
+        state["connected"] = True
+
+    async def disconnect():
+        state["connected"] = False
+
+    client.is_connected.side_effect = lambda: state["connected"]
+    client.connect = AsyncMock(side_effect=connect)
+    client.disconnect = AsyncMock(side_effect=disconnect)
+    client.is_user_authorized = AsyncMock(return_value=True)
+    return client
+
+
+class TestTelegramClientPool:
+    """Test Telegram client pool."""
+
+    @pytest.fixture
+    def clients(self):
+        """Create mock clients."""
+        return [make_client(), make_client()]
+
+    @pytest.fixture
+    def pool(self, clients):
+        """Create pool of two mock clients."""
+        return TelegramClientPool(2, client_factory=lambda index: clients[index])
+
+    @pytest.mark.asyncio
+    async def test_connects_once(self, pool, clients):
+        """Test that a client stays connected between borrows."""
+        for _ in range(5):
+            async with pool.client() as client:
+                assert client.is_connected()
+
+        stats = pool.get_stats()
+        assert stats["connects"] == 2
+        assert stats["reconnects"] == 0
+        assert sum(client["uses"] for client in stats["clients"]) == 5
+        assert [client.connect.await_count for client in clients] == [1, 1]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_borrowers_get_different_clients(self, pool):
+        """Test that concurrent borrowers never share a client."""
+        async with pool.client() as first:
+            async with pool.client() as second:
+                assert first is not second
+                assert pool.get_stats()["idle"] == 0
+
+    @pytest.mark.asyncio
+    async def test_reconnect_after_connection_error(self, clients):
+        """Test that a client failing with a connection error is reconnected."""
+        pool = TelegramClientPool(1, client_factory=lambda index: clients[index])
+
+        async with pool.client():
+            pass
+
+        with pytest.raises(ConnectionError):
+            async with pool.client():
+                raise ConnectionError("lost")
+
+        async with pool.client() as client:
+            assert client.is_connected()
+
+        stats = pool.get_stats()
+        assert stats["reconnects"] == 1
+        assert stats["clients"][0]["failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unauthorized_session(self, pool, clients):
+        """Test that an unauthorized session is reported."""
+        clients[0].is_user_authorized.return_value = False
+
+        with pytest.raises(RuntimeError):
+            async with pool.client():
+                pass
+
+        assert pool.get_stats()["idle"] == 2
@@ -0,0 +1,146 @@
+"""
+Tests for streaming trend detection.
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.core import trends
+from app.core.trends import (
+    CountMinSketch, InMemoryTrendStore, RedisTrendStore, SpaceSaving, TrendDetector, post_trend_values
+)
+from app.main import app
+
+HOUR = 3600
+# 2024-04-30 12:30 UTC
+NOW = 1714480200
+
+
+def _post(hour, hashtags=(), mentions=(), links=()):
+    """Build analyzed post published at a given hour before NOW."""
+    return {
+        "date": datetime.utcfromtimestamp(NOW - hour * HOUR),
+        "hashtags": list(hashtags),
+        "mentions": list(mentions),
+        "links": list(links),
+    }
+
+
+def _detector(store=None):
+    """Detector with hourly buckets, a 2 hour window and a 10 hour baseline."""
+    return TrendDetector(
+        store=store or InMemoryTrendStore(capacity=10, width=256, depth=4, retention_buckets=12),
+        bucket_seconds=HOUR,
+        window_buckets=2,
+        baseline_buckets=10,
+        clock=lambda: NOW
+    )
+
+
+class TestSketches:
+    """Test Count-Min sketch and Space-Saving summaries."""
+
+    def test_count_min_never_underestimates(self):
+        """Test that estimates are at least the true counts."""
+        sketch = CountMinSketch(width=16, depth=3)
+        for i in range(200):
+            sketch.add(f"#tag{i % 40}")
+
+        assert all(sketch.estimate(f"#tag{i}") >= 5 for i in range(40))
+        assert CountMinSketch(width=16, depth=3).estimate("#tag1") == 0
+
+    def test_space_saving_keeps_heavy_hitters(self):
+        """Test that values more frequent than total / capacity survive a stream of rare ones."""
+        summary = SpaceSaving(capacity=4)
+        for i in range(100):
+            summary.add("#hot")
+            summary.add(f"#rare{i}")
+            if i % 4:
+                summary.add("#warm")
+
+        top = summary.top(2)
+        assert [value for value, _ in top] == ["#hot", "#warm"]
+        assert top[0][1] >= 100
+        assert len(summary.counts) == 4
+
+    def test_post_values(self):
+        """Test that values are lowercased, deduplicated and links reduced to domains."""
+        values = post_trend_values({
+            "hashtags": ["#News", "#news"],
+            "mentions": None,
+            "links": ["https://www.Example.com/a", "https://example.com/b", "not a link"],
+        })
+
+        assert values == {"hashtag": ["#news"], "mention": [], "domain": ["example.com"]}
+        # Raw posts from real-time ingestion are tokenized
+        assert post_trend_values({"text": "Read @Channel at https://t.me/x"}) == {
+            "hashtag": [], "mention": ["@channel"], "domain": ["t.me"]
+        }
+
+
+class TestTrendDetector:
+    """Test burst scoring against the baseline."""
+
+    def test_burst_outranks_steady_value(self):
+        """Test that a sudden value trends and an always popular one does not."""
+        detector = _detector()
+        posts = []
+        for hour in range(12):
+            posts.extend(_post(hour, hashtags=["#daily"]) for _ in range(5))
+        posts.extend(_post(0, hashtags=["#launch"], links=["https://launch.io/x"]) for _ in range(6))
+        posts.append(_post(1, hashtags=["#launch"]))
+
+        assert detector.record(posts) == len(posts)
+        result = detector.trends(limit=5, min_count=3)
+
+        hashtags = result["trends"]["hashtag"]
+        assert [trend["value"] for trend in hashtags] == ["#launch", "#daily"]
+        assert hashtags[0]["count"] == 7
+        assert hashtags[0]["baseline_count"] == 0
+        assert hashtags[1]["score"] == pytest.approx(0.0)
+        assert result["trends"]["domain"][0]["value"] == "launch.io"
+        assert result["window_end"] == datetime(2024, 4, 30, 13)
+
+    def test_old_posts_ignored(self):
+        """Test that backfilled history does not count."""
+        detector = _detector()
+
+        assert detector.record([_post(12, hashtags=["#old"]), _post(100, hashtags=["#old"])]) == 0
+        assert detector.trends(min_count=1)["trends"]["hashtag"] == []
+
+    def test_redis_down_falls_back_to_memory(self):
+        """Test that counting and reading keep working in process memory when Redis fails."""
+        class DownRedis:
+            def pipeline(self, transaction=True):
+                raise RedisConnectionError("connection refused")
+
+        store = RedisTrendStore(capacity=10, width=256, depth=4, retention_buckets=12, bucket_seconds=HOUR)
+        store._client = DownRedis()
+        detector = _detector(store)
+
+        detector.record([_post(0, mentions=["@news"]) for _ in range(3)])
+
+        assert detector.trends(min_count=1)["trends"]["mention"][0]["value"] == "@news"
+
+
+class TestTrendsApi:
+    """Test /trends endpoint."""
+
+    def test_get_trends(self):
+        """Test that trends are served from the shared detector."""
+        detector = _detector()
+        detector.record([_post(0, hashtags=["#api"]) for _ in range(3)])
+
+        with patch.object(trends, "_trend_detector", detector):
+            response = TestClient(app).get("/trends/", params={"types": "hashtag", "min_count": 2})
+
+        assert response.status_code == 200
+        assert list(response.json()["trends"]) == ["hashtag"]
+        assert response.json()["trends"]["hashtag"][0]["value"] == "#api"
+
+    def test_unknown_type(self):
+        """Test that unknown trend types are rejected."""
+        response = TestClient(app).get("/trends/", params={"types": "emoji"})
+
+        assert response.status_code == 400